@@ -1,4 +1,6 @@
+from constants.constants import BULK_MAX_WORKERS
 from custom_requester.custom_requester import CustomRequester
+from models.bulk_models import BulkOperationReport
 
 class UserAPI(CustomRequester):
     USER_BASE_URL = "https://auth.dev-cinescope.coconutqa.ru/"
@@ -18,10 +20,44 @@ class UserAPI(CustomRequester):
             expected_status=expected_status
         )
 
-    def delete_user(self, user_locator, expected_status=200):
+    def delete_user(self, user_locator, expected_status=200, **kwargs):
         """Удаление пользователя по ID или email"""
         return self.send_request(
             method="DELETE",
             endpoint=f"user/{user_locator}",
-            expected_status=expected_status
+            expected_status=expected_status,
+            **kwargs
+        )
+
+    def create_users(self, users_data, max_workers=BULK_MAX_WORKERS, expected_status=201,
+                     need_logging=False) -> BulkOperationReport:
+        """Пакетное создание пользователей с ограниченной параллельностью"""
+        return self.run_bulk(
+            operation="create_users",
+            items=users_data,
+            call=lambda user_data: self.send_request(
+                method="POST",
+                endpoint="user",
+                data=user_data,
+                expected_status=expected_status,
+                need_logging=need_logging
+            ),
+            id_getter=lambda user_data, response_data: (response_data or {}).get("id"),
+            max_workers=max_workers
+        )
+
+    def get_users(self, user_locators, max_workers=BULK_MAX_WORKERS, expected_status=200,
+                  need_logging=False) -> BulkOperationReport:
+        """Пакетное получение пользователей по ID или email"""
+        return self.run_bulk(
+            operation="get_users",
+            items=user_locators,
+            call=lambda user_locator: self.send_request(
+                method="GET",
+                endpoint=f"user/{user_locator}",
+                expected_status=expected_status,
+                need_logging=need_logging
+            ),
+            id_getter=lambda user_locator, response_data: user_locator,
+            max_workers=max_workers
         )
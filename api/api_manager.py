@@ -1,6 +1,7 @@
 from api.auth_api import AuthAPI
 from api.UserAPI import UserAPI
 from api.movies_api import MoviesAPI
+from api.reviews_api import ReviewsAPI
 
 class ApiManager:
     """Класс для управления API-классами с единой HTTP-сессией."""
@@ -13,6 +14,7 @@ class ApiManager:
         self.auth_api = AuthAPI(session)
         self.user_api = UserAPI(session)
         self.movies_api = MoviesAPI(session)
+        self.reviews_api = ReviewsAPI(session)
 
     def close_session(self):
         self.session.close()
@@ -1,5 +1,6 @@
-from constants.constants import MOVIES_BASE_URL
+from constants.constants import MOVIES_BASE_URL, BULK_MAX_WORKERS
 from custom_requester.custom_requester import CustomRequester
+from models.bulk_models import BulkOperationReport
 
 
 class MoviesAPI(CustomRequester):
@@ -34,19 +35,65 @@ class MoviesAPI(CustomRequester):
             expected_status=expected_status
         )
 
-    def update_movie(self, movie_id, update_data, expected_status=200):
+    def update_movie(self, movie_id, update_data, expected_status=200, **kwargs):
         """PATCH /movies/{id} - Обновление фильма"""
         return self.send_request(
             method="PATCH",
             endpoint=f"/movies/{movie_id}",
             data=update_data,
-            expected_status=expected_status
+            expected_status=expected_status,
+            **kwargs
         )
 
-    def delete_movie(self, movie_id, expected_status=200):
+    def delete_movie(self, movie_id, expected_status=200, **kwargs):
         """DELETE /movies/{id} - Удаление фильма"""
         return self.send_request(
             method="DELETE",
             endpoint=f"/movies/{movie_id}",
-            expected_status=expected_status
+            expected_status=expected_status,
+            **kwargs
+        )
+
+    def create_movies(self, movies_data, max_workers=BULK_MAX_WORKERS, expected_status=201,
+                      need_logging=False) -> BulkOperationReport:
+        """
+        Пакетное создание фильмов с ограниченной параллельностью.
+        Упавшие запросы не прерывают пакет, а попадают в отчет.
+        :param movies_data: Список данных фильмов для POST /movies.
+        :return: BulkOperationReport, entity_ids - ID созданных фильмов.
+        """
+        return self.run_bulk(
+            operation="create_movies",
+            items=movies_data,
+            call=lambda movie: self.send_request(
+                method="POST",
+                endpoint="/movies",
+                data=movie,
+                expected_status=expected_status,
+                need_logging=need_logging
+            ),
+            id_getter=lambda movie, response_data: (response_data or {}).get("id"),
+            max_workers=max_workers
+        )
+
+    def delete_movies(self, movie_ids, max_workers=BULK_MAX_WORKERS, expected_status=200,
+                      need_logging=False) -> BulkOperationReport:
+        """
+        Пакетное удаление фильмов по ID с ограниченной параллельностью.
+        :param movie_ids: Список ID фильмов.
+        :param expected_status: Статус или список статусов, считающихся успехом
+                                (например [200, 404] для идемпотентной очистки).
+        :return: BulkOperationReport, failed - фильмы, которые не удалось удалить.
+        """
+        return self.run_bulk(
+            operation="delete_movies",
+            items=movie_ids,
+            call=lambda movie_id: self.send_request(
+                method="DELETE",
+                endpoint=f"/movies/{movie_id}",
+                expected_status=expected_status,
+                need_logging=need_logging
+            ),
+            id_getter=lambda movie_id, response_data: movie_id,
+            max_workers=max_workers
         )
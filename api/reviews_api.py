@@ -0,0 +1,44 @@
+from constants.constants import MOVIES_BASE_URL
+from custom_requester.custom_requester import CustomRequester
+
+
+class ReviewsAPI(CustomRequester):
+    """Класс для работы с отзывами к фильмам"""
+
+    def __init__(self, session):
+        super().__init__(session, MOVIES_BASE_URL)
+
+    def get_reviews(self, movie_id, expected_status=200, **kwargs):
+        """GET /movies/{id}/reviews - Получение отзывов к фильму"""
+        return self.send_request(
+            method="GET",
+            endpoint=f"/movies/{movie_id}/reviews",
+            expected_status=expected_status,
+            **kwargs
+        )
+
+    def create_review(self, movie_id, review_data, expected_status=201, **kwargs):
+        """
+        POST /movies/{id}/reviews - Создание отзыва от имени текущего пользователя
+        :param review_data: {"rating": int, "text": str}
+        """
+        return self.send_request(
+            method="POST",
+            endpoint=f"/movies/{movie_id}/reviews",
+            data=review_data,
+            expected_status=expected_status,
+            **kwargs
+        )
+
+    def delete_review(self, movie_id, user_id=None, expected_status=200, **kwargs):
+        """
+        DELETE /movies/{id}/reviews - Удаление отзыва
+        :param user_id: ID автора отзыва (для администратора). Без него удаляется свой отзыв.
+        """
+        return self.send_request(
+            method="DELETE",
+            endpoint=f"/movies/{movie_id}/reviews",
+            params={"userId": user_id} if user_id else None,
+            expected_status=expected_status,
+            **kwargs
+        )
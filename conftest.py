@@ -1,3 +1,4 @@
+import os
 import random
 
 import allure
@@ -8,7 +9,7 @@ from faker import Faker
 from datetime import datetime
 from typing import Dict,Any
 from api.api_manager import ApiManager
-from constants.constants import AUTH_BASE_URL, MOVIES_BASE_URL
+from constants.constants import AUTH_BASE_URL, MOVIES_BASE_URL, MOVIE_POOL_SIZE, USER_POOL_SIZE
 from custom_requester.custom_requester import CustomRequester
 from entities.user import User
 from constants.roles import Roles
@@ -16,15 +17,66 @@ from models.user_models import RegistrationUserData, LoginRequest, LoginResponse
 from pages import ReviewPage, CinescopLoginPage
 from tools import Tools
 from utils.data_generator import DataGenerator
+from utils.run_tag import tag_name
+from utils.catalog_mirror import MovieCatalogMirror
+from utils.movie_catalog import MovieCatalog
+from utils.movie_pool import MoviePool
+from utils.user_pool import UserPool
+from utils.cleanup_registry import CleanupRegistry
 from resources.user_creds import SuperAdminCreds
 from sqlalchemy.orm import Session
-from db_requester.db_client import get_db_session
+from db_requester import db_client
+from db_requester.db_client import get_db_session, get_read_db_session, isolated_db_session
+from db_requester.dataset_loader import DatasetLoad, DatasetLoader
 from db_requester.db_helpers import DBHelper, MovieDBHelper
+from db_requester.password_hashes import PasswordHashCache
+from db_requester.pool_metrics import PoolMetrics
+from db_requester.template_db import DB_CLONE_PER_WORKER, TemplateDatabase
 from db_models.movies import MovieDBModel
 from playwright.sync_api import sync_playwright
 
 
 faker = Faker()
+_WORKER_POOL_METRICS = pytest.StashKey[dict]()
+# Пулы в итогах прогона: ключ в workeroutput -> (заголовок, метрики, движок создан)
+_POOL_REPORTS = {
+    'db_pool_metrics': ("DB connection pool", db_client.pool_metrics, db_client.is_engine_initialized),
+    'db_read_pool_metrics': ("DB read pool", db_client.read_pool_metrics, db_client.is_read_engine_initialized),
+}
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--db-rollback", action="store_true", default=False,
+        help="Изолировать DB-тесты транзакцией с откатом вместо удаления данных"
+    )
+
+def pytest_sessionfinish(session):
+    """xdist-воркер передает метрики пулов контроллеру через workeroutput"""
+    workeroutput = getattr(session.config, 'workeroutput', None)
+    if workeroutput is not None:
+        for key, (_, metrics, initialized) in _POOL_REPORTS.items():
+            if initialized():
+                workeroutput[key] = metrics.as_dict()
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """Контроллер xdist собирает метрики пулов завершившихся воркеров"""
+    collected = node.config.stash.setdefault(_WORKER_POOL_METRICS, {})
+    for key in _POOL_REPORTS:
+        metrics = getattr(node, 'workeroutput', {}).get(key)
+        if metrics:
+            collected.setdefault(key, []).append(metrics)
+
+def pytest_terminal_summary(terminalreporter):
+    """Метрики пулов соединений БД в итогах прогона (под xdist - сводка по всем воркерам)"""
+    worker_metrics = terminalreporter.config.stash.get(_WORKER_POOL_METRICS, {})
+    for key, (title, metrics, initialized) in _POOL_REPORTS.items():
+        if worker_metrics.get(key):
+            terminalreporter.write_sep("-", f"{title} ({len(worker_metrics[key])} workers)")
+            terminalreporter.write_line(metrics.summary(PoolMetrics.merge(worker_metrics[key])))
+        elif initialized():
+            terminalreporter.write_sep("-", title)
+            terminalreporter.write_line(metrics.summary())
 
 def get_auth_token():
     """Получение токена"""
@@ -74,6 +126,30 @@ def session(auth_token):
     yield http_session
     http_session.close()
 
+def _delete_db_rows(helper_class, method_name):
+    """Пакетное удаление строк в отдельной сессии БД (вызывается из потоков CleanupRegistry)"""
+    def _delete(entity_ids):
+        db_session = get_db_session()
+        try:
+            getattr(helper_class(db_session), method_name)(entity_ids)
+        finally:
+            db_session.close()
+    return _delete
+
+@pytest.fixture(scope='session')
+def cleanup_registry() -> CleanupRegistry:
+    """
+    Реестр отложенной очистки: фикстуры кладут сюда сущности вместо удаления в teardown,
+    удаление идет пачками в фоне и в конце сессии.
+    """
+    registry = CleanupRegistry()
+    registry.register_handler('db_user', delete_batch=_delete_db_rows(DBHelper, 'delete_users_by_ids'))
+    registry.register_handler('db_movie', delete_batch=_delete_db_rows(MovieDBHelper, 'delete_movies_by_ids'))
+    yield registry
+    failures = registry.close()
+    if failures:
+        print(f"Cleanup registry: {len(failures)} entities were not deleted")
+
 @pytest.fixture(scope='session')
 def api_manager(session):
     """Фикстура для создания экземпляра ApiManager."""
@@ -84,26 +160,53 @@ def movie_data():
     """Фикстура с данными для создания фильма"""
     return DataGenerator.generate_movie_data()
 
+@pytest.fixture(scope='session')
+def movie_catalog(api_manager) -> MovieCatalog:
+    """
+    Снимок каталога фильмов с индексами, строится один раз за сессию.
+    Каталог берется из локального зеркала, которое догружает только новые фильмы.
+    """
+    mirror = MovieCatalogMirror()
+    mirror.sync(api_manager.movies_api)
+    return mirror.catalog()
+
+@pytest.fixture(scope='session')
+def movie_pool(api_manager) -> MoviePool:
+    """Сессионный пул заранее созданных фильмов, в конце сессии удаляется пакетно"""
+    pool = MoviePool(api_manager.movies_api, size=int(os.getenv('MOVIE_POOL_SIZE', MOVIE_POOL_SIZE)))
+    pool.fill()
+    yield pool
+    report = pool.close()
+    if report and report.failed:
+        print(f"Movie pool cleanup failed for: {[result.entity_id for result in report.failed]}")
+
 @pytest.fixture
-def created_movie(api_manager, movie_data):
-    """Фикстура для создания тестового фильма с последующим удалением"""
-    movie_id = None
-    try:
-        response = api_manager.movies_api.create_movie(movie_data)
-        if response.status_code == 201:
-            movie_data = response.json()
-            movie_id = movie_data["id"]
-            yield movie_data
-        else:
-            yield None
+def created_movie(movie_pool):
+    """
+    Фикстура с тестовым фильмом из сессионного пула. Фильм не новый: его уже использовали другие тесты,
+    данные - снимок на момент создания пула. После теста фильм откатывается к исходным данным.
+    """
+    with movie_pool.leased() as movie:
+        yield movie
 
-    finally:
-        # Удаляем фильм после теста
-        if movie_id:
-            try:
-                api_manager.movies_api.delete_movie(movie_id)
-            except:
-                pass
+@pytest.fixture
+def created_movies(api_manager, cleanup_registry):
+    """Фабрика для пакетного создания фильмов, удаление - через реестр отложенной очистки"""
+    cleanup_registry.register_handler(
+        'api_movie',
+        delete_one=lambda movie_id: api_manager.movies_api.delete_movie(
+            movie_id, expected_status=[200, 404], need_logging=False)
+    )
+
+    def _create_movies(count: int):
+        report = api_manager.movies_api.create_movies(
+            [DataGenerator.generate_movie_data() for _ in range(count)]
+        )
+        for movie_id in report.entity_ids:
+            cleanup_registry.push('api_movie', movie_id)
+        return report
+
+    return _create_movies
 
 @pytest.fixture(scope="session")
 def requester():
@@ -156,97 +259,57 @@ def registration_user_data() -> RegistrationUserData:
 
 @pytest.fixture
 def create_user_data(registration_user_data: RegistrationUserData) -> RegistrationUserData:
-    """Алиас для registration_user_data для обратной совместимости.
-    Используется в фикстуре common_user."""
+    """Алиас для registration_user_data для обратной совместимости."""
     return registration_user_data
 
-@pytest.fixture
-def common_user(user_session, super_admin, registration_user_data: RegistrationUserData):
-    """Фикстура для создания обычного пользователя."""
-    new_session = user_session()
-
-    # Создаем UserCreateRequest с обязательными полями
-    user_request = UserCreateRequest(
-        email=registration_user_data.email,
-        fullName=registration_user_data.fullName,
-        password=registration_user_data.password,
-        roles=registration_user_data.roles,
-        verified=True,
-        banned=False
-    )
-
-    user_data = user_request.model_dump()
-    user_data['roles'] = [role.value for role in user_request.roles]
+@pytest.fixture(scope='session')
+def user_pool(api_manager) -> UserPool:
+    """
+    Пул переиспользуемых пользователей: сохраняется на диске между запусками,
+    при старте сессии проверяется одним пакетным запросом и дозаполняется.
+    """
+    pool = UserPool(api_manager.user_api)
+    pool.ensure({Roles.USER: USER_POOL_SIZE, Roles.ADMIN: USER_POOL_SIZE})
+    return pool
 
-    # Создаем пользователя через API суперадмина
-    super_admin.api.user_api.create_user(user_data)
+@pytest.fixture
+def common_user(user_session, user_pool):
+    """Фикстура с обычным пользователем из переиспользуемого пула."""
+    pooled_user = user_pool.get(Roles.USER)
 
-    # Создаем объект User для common_user
     common_user = User(
-        registration_user_data.email,
-        registration_user_data.password,
-        [role.value for role in registration_user_data.roles],
-        new_session
+        pooled_user.email,
+        pooled_user.password,
+        pooled_user.roles,
+        user_session()
     )
 
     common_user.api.auth_api.authenticate(common_user.creds)
     return common_user
 
 @pytest.fixture
-def admin_user(user_session, super_admin):
-    """Фикстура для создания пользователя с ролью ADMIN."""
-    new_session = user_session()
-
-    # Создаем RegistrationUserData для админа
-    random_password = DataGenerator.generate_random_password()
-
-    admin_registration_data = RegistrationUserData(
-        email=DataGenerator.generate_random_email(),
-        fullName=DataGenerator.generate_random_name(),
-        password=random_password,
-        passwordRepeat=random_password,
-        roles=[Roles.ADMIN]
-    )
+def admin_user(user_session, user_pool):
+    """Фикстура с пользователем с ролью ADMIN из переиспользуемого пула."""
+    pooled_user = user_pool.get(Roles.ADMIN)
 
-    # Создаем UserCreateRequest с обязательными полями
-    admin_request = UserCreateRequest(
-        email=admin_registration_data.email,
-        fullName=admin_registration_data.fullName,
-        password=admin_registration_data.password,
-        roles=admin_registration_data.roles,
-        verified=True,
-        banned=False
-    )
-
-    # Преобразуем модель в словарь и Enum в строки
-    admin_data = admin_request.model_dump()
-    admin_data['roles'] = [role.value for role in admin_request.roles]
-
-    # Создаем админа через API
-    super_admin.api.user_api.create_user(admin_data)
-
-    # Создаем объект User для админа
     admin_user = User(
-        admin_registration_data.email,
-        admin_registration_data.password,
-        [role.value for role in admin_registration_data.roles],
-        new_session
+        pooled_user.email,
+        pooled_user.password,
+        pooled_user.roles,
+        user_session()
     )
 
     admin_user.api.auth_api.authenticate(admin_user.creds)
-
-    yield admin_user
-
-    # Очистка после теста
-    try:
-        if hasattr(super_admin.api.user_api, 'delete_user'):
-            super_admin.api.user_api.delete_user(admin_user.email)
-    except Exception as e:
-        print(f"Cleanup error for admin {admin_user.email}: {e}")
+    return admin_user
 
 @pytest.fixture(scope="function")
-def registered_user(api_manager, registration_user_data: RegistrationUserData):
-    """Фикстура для регистрации пользователя с автоматической очисткой."""
+def registered_user(api_manager, cleanup_registry, registration_user_data: RegistrationUserData):
+    """Фикстура для регистрации пользователя с отложенной очисткой."""
+    cleanup_registry.register_handler(
+        'api_user',
+        delete_one=lambda user_id: api_manager.user_api.delete_user(
+            user_id, expected_status=[200, 404], need_logging=False)
+    )
     user_id = None
 
     try:
@@ -298,13 +361,38 @@ def registered_user(api_manager, registration_user_data: RegistrationUserData):
             print(f"Registration error: {e}")
             raise
     finally:
-        # Очистка
+        # Очистка откладывается до конца сессии
         if user_id:
-            try:
-                if hasattr(api_manager.user_api, 'delete_user'):
-                    api_manager.user_api.delete_user(user_id)
-            except Exception as cleanup_error:
-                print(f"Cleanup error for user {user_id}: {cleanup_error}")
+            cleanup_registry.push('api_user', user_id)
+
+@pytest.fixture(scope="session", autouse=True)
+def worker_database():
+    """
+    С DB_CLONE_PER_WORKER=1 каждый xdist-воркер работает в своем клоне шаблонной базы:
+    данные воркеров не пересекаются. Клон удаляется в конце сессии.
+    """
+    if not DB_CLONE_PER_WORKER or db_client.is_sqlite_backend():
+        yield None
+        return
+    worker = os.getenv('PYTEST_XDIST_WORKER', 'master')
+    template = TemplateDatabase()
+    clone_name = template.create_clone(worker)
+    db_client.use_database(clone_name)
+    yield clone_name
+    db_client.dispose_engine()
+    template.drop_clone(worker)
+
+@pytest.fixture(autouse=True)
+def sql_profile(request):
+    """
+    SQL-профиль теста: количество и время запросов, повторяющиеся запросы (N+1)
+    и планы медленных запросов. Прикладывается к Allure, если тест ходил в БД.
+    """
+    profile = db_client.sql_profiler.start(request.node.nodeid)
+    yield profile
+    db_client.sql_profiler.stop()
+    if profile.count:
+        allure.attach(profile.report(), name="SQL profile", attachment_type=allure.attachment_type.TEXT)
 
 @pytest.fixture(scope="module")
 def db_session() -> Session:
@@ -316,31 +404,81 @@ def db_session() -> Session:
     yield db_session
     db_session.close()
 
+@pytest.fixture(scope="module")
+def db_read_session() -> Session:
+    """Сессия для проверочных чтений на отдельном read-only движке (или реплике)"""
+    db_read_session = get_read_db_session()
+    yield db_read_session
+    db_read_session.close()
+
+def _helper_read_session(request, db_test_session):
+    """В режиме отката читаем из той же сессии: незакоммиченные данные видны только ей"""
+    if db_test_session.info.get('isolated'):
+        return None
+    return request.getfixturevalue("db_read_session")
+
 @pytest.fixture(scope="function")
-def db_helper(db_session) -> DBHelper:
+def db_test_session(request) -> Session:
+    """
+    Сессия для DB-хелперов теста.
+    С маркером db_rollback или опцией --db-rollback тест работает во внешней транзакции
+    с SAVEPOINT, которая откатывается в конце теста. Иначе используется сессия модуля.
+    """
+    rollback_mode = request.config.getoption("--db-rollback") or \
+        request.node.get_closest_marker("db_rollback") is not None
+    if not rollback_mode:
+        yield request.getfixturevalue("db_session")
+        return
+    with isolated_db_session() as session:
+        yield session
+
+@pytest.fixture(scope="function")
+def db_helper(request, db_test_session) -> DBHelper:
     """
     Фикстура для экземпляра хелпера
     """
-    db_helper = DBHelper(db_session)
+    db_helper = DBHelper(db_test_session, read_session=_helper_read_session(request, db_test_session))
     return db_helper
 
 @pytest.fixture(scope="function")
-def created_test_user(db_helper):
+def created_test_user(db_helper, cleanup_registry):
     """
     Фикстура, которая создает тестового пользователя в БД
-    и удаляет его после завершения теста
+    и ставит его в очередь на удаление после завершения теста
+    (в режиме отката удалять нечего)
     """
     user = db_helper.create_test_user(DataGenerator.generate_user_data())
     yield user
-    # Cleanup после теста
-    if db_helper.get_user_by_id(user.id):
-        db_helper.delete_user(user)
+    if not db_helper.db_session.info.get('isolated'):
+        cleanup_registry.push('db_user', user.id)
+
+
+@pytest.fixture(scope="session")
+def password_hash_cache() -> PasswordHashCache:
+    """Пул паролей с заранее посчитанными bcrypt-хешами для вставки пользователей в БД"""
+    return PasswordHashCache()
+
+@pytest.fixture(scope="function")
+def seeded_users(db_session, cleanup_registry, password_hash_cache):
+    """
+    Фабрика пользователей, вставленных прямо в БД с корректными хешами паролей.
+    Вставка всегда коммитится (и под --db-rollback): пользователей должен видеть сервис авторизации.
+    Удаляются через реестр отложенной очистки.
+    """
+    helper = DBHelper(db_session)
+
+    def _seed_users(count: int = 1, roles: str = '{USER}'):
+        users = helper.seed_users(count, roles=roles, password_cache=password_hash_cache)
+        for user in users:
+            cleanup_registry.push('db_user', user.id)
+        return users
 
+    return _seed_users
 
 @pytest.fixture(scope="function")
-def movie_helper(db_session) -> MovieDBHelper:
+def movie_helper(request, db_test_session) -> MovieDBHelper:
     """Фикстура для хелпера фильмов"""
-    return MovieDBHelper(db_session)
+    return MovieDBHelper(db_test_session, read_session=_helper_read_session(request, db_test_session))
 
 
 @pytest.fixture(scope="function")
@@ -348,8 +486,8 @@ def sample_movie_data() -> Dict[str, Any]:
     """Тестовые данные фильма"""
     unique_id = str(uuid.uuid4())[:8]
     return {
-        'id': int(str(uuid.uuid4().int)[:8]),  # Числовой ID
-        'name': f"Тестовый фильм {uuid.uuid4().hex[:8]}",
+        'id': str(uuid.uuid4().int)[:8],  # Числовой ID строкой: в БД колонка text, сравнение text = integer - ошибка
+        'name': tag_name(f"Тестовый фильм {uuid.uuid4().hex[:8]}"),
         'price': random.randint(1, 50), # Целое число! int4
         'description': f'Описание тестового фильма {uuid.uuid4().hex[:8]}',
         'image_url': f'https://example.com/test_{uuid.uuid4().hex[:8]}.jpg',
@@ -362,14 +500,34 @@ def sample_movie_data() -> Dict[str, Any]:
 
 
 @pytest.fixture(scope="function")
-def created_test_movie(movie_helper, sample_movie_data) -> MovieDBModel:
-    """Создает и удаляет тестовый фильм"""
+def created_test_movie(movie_helper, cleanup_registry, sample_movie_data) -> MovieDBModel:
+    """Создает тестовый фильм и ставит его в очередь на удаление"""
     movie = movie_helper.create_movie(sample_movie_data)
     yield movie
+    if not movie_helper.db_session.info.get('isolated'):
+        cleanup_registry.push('db_movie', movie.id)
 
-    # Cleanup
-    if movie_helper.movie_exists(movie.id):
-        movie_helper.delete_movie(movie.id)
+@pytest.fixture(scope="function")
+def load_dataset(db_test_session, cleanup_registry):
+    """
+    Фабрика загрузки наборов данных из resources/datasets в сессию теста.
+    Фильмы набора получают случайные ключи и метку прогона, поэтому воркеры xdist не конфликтуют.
+    В режиме отката данные исчезают вместе с транзакцией, иначе загрузка коммитится,
+    а фильмы и пользователи набора ставятся в очередь на удаление.
+    """
+    loader = DatasetLoader(db_test_session, rekey=True)
+    cleanup_kinds = {'movies': 'db_movie', 'users': 'db_user'}
+
+    def _load_dataset(name: str, version: int = None) -> DatasetLoad:
+        loaded = loader.load(name, version)
+        if not db_test_session.info.get('isolated'):
+            db_test_session.commit()
+            for table_name in loaded.keys.keys() & cleanup_kinds.keys():
+                for key in loaded.keys[table_name].values():
+                    cleanup_registry.push(cleanup_kinds[table_name], key)
+        return loaded
+
+    return _load_dataset
 
 #ФИКСТУРЫ PLAYWRIGHT
 
@@ -411,10 +569,11 @@ def authenticated_admin(page):
 
 
 @pytest.fixture
-def review_page_for_admin(authenticated_admin):
+def review_page_for_admin(authenticated_admin, api_manager):
     """
     Фикстура: подготовленная страница с отзывами для админа.
-    Использует исправленный go_to_movie_details.
+    Отзыв администратора удаляется через API до и после теста,
+    браузер используется только для проверяемого сценария.
     """
     review_page = ReviewPage(authenticated_admin)
 
@@ -425,19 +584,18 @@ def review_page_for_admin(authenticated_admin):
     assert "/movies/" in authenticated_admin.url, \
         f"Не на странице фильма после go_to_movie_details! URL: {authenticated_admin.url}"
 
-    # Cleanup перед тестом: если уже есть отзыв - удаляем
-    try:
-        if not authenticated_admin.locator("textarea").first.is_visible(timeout=2000):
-            review_page.delete_review(0)
-            review_page.assert_review_deleted_successfully()
-            authenticated_admin.wait_for_load_state("networkidle")
-    except:
-        pass
+    # Cleanup перед тестом: api_manager авторизован тем же супер-админом, что и браузер
+    movie_id = review_page.get_current_movie_id()
+    api_manager.reviews_api.delete_review(movie_id, expected_status=[200, 404])
+    authenticated_admin.reload(wait_until="networkidle")
 
     yield review_page
 
     # Cleanup после теста
-    try:
-        review_page.delete_review(0)
-    except:
-        pass
\ No newline at end of file
+    api_manager.reviews_api.delete_review(movie_id, expected_status=[200, 404])
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    """Асинхронные тесты (pytest.mark.anyio) выполняются на asyncio - этого требует asyncpg"""
+    return 'asyncio'
@@ -10,4 +10,14 @@ REGISTER_ENDPOINT = '/register'
 
 MOVIES_ENDPOINT = '/movies'
 
-BROKEN_API_FILTERS = {'location', 'published'}
\ No newline at end of file
+BROKEN_API_FILTERS = {'location', 'published'}
+MOVIES_MAX_PAGE_SIZE = 20
+
+# Параллельность пакетных операций: не больше пула соединений requests (10 по умолчанию)
+BULK_MAX_WORKERS = 8
+
+# Размер сессионного пула фильмов (переопределяется переменной окружения MOVIE_POOL_SIZE)
+MOVIE_POOL_SIZE = 10
+
+# Количество переиспользуемых пользователей каждой роли в пуле
+USER_POOL_SIZE = 2
\ No newline at end of file
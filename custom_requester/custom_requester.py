@@ -1,9 +1,14 @@
 import json
-from typing import Optional, Type
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Type, Callable, Iterable, Any
 from pydantic import ValidationError
 import logging
 import os
 
+from constants.constants import BULK_MAX_WORKERS
+from models.bulk_models import BulkItemResult, BulkOperationReport
+
 
 class CustomRequester:
     """Кастомный реквестер для стандартизации и упрощения отправки HTTP-запросов."""
@@ -63,6 +68,61 @@ class CustomRequester:
 
         return response
 
+    def run_bulk(self, operation: str, items: Iterable[Any], call: Callable[[Any], Any],
+                 id_getter: Optional[Callable[[Any, Any], Any]] = None,
+                 max_workers: int = BULK_MAX_WORKERS) -> BulkOperationReport:
+        """
+        Выполняет call(item) для каждого элемента с ограниченной параллельностью.
+        Ошибки не пробрасываются, а попадают в отчет.
+        :param operation: Название операции для отчета.
+        :param items: Входные элементы (данные или ID).
+        :param call: Функция, отправляющая один запрос и возвращающая requests.Response.
+        :param id_getter: Функция (item, response) -> ID сущности для отчета.
+        :param max_workers: Максимальное количество одновременных запросов.
+        :return: BulkOperationReport с результатами в порядке входных элементов.
+        """
+        items = list(items)
+
+        def _run_one(index, item):
+            started = time.perf_counter()
+            try:
+                response = call(item)
+            except Exception as e:
+                return BulkItemResult(
+                    index=index,
+                    entity_id=id_getter(item, None) if id_getter else None,
+                    ok=False,
+                    latency_ms=(time.perf_counter() - started) * 1000,
+                    error=str(e)
+                )
+            data = None
+            try:
+                data = response.json() if response.text else None
+            except json.JSONDecodeError:
+                pass
+            return BulkItemResult(
+                index=index,
+                entity_id=id_getter(item, data) if id_getter else None,
+                ok=True,
+                status_code=response.status_code,
+                latency_ms=(time.perf_counter() - started) * 1000,
+                data=data if isinstance(data, dict) else None
+            )
+
+        started = time.perf_counter()
+        if items:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items)))) as executor:
+                results = list(executor.map(_run_one, range(len(items)), items))
+        else:
+            results = []
+        report = BulkOperationReport(
+            operation=operation,
+            total_time_ms=(time.perf_counter() - started) * 1000,
+            results=results
+        )
+        self.logger.info(report.summary())
+        return report
+
     def _update_session_headers(self, **kwargs):
         """
         Обновление заголовков сессии.
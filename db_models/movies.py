@@ -11,13 +11,14 @@ class MovieDBModel(Base):
 
     id = Column(String, primary_key=True)  # text в БД
     name = Column(String)  # text в БД
-    price = Column(Float)
+    # price и genre_id - int4 в БД: asyncpg приводит параметры к типу колонки модели, а схема SQLite создается по модели
+    price = Column(Integer)  # int4 в БД
     description = Column(String)
     image_url = Column(String)
     location = Column(String)
     published = Column(Boolean)
     rating = Column(Float)
-    genre_id = Column(String)
+    genre_id = Column(Integer)  # int4 в БД
     created_at = Column(DateTime)  # timestamp в БД
 
 
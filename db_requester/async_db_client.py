@@ -0,0 +1,60 @@
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from db_requester.db_client import (
+    enable_sqlite_savepoints, get_database_url, get_engine, get_pool_settings, is_sqlite_backend, sql_profiler
+)
+
+# Соединения asyncpg привязаны к event loop, поэтому у каждого loop свой движок
+_async_engines: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncEngine]' = weakref.WeakKeyDictionary()
+
+
+def get_async_database_url() -> str:
+    return get_database_url(driver='aiosqlite' if is_sqlite_backend() else 'asyncpg')
+
+
+def get_async_engine() -> AsyncEngine:
+    """Асинхронный движок для текущего event loop, создается при первом обращении"""
+    loop = asyncio.get_running_loop()
+    engine = _async_engines.get(loop)
+    if engine is None:
+        if is_sqlite_backend():
+            # Схему в общей in-memory базе создает и удерживает синхронный движок
+            get_engine()
+        engine = create_async_engine(
+            get_async_database_url(), echo=False, poolclass=AsyncAdaptedQueuePool, **get_pool_settings()
+        )
+        if is_sqlite_backend():
+            enable_sqlite_savepoints(engine.sync_engine)
+        sql_profiler.attach(engine.sync_engine)
+        _async_engines[loop] = engine
+    return engine
+
+
+async def dispose_async_engine():
+    """Закрывает соединения движка текущего event loop"""
+    engine = _async_engines.pop(asyncio.get_running_loop(), None)
+    if engine is not None:
+        await engine.dispose()
+
+
+#  фабрика асинхронных сессий; объекты не протухают после commit, чтобы не было ленивых загрузок
+AsyncSessionLocal = async_sessionmaker(class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+def get_async_db_session() -> AsyncSession:
+    """Создает новую асинхронную сессию БД"""
+    return AsyncSessionLocal(bind=get_async_engine())
+
+
+@asynccontextmanager
+async def async_db_session():
+    session = get_async_db_session()
+    try:
+        yield session
+    finally:
+        await session.close()
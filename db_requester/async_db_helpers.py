@@ -0,0 +1,118 @@
+import asyncio
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, TypeVar
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db_models.movies import MovieDBModel
+from db_models.user import UserDBModel
+from db_requester.async_db_client import async_db_session
+from db_requester.db_helpers import (
+    _USER_BY_ID, _USER_BY_EMAIL, _USER_EXISTS_BY_EMAIL, _DELETE_USERS_BY_IDS,
+    _MOVIE_BY_ID, _MOVIE_BY_NAME, _MOVIE_EXISTS, _MOVIE_EXISTS_BY_NAME, _DELETE_MOVIE,
+    _DELETE_MOVIES_BY_IDS, _MOVIES_BY_GENRE, _MOVIES_COUNT,
+)
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+class AsyncDBHelper:
+    """Асинхронный аналог DBHelper на AsyncSession"""
+
+    def __init__(self, db_session: AsyncSession):
+        self.db_session = db_session
+
+    async def create_test_user(self, user_data: dict) -> UserDBModel:
+        """Создает тестового пользователя"""
+        user = UserDBModel(**user_data)
+        self.db_session.add(user)
+        await self.db_session.commit()
+        return user
+
+    async def get_user_by_id(self, user_id: str) -> Optional[UserDBModel]:
+        return await self.db_session.scalar(_USER_BY_ID, {'user_id': user_id})
+
+    async def get_user_by_email(self, email: str) -> Optional[UserDBModel]:
+        return await self.db_session.scalar(_USER_BY_EMAIL, {'email': email})
+
+    async def user_exists_by_email(self, email: str) -> bool:
+        return await self.db_session.scalar(_USER_EXISTS_BY_EMAIL, {'email': email})
+
+    async def delete_users_by_ids(self, user_ids: List[str]) -> int:
+        """Удаляет пользователей по списку ID одним запросом"""
+        result = await self.db_session.execute(_DELETE_USERS_BY_IDS, {'ids': list(user_ids)},
+                                               execution_options={'synchronize_session': False})
+        await self.db_session.commit()
+        return result.rowcount
+
+
+class AsyncMovieDBHelper:
+    """Асинхронный аналог MovieDBHelper на AsyncSession"""
+
+    def __init__(self, db_session: AsyncSession):
+        self.db_session = db_session
+
+    async def create_movie(self, movie_data: Dict[str, Any]) -> MovieDBModel:
+        """Создаем новый фильм в БД"""
+        movie_data.setdefault('created_at', datetime.now())
+        movie = await self.db_session.scalar(insert(MovieDBModel).returning(MovieDBModel), movie_data)
+        await self.db_session.commit()
+        return movie
+
+    async def get_movie_by_id(self, movie_id: str) -> Optional[MovieDBModel]:
+        return await self.db_session.scalar(_MOVIE_BY_ID, {'movie_id': movie_id})
+
+    async def get_movie_by_name(self, name: str) -> Optional[MovieDBModel]:
+        return await self.db_session.scalar(_MOVIE_BY_NAME, {'name': name})
+
+    async def get_movies_by_genre(self, genre_id: int, published_only: bool = True) -> List[MovieDBModel]:
+        result = await self.db_session.scalars(_MOVIES_BY_GENRE[published_only], {'genre_id': genre_id})
+        return result.all()
+
+    async def movie_exists(self, movie_id: str) -> bool:
+        return await self.db_session.scalar(_MOVIE_EXISTS, {'movie_id': movie_id})
+
+    async def movie_exists_by_name(self, name: str) -> bool:
+        return await self.db_session.scalar(_MOVIE_EXISTS_BY_NAME, {'name': name})
+
+    async def get_movies_count(self, published_only: bool = False) -> int:
+        return await self.db_session.scalar(_MOVIES_COUNT[published_only])
+
+    async def delete_movie(self, movie_id: str) -> bool:
+        result = await self.db_session.execute(_DELETE_MOVIE, {'movie_id': movie_id},
+                                               execution_options={'synchronize_session': False})
+        await self.db_session.commit()
+        return result.rowcount > 0
+
+    async def delete_movies_by_ids(self, movie_ids: List[str]) -> int:
+        result = await self.db_session.execute(_DELETE_MOVIES_BY_IDS, {'ids': list(movie_ids)},
+                                               execution_options={'synchronize_session': False})
+        await self.db_session.commit()
+        return result.rowcount
+
+
+async def gather_in_sessions(items: Iterable[T], check: Callable[[AsyncSession, T], Awaitable[R]],
+                             concurrency: int = 10) -> List[R]:
+    """
+    Параллельно выполняет check(session, item) для каждого элемента.
+    Одна AsyncSession не допускает конкурентных запросов, поэтому у каждой задачи своя сессия,
+    а количество одновременных соединений ограничено concurrency.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(item: T) -> R:
+        async with semaphore:
+            async with async_db_session() as session:
+                return await check(session, item)
+
+    return list(await asyncio.gather(*(run(item) for item in items)))
+
+
+async def movies_exist(movie_ids: List[str], concurrency: int = 10) -> Dict[str, bool]:
+    """Параллельно проверяет наличие фильмов в БД"""
+    results = await gather_in_sessions(
+        movie_ids, lambda session, movie_id: AsyncMovieDBHelper(session).movie_exists(movie_id), concurrency
+    )
+    return dict(zip(movie_ids, results))
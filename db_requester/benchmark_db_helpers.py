@@ -0,0 +1,89 @@
+"""
+Сравнение задержки на вызов: legacy session.query(...) против заранее построенных select()-запросов хелперов.
+
+Запуск (нужны переменные окружения DB_MOVIES_*):
+    python -m db_requester.benchmark_db_helpers --calls 500
+"""
+import argparse
+import statistics
+import time
+from typing import Callable, Dict, List
+
+from db_models.movies import MovieDBModel
+from db_models.user import UserDBModel
+from db_requester.db_client import get_db_session
+from db_requester.db_helpers import DBHelper, MovieDBHelper
+
+
+def _measure(call: Callable[[], object], calls: int, warmup: int = 20) -> List[float]:
+    for _ in range(warmup):
+        call()
+    timings = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def _stats(timings: List[float]) -> Dict[str, float]:
+    timings = sorted(timings)
+    return {
+        'mean_ms': round(statistics.mean(timings), 3),
+        'p50_ms': round(timings[len(timings) // 2], 3),
+        'p95_ms': round(timings[int(len(timings) * 0.95) - 1], 3),
+    }
+
+
+def run_benchmark(calls: int = 500) -> Dict[str, Dict[str, Dict[str, float]]]:
+    session = get_db_session()
+    movie_helper = MovieDBHelper(session)
+    db_helper = DBHelper(session)
+    seeded_ids = []
+    try:
+        movie = session.query(MovieDBModel).first()
+        if movie is None:
+            seeded_ids = movie_helper.seed_movies(1000)
+            movie = movie_helper.get_movie_by_id(seeded_ids[0])
+        movie_id, movie_name = movie.id, movie.name
+        email = 'benchmark-missing@example.com'
+
+        cases = {
+            'movie_exists': (
+                lambda: session.query(MovieDBModel).filter(MovieDBModel.id == movie_id).count() > 0,
+                lambda: movie_helper.movie_exists(movie_id),
+            ),
+            'movie_exists_by_name': (
+                lambda: session.query(MovieDBModel).filter(MovieDBModel.name == movie_name).count() > 0,
+                lambda: movie_helper.movie_exists_by_name(movie_name),
+            ),
+            'user_exists_by_email': (
+                lambda: session.query(UserDBModel).filter(UserDBModel.email == email).count() > 0,
+                lambda: db_helper.user_exists_by_email(email),
+            ),
+            'get_movie_by_id': (
+                lambda: session.query(MovieDBModel).filter(MovieDBModel.id == movie_id).first(),
+                lambda: movie_helper.get_movie_by_id(movie_id),
+            ),
+        }
+        results = {}
+        for name, (legacy, current) in cases.items():
+            results[name] = {
+                'legacy': _stats(_measure(legacy, calls)),
+                'select': _stats(_measure(current, calls)),
+            }
+        return results
+    finally:
+        if seeded_ids:
+            movie_helper.delete_movies_by_ids(seeded_ids)
+        session.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark DB helper statements')
+    parser.add_argument('--calls', type=int, default=500)
+    args = parser.parse_args()
+
+    for case, variants in run_benchmark(args.calls).items():
+        for variant, stats in variants.items():
+            print(f"{case:<22} {variant:<7} " + '  '.join(f'{key}={value}' for key, value in stats.items()))
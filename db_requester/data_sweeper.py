@@ -0,0 +1,74 @@
+"""
+Удаление тестовых данных по метке прогона (см. utils/run_tag.py).
+
+Запуск:
+    python -m db_requester.data_sweeper --run-id 1a2b3c4d   # данные одного прогона
+    python -m db_requester.data_sweeper --older-than 24     # данные всех прогонов старше 24 часов
+"""
+import argparse
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from db_models.movies import MovieDBModel
+from db_models.user import UserDBModel
+from db_requester.db_client import get_db_session
+from utils.run_tag import RUN_ID, email_pattern, name_pattern
+
+logger = logging.getLogger(__name__)
+
+
+class DataSweeper:
+    """
+    Чистит тестовые данные одним set-based DELETE на таблицу:
+    фильмы находятся по метке в названии, пользователи - по метке в email.
+    """
+
+    def __init__(self, db_session: Session):
+        self.db_session = db_session
+
+    def _sweep(self, run_id: Optional[str], created_before: Optional[datetime] = None) -> Dict[str, int]:
+        movies = delete(MovieDBModel).where(MovieDBModel.name.like(name_pattern(run_id)))
+        users = delete(UserDBModel).where(UserDBModel.email.like(email_pattern(run_id)))
+        if created_before is not None:
+            movies = movies.where(MovieDBModel.created_at < created_before)
+            users = users.where(UserDBModel.created_at < created_before)
+
+        options = {'synchronize_session': False}
+        deleted = {
+            'movies': self.db_session.execute(movies, execution_options=options).rowcount,
+            'users': self.db_session.execute(users, execution_options=options).rowcount,
+        }
+        self.db_session.commit()
+        logger.info(f"Data sweeper: deleted {deleted}")
+        return deleted
+
+    def sweep_run(self, run_id: str = RUN_ID) -> Dict[str, int]:
+        """Удаляет все данные прогона run_id (по умолчанию - текущего)"""
+        return self._sweep(run_id)
+
+    def sweep_older_than(self, hours: float) -> Dict[str, int]:
+        """Удаляет данные всех прогонов, созданные раньше чем hours часов назад"""
+        return self._sweep(None, created_before=datetime.now() - timedelta(hours=hours))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Delete tagged test data')
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--run-id', help='ID прогона из метки run-<id>-<worker>')
+    group.add_argument('--older-than', type=float, help='Возраст данных в часах')
+    args = parser.parse_args()
+
+    session = get_db_session()
+    try:
+        sweeper = DataSweeper(session)
+        if args.run_id:
+            result = sweeper.sweep_run(args.run_id)
+        else:
+            result = sweeper.sweep_older_than(args.older_than)
+        print(result)
+    finally:
+        session.close()
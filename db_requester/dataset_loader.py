@@ -0,0 +1,219 @@
+"""
+Версионированные наборы данных для тестов: resources/datasets/<name>/v<version>/.
+В каталоге версии лежит manifest.json (порядок загрузки таблиц) и по файлу <table>.csv.gz
+на таблицу: gzip CSV с заголовком из имен колонок, NULL записан как \\N.
+
+Запуск (нужны переменные окружения DB_MOVIES_*):
+    python -m db_requester.dataset_loader reference_movies            # последняя версия
+    python -m db_requester.dataset_loader reference_movies --version 1
+    python -m db_requester.dataset_loader reference_movies --rekey    # без конфликтов с уже загруженным
+"""
+import argparse
+import csv
+import gzip
+import io
+import json
+import logging
+import random
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from pydantic import BaseModel
+from sqlalchemy import Boolean, DateTime, Float, Integer, Table, insert
+from sqlalchemy.orm import Session
+
+from db_models.movies import Base as MoviesBase
+from db_models.user import Base as UsersBase
+from db_requester.db_client import get_db_session
+from db_requester.pg_copy import copy_expert, copy_rows, is_postgresql
+from db_requester.rows import COPY_NULL, batched, to_csv_value
+
+# Import регистрирует таблицу accounts_transaction_template в метаданных MoviesBase
+import db_requester.models  # noqa: F401
+from utils.run_tag import tag_name
+
+logger = logging.getLogger(__name__)
+
+DATASETS_DIR = Path(__file__).resolve().parent.parent / 'resources' / 'datasets'
+MANIFEST_NAME = 'manifest.json'
+
+_TABLES: Dict[str, Table] = {
+    table.name: table for base in (MoviesBase, UsersBase) for table in base.metadata.tables.values()
+}
+
+# Колонки (ключ, название), которые переписываются при загрузке с rekey=True: ключ сдвигается
+# на случайную базу загрузки, название получает метку прогона (его находит DataSweeper)
+_REKEY_COLUMNS = {'movies': ('id', 'name')}
+
+
+def _table(name: str) -> Table:
+    if name not in _TABLES:
+        raise ValueError(f"Unknown table '{name}', expected one of {sorted(_TABLES)}")
+    return _TABLES[name]
+
+
+def _from_csv_value(value: str, column_type) -> Any:
+    """Значение из CSV в тип колонки (для INSERT через SQLAlchemy; COPY приводит типы сам)"""
+    if value == COPY_NULL:
+        return None
+    if isinstance(column_type, Boolean):
+        return value in ('t', 'true', '1')
+    if isinstance(column_type, Integer):
+        return int(value)
+    if isinstance(column_type, Float):
+        return float(value)
+    if isinstance(column_type, DateTime):
+        return datetime.fromisoformat(value)
+    return value
+
+
+def write_dataset(name: str, version: int, tables: Dict[str, List[Dict[str, Any]]],
+                  base_dir: Path = DATASETS_DIR) -> Path:
+    """
+    Сохраняет версию набора данных. Таблицы загружаются в порядке ключей tables.
+    :return: Каталог версии.
+    """
+    version_dir = Path(base_dir) / name / f'v{version}'
+    version_dir.mkdir(parents=True, exist_ok=True)
+    manifest = {'name': name, 'version': version, 'tables': []}
+    for table_name, rows in tables.items():
+        columns = [column.name for column in _table(table_name).columns]
+        file_name = f'{table_name}.csv.gz'
+        # mtime=0: одинаковые данные дают побайтно одинаковый архив
+        with gzip.GzipFile(version_dir / file_name, 'wb', mtime=0) as raw:
+            with io.TextIOWrapper(raw, encoding='utf-8', newline='') as f:
+                writer = csv.writer(f, lineterminator='\n')
+                writer.writerow(columns)
+                writer.writerows([to_csv_value(row.get(column)) for column in columns] for row in rows)
+        manifest['tables'].append({'table': table_name, 'file': file_name, 'rows': len(rows)})
+    (version_dir / MANIFEST_NAME).write_text(json.dumps(manifest, ensure_ascii=False, indent=2) + '\n',
+                                             encoding='utf-8')
+    return version_dir
+
+
+class DatasetLoad(BaseModel):
+    """Результат загрузки набора"""
+    name: str
+    version: int
+    rows: Dict[str, int]
+    # Ключи строк по таблицам: ключ в наборе -> ключ в БД (различаются при rekey=True)
+    keys: Dict[str, Dict[str, str]]
+
+
+class DatasetLoader:
+    """
+    Загрузка наборов данных в БД.
+    В PostgreSQL каждая таблица грузится одним COPY FROM STDIN прямо из распаковываемого файла,
+    на остальных СУБД (SQLite) - пакетными INSERT по batch_size строк.
+    Коммит остается за вызывающим кодом, поэтому загрузка работает и в сессии с откатом.
+
+    rekey=True нужен для закоммиченных загрузок: ключи строк из _REKEY_COLUMNS сдвигаются
+    на случайную базу, а названия помечаются run_tag, так что параллельные воркеры и повторные
+    загрузки не конфликтуют по первичному ключу. Такие таблицы передаются в COPY уже
+    переписанными строками (порциями по copy_chunk_size).
+    """
+
+    def __init__(self, db_session: Session, base_dir: Path = DATASETS_DIR, batch_size: int = 1000,
+                 rekey: bool = False, copy_chunk_size: int = 50_000):
+        self.db_session = db_session
+        self.base_dir = Path(base_dir)
+        self.batch_size = batch_size
+        self.rekey = rekey
+        self.copy_chunk_size = copy_chunk_size
+
+    def versions(self, name: str) -> List[int]:
+        """Доступные версии набора по возрастанию"""
+        dataset_dir = self.base_dir / name
+        versions = sorted(int(match.group(1)) for match in
+                          (re.fullmatch(r'v(\d+)', path.name) for path in dataset_dir.glob('v*')) if match)
+        if not versions:
+            raise ValueError(f"Dataset '{name}' not found in {self.base_dir}")
+        return versions
+
+    def manifest(self, name: str, version: Optional[int] = None) -> Dict[str, Any]:
+        """Манифест версии набора (по умолчанию - последней)"""
+        version = version or self.versions(name)[-1]
+        path = self.base_dir / name / f'v{version}' / MANIFEST_NAME
+        if not path.exists():
+            raise ValueError(f"Dataset '{name}' has no version {version}")
+        manifest = json.loads(path.read_text(encoding='utf-8'))
+        manifest['dir'] = path.parent
+        return manifest
+
+    @staticmethod
+    def read_rows(path: Path) -> Iterator[Dict[str, str]]:
+        """Строки файла набора как словари строк (NULL остается маркером \\N)"""
+        with gzip.open(path, 'rt', encoding='utf-8', newline='') as f:
+            yield from csv.DictReader(f)
+
+    def _rekeyed(self, table: Table) -> bool:
+        return self.rekey and table.name in _REKEY_COLUMNS
+
+    def _table_rows(self, table: Table, path: Path, keys: Dict[str, str]) -> Iterator[Dict[str, str]]:
+        """Строки файла таблицы (при rekey - с новым ключом и меткой в названии); ключи пишутся в keys"""
+        key_column = table.primary_key.columns.values()[0].name
+        if self._rekeyed(table):
+            key_column, name_column = _REKEY_COLUMNS[table.name]
+            id_base = random.randint(10 ** 9, 9 * 10 ** 9)
+        for i, row in enumerate(self.read_rows(path)):
+            if self._rekeyed(table):
+                keys[row[key_column]] = row[key_column] = str(id_base + i)
+                row[name_column] = tag_name(row[name_column])
+            else:
+                keys[row[key_column]] = row[key_column]
+            yield row
+
+    def _copy_table(self, table: Table, path: Path, keys: Dict[str, str]):
+        with gzip.open(path, 'rt', encoding='utf-8', newline='') as f:
+            columns = next(csv.reader([f.readline()]))
+            if not self._rekeyed(table):
+                copy_expert(self.db_session, table.name, columns, f)
+        rows = self._table_rows(table, path, keys)
+        if self._rekeyed(table):
+            copy_rows(self.db_session, table.name, columns, ([row[column] for column in columns] for row in rows),
+                      chunk_size=self.copy_chunk_size)
+        else:
+            # Файл ушел в COPY как есть, ключи набираются вторым проходом
+            for _ in rows:
+                pass
+
+    def _insert_table(self, table: Table, path: Path, keys: Dict[str, str]):
+        rows = ({column: _from_csv_value(value, table.c[column].type) for column, value in row.items()}
+                for row in self._table_rows(table, path, keys))
+        for batch in batched(rows, self.batch_size):
+            self.db_session.execute(insert(table), batch)
+
+    def load(self, name: str, version: Optional[int] = None) -> DatasetLoad:
+        """Загружает все таблицы версии набора в порядке манифеста"""
+        manifest = self.manifest(name, version)
+        use_copy = is_postgresql(self.db_session)
+        rows, keys = {}, {}
+        for entry in manifest['tables']:
+            table = _table(entry['table'])
+            path = manifest['dir'] / entry['file']
+            keys[table.name] = {}
+            if use_copy:
+                self._copy_table(table, path, keys[table.name])
+            else:
+                self._insert_table(table, path, keys[table.name])
+            rows[table.name] = entry['rows']
+        logger.info(f"Dataset {name} v{manifest['version']} loaded: {rows}")
+        return DatasetLoad(name=name, version=manifest['version'], rows=rows, keys=keys)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Load a versioned fixture dataset')
+    parser.add_argument('name', help='Имя набора в resources/datasets')
+    parser.add_argument('--version', type=int, help='Версия набора (по умолчанию - последняя)')
+    parser.add_argument('--rekey', action='store_true', help='Новые ключи и метка прогона в названиях')
+    args = parser.parse_args()
+
+    session = get_db_session()
+    try:
+        result = DatasetLoader(session, rekey=args.rekey).load(args.name, args.version)
+        session.commit()
+        print(result)
+    finally:
+        session.close()
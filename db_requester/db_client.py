@@ -1,6 +1,12 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import os
+import threading
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import scoped_session, sessionmaker
 from db_requester.db_creds import MoviesDbCreds
+from db_requester.pool_metrics import PoolMetrics, TimedQueuePool
+from db_requester.sql_profiler import SqlProfiler
 
 USERNAME = MoviesDbCreds.USERNAME
 PASSWORD = MoviesDbCreds.PASSWORD
@@ -8,16 +14,245 @@ HOST = MoviesDbCreds.HOST
 PORT = MoviesDbCreds.PORT
 DATABASE_NAME = MoviesDbCreds.DATABASE_NAME
 
-#  движок для подключения к базе данных
-engine = create_engine(
-    f"postgresql+psycopg2://{USERNAME}:{PASSWORD}@{HOST}:{PORT}/{DATABASE_NAME}",
-    echo=False  # Установить True для отладки SQL запросов
-)
+# Общий бюджет соединений на весь прогон, делится между xdist-воркерами
+DB_POOL_TOTAL = int(os.getenv('DB_POOL_TOTAL', 20))
+DB_POOL_RECYCLE_SECONDS = int(os.getenv('DB_POOL_RECYCLE_SECONDS', 1800))
+# postgresql - интеграционные прогоны, sqlite - схема из моделей в памяти процесса, без внешней БД
+DB_BACKEND = os.getenv('DB_BACKEND', 'postgresql').lower()
+SQLITE_MEMORY_NAME = 'cinescope'
+# Движок для чтения: реплика, если задан DB_MOVIES_READ_HOST, иначе та же база в режиме только чтения
+READ_HOST = os.getenv('DB_MOVIES_READ_HOST')
+READ_PORT = os.getenv('DB_MOVIES_READ_PORT', PORT)
+READ_USERNAME = os.getenv('DB_MOVIES_READ_USERNAME', USERNAME)
+READ_PASSWORD = os.getenv('DB_MOVIES_READ_PASSWORD', PASSWORD)
+
+#  метрики пулов основного и читающего движков, выводятся в итогах прогона
+pool_metrics = PoolMetrics()
+read_pool_metrics = PoolMetrics()
+#  профилировщик SQL, профиль пишется на каждый тест
+sql_profiler = SqlProfiler()
+
+_engine = None
+_read_engine = None
+_engine_lock = threading.Lock()
+# Соединение, которое держит in-memory базу SQLite живой, пока открыт движок
+_sqlite_anchor = None
+
+
+def is_sqlite_backend() -> bool:
+    return DB_BACKEND == 'sqlite'
+
+
+def get_database_url(driver: str = None, database: str = None) -> str:
+    if is_sqlite_backend():
+        # shared cache: все соединения процесса видят одну и ту же базу в памяти
+        return f"sqlite+{driver or 'pysqlite'}:///file:{database or SQLITE_MEMORY_NAME}" \
+               f"?mode=memory&cache=shared&uri=true"
+    return f"postgresql+{driver or 'psycopg2'}://{USERNAME}:{PASSWORD}@{HOST}:{PORT}/{database or DATABASE_NAME}"
+
+
+def use_database(database_name: str):
+    """Переключает клиент на другую базу (например клон воркера). Вызывать до создания движка."""
+    global DATABASE_NAME
+    if _engine is not None or _read_engine is not None:
+        raise ValueError(f"Cannot switch to {database_name}: DB engine is already created")
+    DATABASE_NAME = database_name
+
+
+def get_worker_count() -> int:
+    """Количество xdist-воркеров (1 без xdist)"""
+    return max(1, int(os.getenv('PYTEST_XDIST_WORKER_COUNT', 1)))
+
+
+def get_pool_settings() -> dict:
+    """
+    Настройки пула с учетом количества воркеров.
+    Бюджет воркера (pool_size + max_overflow) не превышает его долю DB_POOL_TOTAL;
+    треть бюджета оставлена на overflow для пиков.
+    """
+    budget = max(2, DB_POOL_TOTAL // get_worker_count())
+    max_overflow = max(1, budget // 3)
+    return {
+        'pool_size': budget - max_overflow,
+        'max_overflow': max_overflow,
+        'pool_pre_ping': True,  # отбрасываем соединения, закрытые сервером
+        'pool_recycle': DB_POOL_RECYCLE_SECONDS,
+    }
+
+
+def enable_sqlite_savepoints(engine):
+    """
+    pysqlite сам управляет транзакциями и ломает SAVEPOINT.
+    Отключаем его логику и открываем транзакцию явным BEGIN.
+    """
+
+    @event.listens_for(engine, 'connect')
+    def _on_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+        # Shared cache блокирует таблицы целиком: пока у другого соединения открыта транзакция
+        # с чтением таблицы (сессия модуля db_session, читающая db_read_session, внешняя транзакция
+        # db_rollback), запись в нее сразу падает с "database table is locked". В PostgreSQL
+        # (MVCC) такой блокировки нет, поэтому без read_uncommitted SQLite-прогон не проходит
+        # хелперные тесты, где чтение и запись идут через разные сессии.
+        # Цена - грязное чтение: незакоммиченные строки теста с db_rollback видны другим
+        # соединениям процесса. Тесты, которым нужна изоляция READ COMMITTED (например
+        # test_concurrent_transfers_conserve_balance), на SQLite пропускаются.
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA read_uncommitted = true')
+        cursor.close()
+
+    @event.listens_for(engine, 'begin')
+    def _on_begin(connection):
+        connection.exec_driver_sql('BEGIN')
+
+
+def create_schema(bind):
+    """Создает таблицы всех моделей (для SQLite и шаблонных баз)"""
+    from db_models.movies import Base as MoviesBase
+    from db_models.user import Base as UsersBase
+    import db_requester.models  # noqa: F401 - регистрирует AccountTransactionTemplate
+
+    MoviesBase.metadata.create_all(bind)
+    UsersBase.metadata.create_all(bind)
+
+
+def _create_sqlite_engine():
+    global _sqlite_anchor
+    engine = create_engine(
+        get_database_url(),
+        echo=False,
+        poolclass=TimedQueuePool,
+        connect_args={'check_same_thread': False},
+        **get_pool_settings()
+    )
+    enable_sqlite_savepoints(engine)
+    _sqlite_anchor = engine.connect()
+    create_schema(_sqlite_anchor)
+    _sqlite_anchor.commit()
+    return engine
 
-#  создаем фабрику сессий
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def get_engine():
+    """Движок для подключения к базе данных, создается при первом обращении"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                if is_sqlite_backend():
+                    engine = _create_sqlite_engine()
+                else:
+                    engine = create_engine(
+                        get_database_url(),
+                        echo=False,  # Установить True для отладки SQL запросов
+                        poolclass=TimedQueuePool,
+                        **get_pool_settings()
+                    )
+                pool_metrics.attach(engine)
+                sql_profiler.attach(engine)
+                _engine = engine
+    return _engine
+
+
+def get_read_database_url() -> str:
+    if READ_HOST and not is_sqlite_backend():
+        return f"postgresql+psycopg2://{READ_USERNAME}:{READ_PASSWORD}@{READ_HOST}:{READ_PORT}/{DATABASE_NAME}"
+    return get_database_url()
+
+
+def get_read_engine():
+    """
+    Отдельный движок со своим пулом для проверочных чтений, создается при первом обращении.
+    Транзакции на нем только читающие (default_transaction_read_only), поэтому случайная запись
+    из читающего хелпера падает, а не уходит мимо основной базы.
+    Для SQLite используется основной движок - база в памяти одна.
+    """
+    global _read_engine
+    if is_sqlite_backend():
+        return get_engine()
+    if _read_engine is None:
+        with _engine_lock:
+            if _read_engine is None:
+                engine = create_engine(
+                    get_read_database_url(),
+                    echo=False,
+                    poolclass=TimedQueuePool,
+                    connect_args={'options': '-c default_transaction_read_only=on'},
+                    **get_pool_settings()
+                )
+                read_pool_metrics.attach(engine)
+                sql_profiler.attach(engine)
+                _read_engine = engine
+    return _read_engine
+
+
+def is_engine_initialized() -> bool:
+    return _engine is not None
+
+
+def is_read_engine_initialized() -> bool:
+    return _read_engine is not None
+
+
+def dispose_engine():
+    """Закрывает соединения пула и сбрасывает движок - следующий get_engine() создаст новый"""
+    global _engine, _read_engine, _sqlite_anchor
+    with _engine_lock:
+        if _read_engine is not None:
+            _read_engine.dispose()
+            _read_engine = None
+        if _sqlite_anchor is not None:
+            _sqlite_anchor.close()
+            _sqlite_anchor = None
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
+
+
+def __getattr__(name):
+    # Обратная совместимость: db_client.engine создает движок лениво
+    if name == 'engine':
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+#  создаем фабрику сессий, движок подставляется при создании сессии
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
 
 
 def get_db_session():
     """Создает новую сессию БД"""
-    return SessionLocal()
\ No newline at end of file
+    return SessionLocal(bind=get_engine())
+
+
+def get_read_db_session():
+    """Создает сессию для чтения на движке get_read_engine()"""
+    return SessionLocal(bind=get_read_engine())
+
+
+def create_scoped_session(read_only: bool = False) -> scoped_session:
+    """
+    Реестр сессий с привязкой к потоку: registry() в каждом потоке возвращает свою Session
+    на общем движке (Session не потокобезопасна). После задачи поток вызывает registry.remove() -
+    сессия закрывается, соединение возвращается в пул.
+    """
+    engine = get_read_engine() if read_only else get_engine()
+    return scoped_session(sessionmaker(bind=engine, autocommit=False, autoflush=False))
+
+
+@contextmanager
+def isolated_db_session():
+    """
+    Сессия внутри внешней транзакции соединения.
+    commit() в хелперах превращается в RELEASE SAVEPOINT, а в конце все изменения
+    откатываются одним ROLLBACK - без запросов на очистку.
+    """
+    connection = get_engine().connect()
+    transaction = connection.begin()
+    session = SessionLocal(bind=connection, join_transaction_mode="create_savepoint")
+    session.info['isolated'] = True
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
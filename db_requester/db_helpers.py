@@ -1,15 +1,172 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, asc
-from typing import List, Optional, Dict, Any, Union
+from sqlalchemy import and_, or_, desc, asc, insert, select, delete, update, exists, func, bindparam, case, tuple_, \
+    inspect, nulls_last
+from typing import List, Optional, Dict, Any, Union, Iterator, Sequence, NamedTuple
 from datetime import datetime
+import base64
+from collections import defaultdict
+import json
+import random
+import uuid
 from db_models.user import UserDBModel
 from db_models.movies import MovieDBModel
-
-
-class DBHelper:
-    def __init__(self, db_session: Session):
+from db_requester.password_hashes import PasswordHashCache
+from db_requester.pg_copy import copy_rows, is_postgresql
+from models.user_models import PooledUser
+from utils.data_generator import DataGenerator
+from utils.run_tag import tag_name
+
+
+# ========== PREBUILT STATEMENTS ==========
+# Запросы строятся один раз при импорте: параметры передаются через bindparam,
+# поэтому SQLAlchemy берет скомпилированный SQL из кеша, а не собирает его на каждый вызов.
+
+_USER_BY_ID = select(UserDBModel).where(UserDBModel.id == bindparam('user_id'))
+_USER_BY_EMAIL = select(UserDBModel).where(UserDBModel.email == bindparam('email')).limit(1)
+_USER_EXISTS_BY_EMAIL = select(exists().where(UserDBModel.email == bindparam('email')))
+_DELETE_USER = delete(UserDBModel).where(UserDBModel.id == bindparam('user_id'))
+_DELETE_USERS_BY_IDS = delete(UserDBModel).where(UserDBModel.id.in_(bindparam('ids', expanding=True)))
+
+_MOVIE_BY_ID = select(MovieDBModel).where(MovieDBModel.id == bindparam('movie_id'))
+_MOVIE_BY_NAME = select(MovieDBModel).where(MovieDBModel.name == bindparam('name')).limit(1)
+_MOVIES_BY_IDS = select(MovieDBModel).where(MovieDBModel.id.in_(bindparam('ids', expanding=True)))
+_EXISTING_MOVIE_IDS = select(MovieDBModel.id).where(MovieDBModel.id.in_(bindparam('ids', expanding=True)))
+_MOVIE_SEARCH_BY_NAME = select(MovieDBModel) \
+    .where(MovieDBModel.name.ilike(bindparam('pattern'))) \
+    .limit(bindparam('limit'))
+_MOVIE_EXISTS = select(exists().where(MovieDBModel.id == bindparam('movie_id')))
+_MOVIE_EXISTS_BY_NAME = select(exists().where(MovieDBModel.name == bindparam('name')))
+_DELETE_MOVIE = delete(MovieDBModel).where(MovieDBModel.id == bindparam('movie_id'))
+_DELETE_MOVIES_BY_IDS = delete(MovieDBModel).where(MovieDBModel.id.in_(bindparam('ids', expanding=True)))
+_PUBLISHED_MOVIES = select(MovieDBModel) \
+    .where(MovieDBModel.published == True) \
+    .order_by(desc(MovieDBModel.created_at)) \
+    .limit(bindparam('limit'))
+_ALL_MOVIES = select(MovieDBModel).order_by(desc(MovieDBModel.created_at)).limit(bindparam('limit'))
+_SET_MOVIES_PUBLISHED = update(MovieDBModel) \
+    .where(MovieDBModel.id.in_(bindparam('ids', expanding=True))) \
+    .values(published=bindparam('published_value')) \
+    .returning(MovieDBModel) \
+    .execution_options(populate_existing=True)
+
+
+def _with_published_variant(stmt) -> Dict[bool, Any]:
+    """Вариант запроса без фильтра и с фильтром published_only"""
+    return {False: stmt, True: stmt.where(MovieDBModel.published == True)}
+
+
+_MOVIES_BY_GENRE = _with_published_variant(
+    select(MovieDBModel).where(MovieDBModel.genre_id == bindparam('genre_id')).order_by(desc(MovieDBModel.rating))
+)
+_MOVIES_BY_PRICE_RANGE = _with_published_variant(
+    select(MovieDBModel)
+    .where(MovieDBModel.price.between(bindparam('min_price'), bindparam('max_price')))
+    .order_by(MovieDBModel.price)
+)
+_MOVIES_BY_RATING = _with_published_variant(
+    select(MovieDBModel)
+    .where(MovieDBModel.rating.between(bindparam('min_rating'), bindparam('max_rating')))
+    .order_by(desc(MovieDBModel.rating))
+)
+_MOVIES_BY_LOCATION = _with_published_variant(
+    select(MovieDBModel).where(MovieDBModel.location == bindparam('location')).order_by(MovieDBModel.name)
+)
+_MOVIES_COUNT = _with_published_variant(select(func.count()).select_from(MovieDBModel))
+
+
+def _keyset_statements(stmt, key_column) -> Dict[str, Any]:
+    """
+    Запросы keyset-пагинации по (key_column, id) от новых/больших к старым/меньшим:
+    первая страница и страница после курсора. Глубина страницы не влияет на стоимость запроса.
+    Строки с NULL в key_column идут в конце (NULLS LAST): сравнение (key, id) < (...) для NULL
+    не выполняется, поэтому они добираются отдельной веткой, а после курсора с NULL-ключом
+    выбираются только NULL-строки с меньшим id.
+    """
+    order = (nulls_last(desc(key_column)), desc(MovieDBModel.id))
+    last_id = bindparam('last_id', type_=MovieDBModel.id.type)
+    after = or_(
+        tuple_(key_column, MovieDBModel.id) < tuple_(bindparam('last_key', type_=key_column.type), last_id),
+        key_column.is_(None),
+    )
+    after_null = and_(key_column.is_(None), MovieDBModel.id < last_id)
+    return {
+        'key': key_column.key,
+        'first': stmt.order_by(*order).limit(bindparam('limit')),
+        'after': stmt.where(after).order_by(*order).limit(bindparam('limit')),
+        'after_null': stmt.where(after_null).order_by(*order).limit(bindparam('limit')),
+    }
+
+
+_ALL_MOVIES_KEYSET = _keyset_statements(select(MovieDBModel), MovieDBModel.created_at)
+_PUBLISHED_MOVIES_KEYSET = _keyset_statements(
+    select(MovieDBModel).where(MovieDBModel.published == True), MovieDBModel.created_at
+)
+_MOVIES_BY_RATING_KEYSET = {
+    published_only: _keyset_statements(stmt, MovieDBModel.rating)
+    for published_only, stmt in _with_published_variant(select(MovieDBModel)).items()
+}
+
+
+class MoviePage(NamedTuple):
+    """Страница фильмов и курсор следующей страницы (None - страница последняя)"""
+    movies: List[MovieDBModel]
+    next_cursor: Optional[str]
+
+
+def encode_cursor(key: str, value: Any, movie_id: str) -> str:
+    """Непрозрачный курсор: base64 от JSON с ключом сортировки и позицией (NULL-ключ - null)"""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps({'k': key, 'v': value, 'id': movie_id}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str, key: str) -> Dict[str, Any]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except ValueError as e:
+        raise ValueError(f"Invalid pagination cursor: {cursor!r}") from e
+    if not isinstance(payload, dict) or 'id' not in payload:
+        raise ValueError(f"Invalid pagination cursor: {cursor!r}")
+    if payload.get('k') != key:
+        raise ValueError(f"Cursor for '{payload.get('k')}' sort cannot be used with '{key}' sort")
+    value = payload['v']
+    if key == 'created_at' and value is not None:
+        value = datetime.fromisoformat(value)
+    return {'last_key': value, 'last_id': payload['id']}
+
+
+
+class _ReadRoutingHelper:
+    """
+    Основа хелперов: запись идет в db_session, чтение - в read_session (реплика или
+    read-only движок), если она передана. Объекты читающей сессии обновляются из БД
+    при каждом запросе (populate_existing), чтобы не отдавать устаревшие данные из identity map.
+    """
+
+    def __init__(self, db_session: Session, read_session: Optional[Session] = None):
         self.db_session = db_session
+        self.read_session = read_session or db_session
+        self._read_options = {'populate_existing': True} if self.read_session is not db_session else {}
+
+    def _read_scalar(self, stmt, params: Optional[Dict[str, Any]] = None):
+        return self.read_session.scalar(stmt, params, execution_options=self._read_options)
+
+    def _read_scalars(self, stmt, params: Optional[Dict[str, Any]] = None):
+        return self.read_session.scalars(stmt, params, execution_options=self._read_options)
+
+    def save(self, obj):
+        """
+        Сохраняет изменения объекта, полученного из хелпера. Объект может принадлежать
+        читающей сессии, поэтому его состояние переносится в пишущую через merge().
+        :return: Объект пишущей сессии.
+        """
+        merged = self.db_session.merge(obj)
+        self.db_session.commit()
+        return merged
 
+
+class DBHelper(_ReadRoutingHelper):
     """Класс с методами для работы с БД в тестах"""
 
     def create_test_user(self, user_data: dict) -> UserDBModel:
@@ -20,40 +177,81 @@ class DBHelper:
         self.db_session.refresh(user)
         return user
 
+    def seed_users(self, count: int, roles: str = '{USER}', verified: bool = True,
+                   password_cache: Optional[PasswordHashCache] = None) -> List[PooledUser]:
+        """
+        Создает пользователей прямо в таблице users одной транзакцией.
+        Пароли берутся из пула с заранее посчитанными bcrypt-хешами,
+        поэтому пользователи сразу могут логиниться через API.
+        """
+        password_cache = password_cache or PasswordHashCache()
+        rows, users = [], []
+        for _ in range(count):
+            password, password_hash = password_cache.get()
+            user_data = DataGenerator.generate_user_data()
+            user_data.update(password=password_hash, roles=roles, verified=verified)
+            rows.append(user_data)
+            users.append(PooledUser(
+                id=user_data['id'],
+                email=user_data['email'],
+                password=password,
+                fullName=user_data['full_name'],
+                roles=roles.strip('{}').split(',')
+            ))
+        if rows:
+            self.db_session.execute(insert(UserDBModel), rows)
+            self.db_session.commit()
+        return users
+
     def get_user_by_id(self, user_id: str):
         """Получает пользователя по ID"""
-        return self.db_session.query(UserDBModel).filter(UserDBModel.id == user_id).first()
+        return self._read_scalar(_USER_BY_ID, {'user_id': user_id})
 
     def get_user_by_email(self, email: str):
         """Получает пользователя по email"""
-        return self.db_session.query(UserDBModel).filter(UserDBModel.email == email).first()
+        return self._read_scalar(_USER_BY_EMAIL, {'email': email})
 
     def get_movie_by_name(self, name: str):
         """Получает фильм по названию"""
-        return self.db_session.query(MovieDBModel).filter(MovieDBModel.name == name).first()
+        return self._read_scalar(_MOVIE_BY_NAME, {'name': name})
 
     def user_exists_by_email(self, email: str) -> bool:
         """Проверяет существование пользователя по email"""
-        return self.db_session.query(UserDBModel).filter(UserDBModel.email == email).count() > 0
+        return self._read_scalar(_USER_EXISTS_BY_EMAIL, {'email': email})
 
     def delete_user(self, user: UserDBModel):
         """Удаляет пользователя"""
-        self.db_session.delete(user)
+        # Запрос по ID: объект мог быть загружен читающей сессией
+        self.db_session.execute(_DELETE_USER, {'user_id': user.id},
+                                execution_options={'synchronize_session': False})
         self.db_session.commit()
 
+    def delete_users_by_ids(self, user_ids: List[str]) -> int:
+        """Удаляет пользователей по списку ID одним запросом"""
+        result = self.db_session.execute(_DELETE_USERS_BY_IDS, {'ids': list(user_ids)},
+                                         execution_options={'synchronize_session': False})
+        self.db_session.commit()
+        return result.rowcount
+
     def cleanup_test_data(self, objects_to_delete: list):
-        """Очищает тестовые данные"""
+        """
+        Очищает тестовые данные: один DELETE по первичным ключам на модель.
+        Объекты могли быть загружены читающей сессией, поэтому session.delete() не подходит.
+        """
+        objects_by_model = defaultdict(list)
         for obj in objects_to_delete:
             if obj:
-                self.db_session.delete(obj)
+                objects_by_model[type(obj)].append(obj)
+        for model, objects in objects_by_model.items():
+            key = inspect(model).primary_key[0]
+            ids = [getattr(obj, key.key) for obj in objects]
+            self.db_session.execute(delete(model).where(key.in_(ids)),
+                                    execution_options={'synchronize_session': 'fetch'})
         self.db_session.commit()
 
-class MovieDBHelper:
+class MovieDBHelper(_ReadRoutingHelper):
     """Класс-хелпер для работы с фильмами в БД"""
 
-    def __init__(self, db_session: Session):
-        self.db_session = db_session
-
     def create_movie(self, movie_data: Dict[str, Any]) -> MovieDBModel:
         """Создаем новый фильм в БД"""
         if 'created_at' not in movie_data:
@@ -64,155 +262,330 @@ class MovieDBHelper:
         self.db_session.refresh(movie)
         return movie
 
+    def _commit_keeping_loaded(self):
+        """Коммит без expire объектов: данные уже получены через RETURNING"""
+        expire_on_commit = self.db_session.expire_on_commit
+        self.db_session.expire_on_commit = False
+        try:
+            self.db_session.commit()
+        finally:
+            self.db_session.expire_on_commit = expire_on_commit
+
     def create_movie_batch(self, movies_data: List[Dict[str, Any]]) -> List[MovieDBModel]:
-        """Создает несколько фильмов сразу"""
-        movies = []
+        """
+        Создает несколько фильмов одним многострочным INSERT ... RETURNING
+        (insertmanyvalues) без дополнительных SELECT на каждую строку.
+        Фильмы возвращаются в порядке movies_data (sort_by_parameter_order).
+        """
+        if not movies_data:
+            return []
         for data in movies_data:
             if 'created_at' not in data:
                 data['created_at'] = datetime.now()
-            movie = MovieDBModel(**data)
-            movies.append(movie)
-        self.db_session.add_all(movies)
-        self.db_session.commit()
-
-        for movie in movies:
-            self.db_session.refresh(movie)
+        movies = self.db_session.scalars(
+            insert(MovieDBModel).returning(MovieDBModel, sort_by_parameter_order=True),
+            movies_data
+        ).all()
+        self._commit_keeping_loaded()
         return movies
 
+    def copy_movies(self, movies_data: List[Dict[str, Any]]) -> int:
+        """
+        Загружает фильмы через COPY FROM STDIN (PostgreSQL) - для очень больших пачек.
+        На других СУБД используется executemany без RETURNING.
+        """
+        columns = [column.name for column in MovieDBModel.__table__.columns]
+        if is_postgresql(self.db_session):
+            count = copy_rows(
+                self.db_session, MovieDBModel.__tablename__, columns,
+                ([data.get(column) for column in columns] for data in movies_data)
+            )
+        else:
+            self.db_session.execute(insert(MovieDBModel), movies_data)
+            count = len(movies_data)
+        self.db_session.commit()
+        return count
+
+    def seed_movies(self, count: int = 100_000, use_copy: bool = True) -> List[str]:
+        """
+        Быстро наполняет таблицу фильмами для нагрузочных тестов (100k - за секунды через COPY).
+        :return: ID созданных фильмов для последующей очистки.
+        """
+        id_base = random.randint(10 ** 9, 9 * 10 ** 9)
+        batch_tag = uuid.uuid4().hex[:8]
+        now = datetime.now()
+        movies_data = [{
+            'id': str(id_base + i),
+            'name': tag_name(f'Нагрузочный фильм {batch_tag} {i}'),
+            'price': random.randint(100, 1000),
+            'description': f'Описание нагрузочного фильма {i}',
+            'image_url': f'https://example.com/seed_{batch_tag}_{i}.jpg',
+            'location': random.choice(['SPB', 'MSK']),
+            'published': random.random() < 0.5,
+            'rating': round(random.uniform(1.0, 10.0), 1),
+            'genre_id': random.randint(1, 10),
+            'created_at': now
+        } for i in range(count)]
+        if use_copy:
+            self.copy_movies(movies_data)
+        else:
+            self.db_session.execute(insert(MovieDBModel), movies_data)
+            self.db_session.commit()
+        return [data['id'] for data in movies_data]
+
     def get_movie_by_id(self, movie_id: str) -> Optional[MovieDBModel]:
         """Получает фильм по ID"""
-        return self.db_session.query(MovieDBModel)\
-            .filter(MovieDBModel.id == movie_id)\
-            .first()
+        return self._read_scalar(_MOVIE_BY_ID, {'movie_id': movie_id})
+
+    def get_movies_by_ids(self, movie_ids: List[str]) -> List[MovieDBModel]:
+        """Получает фильмы по списку ID одним запросом (отсутствующие ID пропускаются)"""
+        return self._read_scalars(_MOVIES_BY_IDS, {'ids': list(movie_ids)}).all()
 
     def get_movie_by_name(self, name: str) -> Optional[MovieDBModel]:
         """Получаем фильм по названию(точное совпадение)"""
 
-        return self.db_session.query(MovieDBModel)\
-            .filter(MovieDBModel.name == name)\
-            .first()
+        return self._read_scalar(_MOVIE_BY_NAME, {'name': name})
 
     def search_movies_by_name(self, search_term: str, limit: int = 10) -> List[MovieDBModel]:
         """Ищет фильм по частичному совпадению"""
 
-        return self.db_session.query(MovieDBModel)\
-            .filter(MovieDBModel.name.ilike(f'%{search_term}%'))\
-            .limit(limit).all()
+        return self._read_scalars(
+            _MOVIE_SEARCH_BY_NAME, {'pattern': f'%{search_term}%', 'limit': limit}
+        ).all()
 
-    def get_movies_by_genre(self, genre_id: str,
+    def get_movies_by_genre(self, genre_id: int,
                             published_only: bool = True) -> List[MovieDBModel]:
         """Получает фильмы по жанру"""
-        query = self.db_session.query(MovieDBModel) \
-            .filter(MovieDBModel.genre_id == genre_id)
-        if published_only:
-            query = query.filter(MovieDBModel.published == True)
-        return query.order_by(desc(MovieDBModel.rating)).all()
+        return self._read_scalars(_MOVIES_BY_GENRE[published_only], {'genre_id': genre_id}).all()
 
     def get_published_movies(self, limit: int = 50) -> List[MovieDBModel]:
         """Получает опубликованные фильмы"""
 
-        return self.db_session.query(MovieDBModel) \
-            .filter(MovieDBModel.published == True) \
-            .order_by(desc(MovieDBModel.created_at)) \
-            .limit(limit).all()
+        return self._read_scalars(_PUBLISHED_MOVIES, {'limit': limit}).all()
 
-    def get_movies_by_price_range(self, min_price: float,
-                                  max_price: float,
+    def get_movies_by_price_range(self, min_price: int,
+                                  max_price: int,
                                   published_only: bool = True) -> List[MovieDBModel]:
         """Получает фильмы в диапазоне цен"""
-        query = self.db_session.query(MovieDBModel) \
-            .filter(MovieDBModel.price.between(min_price, max_price))
-        if published_only:
-            query = query.filter(MovieDBModel.published == True)
-        return query.order_by(MovieDBModel.price).all()
+        return self._read_scalars(
+            _MOVIES_BY_PRICE_RANGE[published_only], {'min_price': min_price, 'max_price': max_price}
+        ).all()
 
     def get_movies_by_rating(self, min_rating: float = 0.0,
                              max_rating: float = 10.0,
                              published_only: bool = True) -> List[MovieDBModel]:
         """Получает фильмы по рейтингу"""
-        query = self.db_session.query(MovieDBModel)\
-            .filter(MovieDBModel.rating.between(min_rating, max_rating))
-
-        if published_only:
-            query = query.filter(MovieDBModel.published == True)
-        return query.order_by(desc(MovieDBModel.rating)).all()
+        return self._read_scalars(
+            _MOVIES_BY_RATING[published_only], {'min_rating': min_rating, 'max_rating': max_rating}
+        ).all()
 
     def get_all_movies(self, limit: int = 100) -> List[MovieDBModel]:
         """Получает все фильмы"""
-        return self.db_session.query(MovieDBModel)\
-            .order_by(desc(MovieDBModel.created_at))\
-            .limit(limit).all()
+        return self._read_scalars(_ALL_MOVIES, {'limit': limit}).all()
 
     def get_movies_by_location(self, location: str,
                                published_only: bool = True) -> List[MovieDBModel]:
         """Получает фильмы по месту показа"""
-        query = self.db_session.query(MovieDBModel)\
-            .filter(MovieDBModel.location == location)
+        return self._read_scalars(_MOVIES_BY_LOCATION[published_only], {'location': location}).all()
+
+    # ========== KEYSET PAGINATION ==========
+
+    def _keyset_page(self, keyset: Dict[str, Any], page_size: int,
+                     cursor: Optional[str], params: Optional[Dict[str, Any]] = None) -> MoviePage:
+        params = dict(params or {}, limit=page_size + 1)
+        if cursor:
+            params.update(decode_cursor(cursor, keyset['key']))
+            stmt = keyset['after'] if params['last_key'] is not None else keyset['after_null']
+        else:
+            stmt = keyset['first']
+        movies = self._read_scalars(stmt, params).all()
+        if len(movies) <= page_size:
+            return MoviePage(movies, None)
+        movies = movies[:page_size]
+        last = movies[-1]
+        return MoviePage(movies, encode_cursor(keyset['key'], getattr(last, keyset['key']), last.id))
+
+    def get_all_movies_page(self, page_size: int = 100, cursor: Optional[str] = None) -> MoviePage:
+        """Страница всех фильмов от новых к старым (keyset по created_at, id)"""
+        return self._keyset_page(_ALL_MOVIES_KEYSET, page_size, cursor)
+
+    def get_published_movies_page(self, page_size: int = 50, cursor: Optional[str] = None) -> MoviePage:
+        """Страница опубликованных фильмов от новых к старым (keyset по created_at, id)"""
+        return self._keyset_page(_PUBLISHED_MOVIES_KEYSET, page_size, cursor)
+
+    def get_movies_by_rating_page(self, page_size: int = 50, cursor: Optional[str] = None,
+                                  published_only: bool = True) -> MoviePage:
+        """Страница фильмов по убыванию рейтинга (keyset по rating, id)"""
+        return self._keyset_page(_MOVIES_BY_RATING_KEYSET[published_only], page_size, cursor)
+
+    # ========== STREAMING ==========
+
+    def _streaming_select(self, columns: Optional[Sequence[str]] = None,
+                          genre_id: Optional[int] = None,
+                          location: Optional[str] = None,
+                          published_only: bool = False):
+        if columns:
+            unknown = [name for name in columns if name not in MovieDBModel.__table__.columns]
+            if unknown:
+                raise ValueError(f"Unknown movie columns: {unknown}")
+            stmt = select(*[getattr(MovieDBModel, name) for name in columns])
+        else:
+            stmt = select(MovieDBModel)
+        if genre_id is not None:
+            stmt = stmt.where(MovieDBModel.genre_id == genre_id)
+        if location is not None:
+            stmt = stmt.where(MovieDBModel.location == location)
         if published_only:
-            query = query.filter(MovieDBModel.published == True)
-        return query.order_by(MovieDBModel.name).all()
+            stmt = stmt.where(MovieDBModel.published == True)
+        return stmt.order_by(MovieDBModel.id)
+
+    def iter_movie_chunks(self, chunk_size: int = 1000,
+                          columns: Optional[Sequence[str]] = None,
+                          genre_id: Optional[int] = None,
+                          location: Optional[str] = None,
+                          published_only: bool = False) -> Iterator[list]:
+        """
+        Построчно читает фильмы серверным курсором (stream_results + yield_per)
+        и отдает их пачками по chunk_size - память ограничена размером пачки.
+        :param columns: Проекция - имена колонок; тогда вместо объектов MovieDBModel отдаются строки Row.
+        """
+        stmt = self._streaming_select(columns, genre_id, location, published_only)
+        result = self.read_session.execute(
+            stmt, execution_options={**self._read_options, 'yield_per': chunk_size, 'stream_results': True}
+        )
+        if not columns:
+            result = result.scalars()
+        for partition in result.partitions():
+            yield partition
+
+    def iter_movies(self, chunk_size: int = 1000,
+                    columns: Optional[Sequence[str]] = None,
+                    genre_id: Optional[int] = None,
+                    location: Optional[str] = None,
+                    published_only: bool = False) -> Iterator[Any]:
+        """Потоковый аналог get_all_movies/get_movies_by_genre: отдает фильмы по одному"""
+        for chunk in self.iter_movie_chunks(chunk_size, columns, genre_id, location, published_only):
+            yield from chunk
 
         # ========== UPDATE OPERATIONS ==========
 
+    def _movie_values(self, update_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Оставляет только поля, которые есть в таблице movies"""
+        columns = MovieDBModel.__table__.columns
+        return {key: value for key, value in update_data.items() if key in columns and key != 'id'}
+
+    def _update_returning(self, stmt) -> List[MovieDBModel]:
+        """
+        Выполняет UPDATE ... RETURNING одним запросом.
+        populate_existing обновляет объекты, уже загруженные в сессию, а коммит не делает их expired.
+        """
+        movies = self.db_session.scalars(stmt.returning(MovieDBModel).execution_options(populate_existing=True)).all()
+        self._commit_keeping_loaded()
+        return movies
+
     def update_movie(self, movie_id: str,
                      update_data: Dict[str, Any]) -> Optional[MovieDBModel]:
-        """Обновляет данные фильма"""
-        movie = self.get_movie_by_id(movie_id)
-        if not movie:
-            return None
-
-        # Обновляем поля
-        for key, value in update_data.items():
-            if hasattr(movie, key):
-                setattr(movie, key, value)
-        movie.updated_at = datetime.now()
-        self.db_session.commit()
-        self.db_session.refresh(movie)
-        return movie
+        """Обновляет данные фильма одним UPDATE ... RETURNING"""
+        values = self._movie_values(update_data)
+        if not values:
+            return self.get_movie_by_id(movie_id)
+        movies = self._update_returning(
+            update(MovieDBModel).where(MovieDBModel.id == movie_id).values(**values)
+        )
+        return movies[0] if movies else None
+
+    def update_movies(self, movie_ids: List[str],
+                      update_data: Dict[str, Any]) -> List[MovieDBModel]:
+        """Применяет одни и те же изменения ко всем фильмам из списка одним запросом"""
+        values = self._movie_values(update_data)
+        if not movie_ids or not values:
+            return []
+        return self._update_returning(
+            update(MovieDBModel).where(MovieDBModel.id.in_(movie_ids)).values(**values)
+        )
 
     def publish_movie(self, movie_id: str) -> Optional[MovieDBModel]:
         """Публикует фильм (устанавливает published = True)"""
-        return self.update_movie(movie_id, {'published': True})
+        movies = self.publish_movies([movie_id])
+        return movies[0] if movies else None
 
     def unpublish_movie(self, movie_id: str) -> Optional[MovieDBModel]:
         """Снимает фильм с публикации (устанавливает published = False)"""
-        return self.update_movie(movie_id, {'published': False})
+        movies = self.unpublish_movies([movie_id])
+        return movies[0] if movies else None
+
+    def _set_published(self, movie_ids: List[str], published: bool) -> List[MovieDBModel]:
+        if not movie_ids:
+            return []
+        movies = self.db_session.scalars(
+            _SET_MOVIES_PUBLISHED, {'ids': list(movie_ids), 'published_value': published}
+        ).all()
+        self._commit_keeping_loaded()
+        return movies
+
+    def publish_movies(self, movie_ids: List[str]) -> List[MovieDBModel]:
+        """Публикует фильмы из списка одним запросом"""
+        return self._set_published(movie_ids, True)
+
+    def unpublish_movies(self, movie_ids: List[str]) -> List[MovieDBModel]:
+        """Снимает фильмы из списка с публикации одним запросом"""
+        return self._set_published(movie_ids, False)
 
     def update_movie_rating(self, movie_id: str,
                             new_rating: float) -> Optional[MovieDBModel]:
         """Обновляет рейтинг фильма"""
         return self.update_movie(movie_id, {'rating': new_rating})
 
+    def update_movies_rating(self, ratings: Union[Dict[str, float], List[str]],
+                             new_rating: Optional[float] = None) -> List[MovieDBModel]:
+        """
+        Обновляет рейтинг нескольких фильмов одним запросом.
+        :param ratings: Словарь {id фильма: рейтинг} (через CASE) или список ID, если рейтинг общий.
+        :param new_rating: Общий рейтинг для списка ID.
+        """
+        if not isinstance(ratings, dict):
+            if new_rating is None:
+                raise ValueError("new_rating is required when ratings is a list of movie ids")
+            return self.update_movies(list(ratings), {'rating': new_rating})
+        if not ratings:
+            return []
+        return self._update_returning(
+            update(MovieDBModel)
+            .where(MovieDBModel.id.in_(list(ratings)))
+            .values(rating=case(ratings, value=MovieDBModel.id, else_=MovieDBModel.rating))
+        )
+
     # ========== DELETE OPERATIONS ==========
 
     def delete_movie(self, movie_id: str) -> bool:
         """Удаляет фильм по ID"""
 
-        movie = self.get_movie_by_id(movie_id)
-        if not movie:
-            return False
-        self.db_session.delete(movie)
+        result = self.db_session.execute(_DELETE_MOVIE, {'movie_id': movie_id},
+                                         execution_options={'synchronize_session': 'fetch'})
+        self.db_session.commit()
+        return result.rowcount > 0
+
+    def delete_movies_by_ids(self, movie_ids: List[str]) -> int:
+        """Удаляет фильмы по списку ID одним запросом"""
+        result = self.db_session.execute(_DELETE_MOVIES_BY_IDS, {'ids': list(movie_ids)},
+                                         execution_options={'synchronize_session': False})
         self.db_session.commit()
-        return True
+        return result.rowcount
 
     # ========== UTILITY METHODS ==========
 
     def movie_exists(self, movie_id: str) -> bool:
         """Проверяет существование фильма по ID"""
-        return self.db_session.query(MovieDBModel) \
-            .filter(MovieDBModel.id == movie_id) \
-            .count() > 0
+        return self._read_scalar(_MOVIE_EXISTS, {'movie_id': movie_id})
+
+    def get_existing_movie_ids(self, movie_ids: List[str]) -> set:
+        """Возвращает те ID из списка, фильмы с которыми есть в БД"""
+        return set(self._read_scalars(_EXISTING_MOVIE_IDS, {'ids': list(movie_ids)}))
 
     def movie_exists_by_name(self, name: str) -> bool:
         """Проверяет существование фильма по названию"""
-        return self.db_session.query(MovieDBModel) \
-            .filter(MovieDBModel.name == name) \
-            .count() > 0
+        return self._read_scalar(_MOVIE_EXISTS_BY_NAME, {'name': name})
 
     def get_movies_count(self, published_only: bool = False) -> int:
         """Получает общее количество фильмов"""
-        query = self.db_session.query(MovieDBModel)
-
-        if published_only:
-            query = query.filter(MovieDBModel.published == True)
-        return query.count()
+        return self._read_scalar(_MOVIES_COUNT[published_only])
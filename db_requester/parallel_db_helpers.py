@@ -0,0 +1,99 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+from pydantic import BaseModel, Field
+from sqlalchemy.orm import scoped_session
+
+from constants.constants import BULK_MAX_WORKERS
+from db_models.movies import MovieDBModel
+from db_requester.db_client import create_scoped_session
+from db_requester.db_helpers import MovieDBHelper
+from db_requester.rows import batched
+
+R = TypeVar('R')
+
+
+class MovieVerificationReport(BaseModel):
+    """Итог сверки ожидаемых данных фильмов с БД"""
+    checked: int = 0
+    missing: List[str] = Field(default_factory=list)
+    different: Dict[str, List[str]] = Field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return not self.missing and not self.different
+
+
+class ParallelMovieDBHelper:
+    """
+    Массовые чтения и проверки фильмов из пула потоков.
+    ID делятся на порции по chunk_size, каждая порция - один запрос IN (...) в сессии своего потока
+    из scoped_session; после задачи сессия потока закрывается (remove()), результаты порций сливаются.
+    По умолчанию читает через read-only движок, поэтому видит только закоммиченные данные:
+    в режиме db_rollback изменения теста ему не видны.
+    """
+
+    def __init__(self, sessions: Optional[scoped_session] = None, max_workers: int = BULK_MAX_WORKERS,
+                 chunk_size: int = 1000):
+        self.sessions = sessions or create_scoped_session(read_only=True)
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+
+    def _run_chunk(self, work: Callable[[MovieDBHelper, List[str]], R], movie_ids: List[str]) -> R:
+        try:
+            return work(MovieDBHelper(self.sessions()), movie_ids)
+        finally:
+            self.sessions.remove()
+
+    def map_chunks(self, movie_ids: List[str], work: Callable[[MovieDBHelper, List[str]], R]) -> List[R]:
+        """Выполняет work(helper, порция ID) для всех порций параллельно, результаты - в порядке порций"""
+        chunks = list(batched(dict.fromkeys(movie_ids), self.chunk_size))
+        if len(chunks) <= 1:
+            return [self._run_chunk(work, chunk) for chunk in chunks]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks)),
+                                thread_name_prefix='db-parallel') as executor:
+            return list(executor.map(lambda chunk: self._run_chunk(work, chunk), chunks))
+
+    def get_movies_by_ids(self, movie_ids: List[str]) -> Dict[str, MovieDBModel]:
+        """Фильмы по ID (отсоединенные от сессий объекты); отсутствующих ID в словаре нет"""
+        results = self.map_chunks(movie_ids, lambda helper, chunk: helper.get_movies_by_ids(chunk))
+        return {movie.id: movie for movies in results for movie in movies}
+
+    def movies_exist(self, movie_ids: List[str]) -> Dict[str, bool]:
+        """Проверяет наличие фильмов в БД"""
+        results = self.map_chunks(movie_ids, lambda helper, chunk: helper.get_existing_movie_ids(chunk))
+        existing = set().union(*results)
+        return {movie_id: movie_id in existing for movie_id in movie_ids}
+
+    def verify_movies(self, expected: List[Dict[str, Any]]) -> MovieVerificationReport:
+        """
+        Сверяет ожидаемые данные фильмов (словари с ключом id) с БД.
+        Сравниваются только поля, переданные в словарях; неизвестные модели поля - ValueError
+        до обращения к БД, а не AttributeError из потока.
+        """
+        columns = MovieDBModel.__table__.columns.keys()
+        unknown = sorted({field for data in expected for field in data} - set(columns))
+        if unknown:
+            raise ValueError(f"Unknown movie fields {unknown}, expected some of {columns}")
+        by_id = {str(data['id']): data for data in expected}
+
+        def _verify(helper: MovieDBHelper, chunk: List[str]) -> MovieVerificationReport:
+            found = {movie.id: movie for movie in helper.get_movies_by_ids(chunk)}
+            report = MovieVerificationReport(checked=len(chunk))
+            for movie_id in chunk:
+                movie = found.get(movie_id)
+                if movie is None:
+                    report.missing.append(movie_id)
+                    continue
+                fields = [field for field, value in by_id[movie_id].items()
+                          if field != 'id' and getattr(movie, field) != value]
+                if fields:
+                    report.different[movie_id] = fields
+            return report
+
+        report = MovieVerificationReport()
+        for part in self.map_chunks(list(by_id), _verify):
+            report.checked += part.checked
+            report.missing.extend(part.missing)
+            report.different.update(part.different)
+        return report
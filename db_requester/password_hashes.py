@@ -0,0 +1,48 @@
+import json
+import random
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import bcrypt
+
+from tools import Tools
+from utils.data_generator import DataGenerator
+
+# Сервис авторизации хеширует пароли bcrypt с таким количеством раундов
+BCRYPT_ROUNDS = 10
+
+
+class PasswordHashCache:
+    """
+    Небольшой пул сгенерированных паролей с заранее посчитанными bcrypt-хешами.
+    Дорогой хеш считается один раз на пароль и сохраняется на диске между запусками,
+    поэтому пользователей можно вставлять прямо в БД пачками, и они сразу могут залогиниться.
+    """
+
+    def __init__(self, pool_size: int = 5, rounds: int = BCRYPT_ROUNDS, path: Optional[Path] = None):
+        self.pool_size = pool_size
+        self.rounds = rounds
+        self.path = Path(path) if path else Tools.files_dir('password_hashes', f'bcrypt_{rounds}.json')
+        self._hashes: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        if self.path.exists():
+            self._hashes = json.loads(self.path.read_text(encoding='utf-8'))
+
+    def _fill(self):
+        """Досчитывает хеши до размера пула. Вызывается под self._lock."""
+        if len(self._hashes) >= self.pool_size:
+            return
+        while len(self._hashes) < self.pool_size:
+            password = DataGenerator.generate_random_password()
+            self._hashes[password] = bcrypt.hashpw(
+                password.encode('utf-8'), bcrypt.gensalt(rounds=self.rounds)
+            ).decode('utf-8')
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(self._hashes, indent=2), encoding='utf-8')
+
+    def get(self) -> Tuple[str, str]:
+        """Возвращает пару (пароль, bcrypt-хеш) из пула"""
+        with self._lock:
+            self._fill()
+            return random.choice(list(self._hashes.items()))
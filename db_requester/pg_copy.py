@@ -0,0 +1,40 @@
+import csv
+import io
+from typing import Any, Iterable, Sequence
+
+from sqlalchemy.orm import Session
+
+from db_requester.rows import COPY_NULL, batched, to_csv_value
+
+
+def is_postgresql(session: Session) -> bool:
+    return session.get_bind().dialect.name == 'postgresql'
+
+
+def copy_expert(session: Session, table_name: str, columns: Sequence[str], csv_file) -> None:
+    """Выполняет COPY ... FROM STDIN (CSV) в текущей транзакции сессии"""
+    sql = (f"COPY {table_name} ({', '.join(columns)}) "
+           f"FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')")
+    cursor = session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(sql, csv_file)
+    finally:
+        cursor.close()
+
+
+def copy_rows(session: Session, table_name: str, columns: Sequence[str],
+              rows: Iterable[Sequence[Any]], chunk_size: int = 50_000) -> int:
+    """
+    Загружает строки в таблицу PostgreSQL через COPY FROM STDIN.
+    Строки буферизуются порциями по chunk_size, коммит остается за вызывающим кодом.
+    :return: Количество загруженных строк.
+    """
+    total = 0
+    for batch in batched(rows, chunk_size):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerows([to_csv_value(value) for value in row] for row in batch)
+        buffer.seek(0)
+        copy_expert(session, table_name, columns, buffer)
+        total += len(batch)
+    return total
@@ -0,0 +1,115 @@
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+# Метрики, которые при сведении по воркерам берутся максимумом, а не суммой
+_MAX_METRICS = {'peak_checked_out', 'checkout_wait_max_ms'}
+
+
+class PoolMetrics:
+    """Метрики пула соединений: ожидание checkout, количество и пик соединений"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.connections_opened = 0
+            self.connections_closed = 0
+            self.connections_invalidated = 0
+            self.checkouts = 0
+            self.checked_out = 0
+            self.peak_checked_out = 0
+            self.checkout_wait_total = 0.0
+            self.checkout_wait_max = 0.0
+
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self.checkout_wait_total += seconds
+            self.checkout_wait_max = max(self.checkout_wait_max, seconds)
+
+    def attach(self, engine):
+        """Подписывается на события пула движка"""
+        pool = engine.pool
+        if isinstance(pool, TimedQueuePool):
+            pool.metrics = self
+
+        @event.listens_for(engine, 'connect')
+        def _on_connect(dbapi_connection, connection_record):
+            with self._lock:
+                self.connections_opened += 1
+
+        @event.listens_for(engine, 'close')
+        def _on_close(dbapi_connection, connection_record):
+            with self._lock:
+                self.connections_closed += 1
+
+        @event.listens_for(engine, 'invalidate')
+        def _on_invalidate(dbapi_connection, connection_record, exception):
+            with self._lock:
+                self.connections_invalidated += 1
+
+        @event.listens_for(engine, 'checkout')
+        def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+            with self._lock:
+                self.checkouts += 1
+                self.checked_out += 1
+                self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+        @event.listens_for(engine, 'checkin')
+        def _on_checkin(dbapi_connection, connection_record):
+            with self._lock:
+                self.checked_out = max(0, self.checked_out - 1)
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'connections_opened': self.connections_opened,
+                'connections_closed': self.connections_closed,
+                'connections_invalidated': self.connections_invalidated,
+                'checkouts': self.checkouts,
+                'peak_checked_out': self.peak_checked_out,
+                'checkout_wait_total_ms': round(self.checkout_wait_total * 1000, 2),
+                'checkout_wait_max_ms': round(self.checkout_wait_max * 1000, 2),
+            }
+
+    @staticmethod
+    def merge(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Сводит метрики нескольких процессов (xdist-воркеров): счетчики и ожидание суммируются,
+        максимумы берутся по худшему воркеру.
+        """
+        merged = {}
+        for result in results:
+            for key, value in result.items():
+                merged[key] = max(merged.get(key, 0), value) if key in _MAX_METRICS \
+                    else round(merged.get(key, 0) + value, 2)
+        return merged
+
+    def summary(self, metrics: Optional[Dict[str, Any]] = None) -> str:
+        metrics = metrics if metrics is not None else self.as_dict()
+        return ', '.join(f'{key}={value}' for key, value in metrics.items())
+
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool, который замеряет время checkout (ожидание свободного соединения или открытие нового)"""
+
+    metrics: PoolMetrics = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if self.metrics is not None:
+                self.metrics.record_wait(time.perf_counter() - started)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
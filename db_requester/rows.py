@@ -0,0 +1,29 @@
+"""Общие утилиты для построчной загрузки данных: порции строк и значения в CSV для COPY"""
+from datetime import date, datetime
+from typing import Any, Iterable, Iterator, List
+
+# Маркер NULL в CSV для COPY, чтобы отличать NULL от пустой строки
+COPY_NULL = r'\N'
+
+
+def batched(rows: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Разбивает поток строк на списки не длиннее size"""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def to_csv_value(value):
+    """Значение Python в поле CSV для COPY: NULL - маркером COPY_NULL, bool - t/f, даты - ISO"""
+    if value is None:
+        return COPY_NULL
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
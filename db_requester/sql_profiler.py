@@ -0,0 +1,153 @@
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Порог "медленного" запроса, для которого снимается EXPLAIN (ANALYZE, BUFFERS)
+DB_SLOW_QUERY_MS = float(os.getenv('DB_SLOW_QUERY_MS', 200))
+# Сколько одинаковых по форме запросов за тест считаем признаком N+1
+DB_N_PLUS_ONE_THRESHOLD = int(os.getenv('DB_N_PLUS_ONE_THRESHOLD', 5))
+
+_EXPLAINABLE = ('select', 'with', 'insert', 'update', 'delete')
+# Служебные команды, которые повторяются в каждом тесте и не являются N+1
+_NOT_COUNTED = re.compile(r'^\s*(begin|commit|rollback|savepoint|release|pragma)\b', re.IGNORECASE)
+_SHAPE_RULES = [
+    (re.compile(r"'(?:[^']|'')*'"), '?'),                                     # строковые литералы
+    (re.compile(r'%\(\w+\)s|%s|\$\d+|\?|:\w+'), '?'),                          # параметры драйвера
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),                                  # числа
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),                     # IN-списки любой длины
+    (re.compile(r'\s+'), ' '),
+]
+
+
+def statement_shape(statement: str) -> str:
+    """Нормализует SQL: без литералов и параметров, IN-списки любой длины совпадают"""
+    shape = statement
+    for pattern, replacement in _SHAPE_RULES:
+        shape = pattern.sub(replacement, shape)
+    return shape.strip()
+
+
+class SqlProfile:
+    """Запросы, выполненные за время одного теста"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.statements: List[Dict[str, Any]] = []
+        self.explains: List[Dict[str, Any]] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def total_ms(self) -> float:
+        return round(sum(item['duration_ms'] for item in self.statements), 2)
+
+    def repeated_shapes(self, threshold: int = DB_N_PLUS_ONE_THRESHOLD) -> Dict[str, int]:
+        """
+        Формы запросов, повторенные не меньше threshold раз (кандидаты в N+1).
+        Управление транзакциями (BEGIN, SAVEPOINT, RELEASE, ROLLBACK TO ...) и PRAGMA не считаются.
+        """
+        counts = Counter(item['shape'] for item in self.statements if not _NOT_COUNTED.match(item['statement']))
+        return {shape: count for shape, count in counts.most_common() if count >= threshold}
+
+    def report(self) -> str:
+        lines = [f"{self.name}: statements={self.count}, total_ms={self.total_ms}"]
+        repeated = self.repeated_shapes()
+        if repeated:
+            lines.append('')
+            lines.append('Possible N+1 (repeated statement shapes):')
+            lines.extend(f'  {count}x {shape}' for shape, count in repeated.items())
+        lines.append('')
+        lines.append('Statements:')
+        lines.extend(f"  {item['duration_ms']:>9.2f} ms  {item['statement']}" for item in self.statements)
+        for explain in self.explains:
+            lines.append('')
+            lines.append(f"EXPLAIN ({explain['duration_ms']:.2f} ms): {explain['statement']}")
+            lines.extend(f'  {line}' for line in explain['plan'])
+        return '\n'.join(lines)
+
+
+class SqlProfiler:
+    """
+    Профилировщик SQL на событиях движка before/after_cursor_execute.
+    Пока активен профиль теста (start/stop), записывает каждый запрос и его длительность.
+    Профиль привязан к потоку, вызвавшему start: запросы из потоков CleanupRegistry,
+    ParallelMovieDBHelper и стресс-тестов переводов в профиль теста не попадают.
+    Для запросов дольше slow_threshold_ms на PostgreSQL снимает EXPLAIN (ANALYZE, BUFFERS)
+    внутри SAVEPOINT, который затем откатывается - повторное выполнение не оставляет следов.
+    """
+
+    def __init__(self, slow_threshold_ms: float = DB_SLOW_QUERY_MS, explain: bool = True):
+        self.slow_threshold_ms = slow_threshold_ms
+        self.explain = explain
+        self._local = threading.local()
+
+    @property
+    def current(self) -> Optional[SqlProfile]:
+        """Активный профиль текущего потока"""
+        return getattr(self._local, 'profile', None)
+
+    @current.setter
+    def current(self, profile: Optional[SqlProfile]):
+        self._local.profile = profile
+
+    def attach(self, engine):
+        """Подписывается на события выполнения запросов движка"""
+
+        @event.listens_for(engine, 'before_cursor_execute')
+        def _before(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault('sql_profiler_started', []).append(time.perf_counter())
+
+        @event.listens_for(engine, 'after_cursor_execute')
+        def _after(conn, cursor, statement, parameters, context, executemany):
+            started = conn.info['sql_profiler_started'].pop()
+            duration_ms = (time.perf_counter() - started) * 1000
+            profile = self.current
+            if profile is None:
+                return
+            profile.statements.append({
+                'statement': statement,
+                'shape': statement_shape(statement),
+                'duration_ms': round(duration_ms, 3),
+            })
+            if self.explain and duration_ms >= self.slow_threshold_ms and not executemany:
+                self._explain(conn, statement, parameters, duration_ms, profile)
+
+    def _explain(self, conn, statement: str, parameters, duration_ms: float, profile: SqlProfile):
+        if conn.dialect.name != 'postgresql' or conn.dialect.driver != 'psycopg2':
+            return
+        if not statement.lstrip().lower().startswith(_EXPLAINABLE):
+            return
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute('SAVEPOINT sql_profiler_explain')
+            try:
+                cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS) {statement}', parameters)
+                plan = [row[0] for row in cursor.fetchall()]
+            finally:
+                cursor.execute('ROLLBACK TO SAVEPOINT sql_profiler_explain')
+                cursor.execute('RELEASE SAVEPOINT sql_profiler_explain')
+        except Exception as e:
+            plan = [f'EXPLAIN failed: {e}']
+        finally:
+            cursor.close()
+        profile.explains.append({'statement': statement, 'duration_ms': duration_ms, 'plan': plan})
+
+    def start(self, name: str) -> SqlProfile:
+        self.current = SqlProfile(name)
+        return self.current
+
+    def stop(self) -> Optional[SqlProfile]:
+        profile, self.current = self.current, None
+        if profile is not None and profile.repeated_shapes():
+            logger.warning(f"Possible N+1 in {profile.name}: {profile.repeated_shapes()}")
+        return profile
@@ -0,0 +1,146 @@
+import hashlib
+import logging
+import os
+from contextlib import contextmanager
+from typing import Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+from sqlalchemy.schema import CreateTable
+
+from db_models.movies import Base as MoviesBase
+from db_models.user import Base as UsersBase
+from db_requester import db_client
+from db_requester.db_client import SessionLocal, create_schema, get_database_url
+from db_requester.db_helpers import MovieDBHelper
+
+# Import регистрирует таблицу accounts_transaction_template в метаданных MoviesBase
+import db_requester.models  # noqa: F401
+
+logger = logging.getLogger(__name__)
+
+# Клонирование включается явно: на общем стенде может не быть прав на CREATE DATABASE
+DB_CLONE_PER_WORKER = os.getenv('DB_CLONE_PER_WORKER', '').lower() in ('1', 'true', 'yes')
+# База для служебных команд (CREATE/DROP DATABASE)
+DB_MAINTENANCE_NAME = os.getenv('DB_MAINTENANCE_NAME', 'postgres')
+# Если задана - шаблон копируется из этой базы, иначе строится из моделей и наполняется
+DB_TEMPLATE_SOURCE = os.getenv('DB_TEMPLATE_SOURCE')
+DB_TEMPLATE_MOVIES = int(os.getenv('DB_TEMPLATE_MOVIES', 1000))
+
+_TEMPLATE_LOCK_KEY = 'cinescope_template_db'
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _maintenance_engine():
+    return create_engine(
+        get_database_url(database=DB_MAINTENANCE_NAME), isolation_level='AUTOCOMMIT', poolclass=NullPool
+    )
+
+
+def template_fingerprint(source: Optional[str] = None, movies: int = DB_TEMPLATE_MOVIES) -> str:
+    """Отпечаток схемы и параметров наполнения - при изменении шаблон пересобирается"""
+    ddl = [str(CreateTable(table)) for base in (MoviesBase, UsersBase) for table in base.metadata.sorted_tables]
+    payload = '\n'.join(ddl + [f'source={source}', f'movies={movies}'])
+    return hashlib.md5(payload.encode('utf-8')).hexdigest()
+
+
+class TemplateDatabase:
+    """
+    Шаблонная база с готовой схемой и данными и ее клоны для xdist-воркеров.
+    CREATE DATABASE ... TEMPLATE копирует файлы шаблона, поэтому клон готов за доли секунды
+    вместо повторного наполнения. Сборка шаблона защищена advisory lock: ее выполняет
+    первый воркер, остальные ждут и переиспользуют результат.
+    """
+
+    def __init__(self, base_name: Optional[str] = None, source: Optional[str] = DB_TEMPLATE_SOURCE,
+                 movies: int = DB_TEMPLATE_MOVIES):
+        self.base_name = base_name or db_client.DATABASE_NAME
+        self.template_name = f'{self.base_name}_template'
+        self.source = source
+        self.movies = movies
+        self.fingerprint = template_fingerprint(source, movies)
+
+    def clone_name(self, worker: str) -> str:
+        return f'{self.base_name}_{worker}'
+
+    @contextmanager
+    def _locked(self):
+        engine = _maintenance_engine()
+        try:
+            with engine.connect() as connection:
+                connection.execute(text('SELECT pg_advisory_lock(hashtext(:key))'), {'key': _TEMPLATE_LOCK_KEY})
+                try:
+                    yield connection
+                finally:
+                    connection.execute(text('SELECT pg_advisory_unlock(hashtext(:key))'),
+                                       {'key': _TEMPLATE_LOCK_KEY})
+        finally:
+            engine.dispose()
+
+    def _template_is_fresh(self, connection) -> bool:
+        comment = connection.execute(text(
+            "SELECT shobj_description(oid, 'pg_database') FROM pg_database WHERE datname = :name"
+        ), {'name': self.template_name}).first()
+        return comment is not None and comment[0] == self.fingerprint
+
+    def _drop(self, connection, name: str):
+        connection.execute(text(f'DROP DATABASE IF EXISTS {_quote(name)} WITH (FORCE)'))
+
+    def _create_from(self, connection, name: str, template: str):
+        strategy = ' STRATEGY FILE_COPY' if connection.dialect.server_version_info >= (15,) else ''
+        connection.execute(text(f'CREATE DATABASE {_quote(name)} TEMPLATE {_quote(template)}{strategy}'))
+
+    def _build(self, connection):
+        logger.info(f"Building template database {self.template_name}")
+        self._drop(connection, self.template_name)
+        if self.source:
+            self._create_from(connection, self.template_name, self.source)
+        else:
+            connection.execute(text(
+                f"CREATE DATABASE {_quote(self.template_name)} TEMPLATE template0 ENCODING 'UTF8'"
+            ))
+            self._seed()
+        # COMMENT не принимает параметры; отпечаток - hex-строка, экранирование не нужно
+        connection.execute(text(f"COMMENT ON DATABASE {_quote(self.template_name)} IS '{self.fingerprint}'"))
+
+    def _seed(self):
+        engine = create_engine(get_database_url(database=self.template_name), poolclass=NullPool)
+        try:
+            create_schema(engine)
+            with SessionLocal(bind=engine) as session:
+                MovieDBHelper(session).seed_movies(self.movies)
+        finally:
+            # В шаблон не должно остаться подключений, иначе CREATE DATABASE ... TEMPLATE упадет
+            engine.dispose()
+
+    def ensure_template(self):
+        """Собирает шаблон, если его нет или изменились схема/параметры наполнения"""
+        with self._locked() as connection:
+            if not self._template_is_fresh(connection):
+                self._build(connection)
+
+    def create_clone(self, worker: str) -> str:
+        """Создает (пересоздает) клон шаблона для воркера и возвращает имя базы"""
+        name = self.clone_name(worker)
+        with self._locked() as connection:
+            if not self._template_is_fresh(connection):
+                self._build(connection)
+            self._drop(connection, name)
+            self._create_from(connection, name, self.template_name)
+        logger.info(f"Worker {worker} uses cloned database {name}")
+        return name
+
+    def drop_clone(self, worker: str):
+        engine = _maintenance_engine()
+        try:
+            with engine.connect() as connection:
+                self._drop(connection, self.clone_name(worker))
+        finally:
+            engine.dispose()
+
+    def drop_template(self):
+        with self._locked() as connection:
+            self._drop(connection, self.template_name)
@@ -1,12 +1,22 @@
 import random
 
 import pytest
-from datetime import datetime
+from sqlalchemy.exc import InternalError
+from datetime import datetime, timedelta
 import uuid
 from typing import Dict, Any
-from db_helpers import MovieDBHelper
+from db_requester.db_helpers import MovieDBHelper, DBHelper
+from db_requester.async_db_client import async_db_session, dispose_async_engine
+from db_requester.db_client import get_db_session, is_sqlite_backend, isolated_db_session
+from db_requester.async_db_helpers import AsyncMovieDBHelper, movies_exist
 from decimal import Decimal
 from db_models.movies import MovieDBModel
+from db_requester.data_sweeper import DataSweeper
+from db_requester.dataset_loader import DatasetLoader, write_dataset
+from db_requester.parallel_db_helpers import ParallelMovieDBHelper
+from utils.data_generator import DataGenerator
+from utils.catalog_reconciler import RECONCILED_FIELDS, CatalogReconciler, canonical_rating
+from utils.run_tag import RUN_ID, run_tag, tag_name
 
 
 class TestMovieOperations:
@@ -73,4 +83,415 @@ class TestMovieOperations:
 
         # ==================== DELETE ====================
         assert movie_helper.delete_movie(movie_id) is True
-        assert movie_helper.get_movie_by_id(movie_id) is None
\ No newline at end of file
+        assert movie_helper.get_movie_by_id(movie_id) is None
+
+class TestRollbackIsolation:
+    """Тесты изоляции DB-тестов транзакцией с откатом"""
+
+    def test_isolated_session_rolls_back_commits(self, sample_movie_data: Dict[str, Any]):
+        with isolated_db_session() as session:
+            helper = MovieDBHelper(session)
+            helper.create_movie(sample_movie_data)
+            helper.update_movie(sample_movie_data['id'], {'price': 42})
+            assert helper.get_movie_by_id(sample_movie_data['id']).price == 42
+
+        check_session = get_db_session()
+        try:
+            assert not MovieDBHelper(check_session).movie_exists(sample_movie_data['id'])
+        finally:
+            check_session.close()
+
+    @pytest.mark.db_rollback
+    def test_created_movie_in_rollback_mode(self, created_test_movie: MovieDBModel,
+                                            movie_helper: MovieDBHelper):
+        assert movie_helper.db_session.info.get('isolated') is True
+        assert movie_helper.movie_exists(created_test_movie.id)
+
+
+@pytest.mark.db_rollback
+class TestMovieBulkOperations:
+    """Тесты пакетного создания фильмов"""
+
+    def test_create_movie_batch_returns_loaded_movies(self, movie_helper: MovieDBHelper, sample_movie_data):
+        movies_data = []
+        for i in range(3):
+            movies_data.append(dict(sample_movie_data, id=f"{sample_movie_data['id']}{i}", name=f"Фильм пачки {i}"))
+
+        movies = movie_helper.create_movie_batch(movies_data)
+
+        assert [movie.id for movie in movies] == [data['id'] for data in movies_data]
+        assert all(movie.created_at is not None for movie in movies)
+        assert movie_helper.get_movie_by_id(movies_data[2]['id']).name == "Фильм пачки 2"
+
+    def test_seed_movies(self, movie_helper: MovieDBHelper):
+        count_before = movie_helper.get_movies_count()
+
+        movie_ids = movie_helper.seed_movies(1000)
+
+        assert len(set(movie_ids)) == 1000
+        assert movie_helper.get_movies_count() == count_before + 1000
+        assert movie_helper.movie_exists(movie_ids[-1])
+
+
+@pytest.mark.db_rollback
+class TestMovieStreaming:
+    """Тесты потокового чтения фильмов"""
+
+    def test_iter_movie_chunks_covers_table(self, movie_helper: MovieDBHelper):
+        movie_helper.seed_movies(250)
+
+        chunk_sizes = [len(chunk) for chunk in movie_helper.iter_movie_chunks(chunk_size=100)]
+
+        assert sum(chunk_sizes) == movie_helper.get_movies_count()
+        assert max(chunk_sizes) <= 100
+
+    def test_iter_movies_with_projection_and_filter(self, movie_helper: MovieDBHelper):
+        movie_helper.seed_movies(100)
+        published_count = movie_helper.get_movies_count(published_only=True)
+
+        rows = list(movie_helper.iter_movies(chunk_size=30, columns=['id', 'published'], published_only=True))
+
+        assert len(rows) == published_count
+        assert all(row.published for row in rows)
+        assert len({row.id for row in rows}) == published_count
+
+    def test_iter_movies_unknown_column(self, movie_helper: MovieDBHelper):
+        with pytest.raises(ValueError):
+            next(movie_helper.iter_movies(columns=['unknown']))
+
+
+@pytest.mark.db_rollback
+class TestHelperStatements:
+    """Проверки запросов хелперов на select()"""
+
+    def test_exists_checks(self, movie_helper: MovieDBHelper, db_helper: DBHelper, created_test_movie: MovieDBModel):
+        assert movie_helper.movie_exists(created_test_movie.id) is True
+        assert movie_helper.movie_exists_by_name(created_test_movie.name) is True
+        assert movie_helper.movie_exists('missing-movie') is False
+        assert db_helper.user_exists_by_email('missing-user@example.com') is False
+
+    def test_delete_movie_returns_status(self, movie_helper: MovieDBHelper, created_test_movie: MovieDBModel):
+        assert movie_helper.delete_movie(created_test_movie.id) is True
+        assert movie_helper.get_movie_by_id(created_test_movie.id) is None
+        assert movie_helper.delete_movie(created_test_movie.id) is False
+
+
+@pytest.mark.anyio
+class TestAsyncHelpers:
+    """Тесты асинхронных хелперов"""
+
+    async def test_movies_exist_concurrently(self, movie_helper: MovieDBHelper):
+        movie_ids = movie_helper.seed_movies(20)
+        try:
+            existence = await movies_exist(movie_ids + ['missing-movie'], concurrency=5)
+
+            assert all(existence[movie_id] for movie_id in movie_ids)
+            assert existence['missing-movie'] is False
+        finally:
+            movie_helper.delete_movies_by_ids(movie_ids)
+            await dispose_async_engine()
+
+    async def test_async_movie_lifecycle(self, sample_movie_data):
+        try:
+            async with async_db_session() as session:
+                helper = AsyncMovieDBHelper(session)
+                movie = await helper.create_movie(sample_movie_data)
+
+                assert movie.name == sample_movie_data['name']
+                assert await helper.movie_exists_by_name(movie.name)
+                assert await helper.delete_movie(movie.id)
+                assert await helper.get_movie_by_id(movie.id) is None
+        finally:
+            await dispose_async_engine()
+
+
+@pytest.mark.db_rollback
+class TestMovieBulkUpdates:
+    """Тесты set-based обновлений фильмов"""
+
+    def test_publish_and_unpublish_movies(self, movie_helper: MovieDBHelper):
+        movie_ids = movie_helper.seed_movies(10)
+
+        unpublished = movie_helper.unpublish_movies(movie_ids)
+        assert sorted(movie.id for movie in unpublished) == sorted(movie_ids)
+        assert not any(movie.published for movie in unpublished)
+
+        published = movie_helper.publish_movies(movie_ids[:3] + ['missing-movie'])
+        assert len(published) == 3
+        assert movie_helper.get_movie_by_id(movie_ids[0]).published is True
+        assert movie_helper.get_movie_by_id(movie_ids[3]).published is False
+
+    def test_update_movies_rating(self, movie_helper: MovieDBHelper):
+        movie_ids = movie_helper.seed_movies(3)
+
+        movies = movie_helper.update_movies_rating({movie_ids[0]: 1.5, movie_ids[1]: 9.5})
+        assert {movie.id: movie.rating for movie in movies} == {movie_ids[0]: 1.5, movie_ids[1]: 9.5}
+
+        movies = movie_helper.update_movies_rating(movie_ids, 5.0)
+        assert [movie.rating for movie in movies] == [5.0] * 3
+
+    def test_update_movie_refreshes_loaded_object(self, movie_helper: MovieDBHelper,
+                                                  created_test_movie: MovieDBModel):
+        updated = movie_helper.update_movie(created_test_movie.id, {'name': 'Новое имя', 'unknown': 1})
+
+        assert updated is created_test_movie
+        assert created_test_movie.name == 'Новое имя'
+        assert movie_helper.update_movie('missing-movie', {'name': 'x'}) is None
+
+
+@pytest.mark.db_rollback
+class TestDataSweeper:
+    """Тесты очистки данных по метке прогона"""
+
+    def test_sweep_run_deletes_only_tagged_rows(self, movie_helper: MovieDBHelper, db_helper: DBHelper):
+        movie_ids = movie_helper.seed_movies(5)
+        user_id = db_helper.create_test_user(DataGenerator.generate_user_data()).id
+        foreign_movie_id = movie_helper.create_movie({
+            'id': str(uuid.uuid4().int)[:9],
+            'name': 'Фильм прошлого прогона [run-0ther000-gw0]',
+            'created_at': datetime.now() - timedelta(hours=48)
+        }).id
+
+        deleted = DataSweeper(movie_helper.db_session).sweep_run(RUN_ID)
+
+        assert deleted['movies'] >= 5 and deleted['users'] >= 1
+        assert not any(movie_helper.movie_exists(movie_id) for movie_id in movie_ids)
+        assert db_helper.get_user_by_id(user_id) is None
+        assert movie_helper.movie_exists(foreign_movie_id)
+
+        assert DataSweeper(movie_helper.db_session).sweep_older_than(24)['movies'] >= 1
+        assert not movie_helper.movie_exists(foreign_movie_id)
+
+    def test_pool_users_survive_sweep_older_than(self, db_helper: DBHelper):
+        created_at = datetime.now() - timedelta(hours=48)
+        pool_user_id = db_helper.create_test_user(dict(
+            DataGenerator.generate_user_data(), email=DataGenerator.generate_random_email(pooled=True),
+            created_at=created_at)).id
+        run_user_id = db_helper.create_test_user(dict(DataGenerator.generate_user_data(), created_at=created_at)).id
+
+        DataSweeper(db_helper.db_session).sweep_older_than(24)
+
+        assert db_helper.get_user_by_id(pool_user_id) is not None
+        assert db_helper.get_user_by_id(run_user_id) is None
+
+
+@pytest.mark.db_rollback
+class TestCatalogReconciliation:
+    """Тесты сверки каталога API с таблицей movies по дайджестам диапазонов"""
+
+    @staticmethod
+    def _api_movies(movie_helper: MovieDBHelper):
+        movies = []
+        for row in movie_helper.iter_movies(columns=list(RECONCILED_FIELDS)):
+            row = row._asdict()
+            movies.append({field: row[column] for column, field in RECONCILED_FIELDS.items()}
+                          | {'id': int(row['id']), 'createdAt': '2025-01-01T00:00:00.000Z'})
+        return movies
+
+    def test_reconcile_matching_catalog(self, movie_helper: MovieDBHelper):
+        movie_helper.seed_movies(300)
+
+        report = CatalogReconciler(movie_helper.db_session, movies_api=None, chunk_size=50, tag=run_tag()) \
+            .reconcile(self._api_movies(movie_helper))
+
+        assert report.ok, report
+        assert report.chunks_total >= 6
+
+    def test_half_way_ratings_digest_equally(self, movie_helper: MovieDBHelper, sample_movie_data):
+        base_id = int(movie_helper.seed_movies(1)[0])
+        for offset, rating in enumerate([2.675, 1.005, 0.125, 8.345], start=1):
+            movie_helper.create_movie(dict(sample_movie_data, id=str(base_id + offset), rating=rating,
+                                           name=tag_name(f'Рейтинг {rating}')))
+
+        report = CatalogReconciler(movie_helper.db_session, movies_api=None, chunk_size=50, tag=run_tag()) \
+            .reconcile(self._api_movies(movie_helper))
+
+        assert canonical_rating(2.675) == '2.68' and canonical_rating(0.125) == '0.13'
+        assert report.ok, report
+
+    def test_reconcile_drills_into_mismatched_chunks(self, movie_helper: MovieDBHelper):
+        movie_ids = sorted(movie_helper.seed_movies(300), key=int)
+        api_movies = {str(movie['id']): movie for movie in self._api_movies(movie_helper)}
+        dropped = api_movies.pop(movie_ids[10])
+        api_movies[movie_ids[200]]['name'] = tag_name('Переименован в API')
+        extra_id = str(int(movie_ids[-1]) + 1)
+        api_movies[extra_id] = dict(dropped, id=int(extra_id))
+
+        report = CatalogReconciler(movie_helper.db_session, movies_api=None, chunk_size=50, tag=run_tag()) \
+            .reconcile(list(api_movies.values()))
+
+        assert not report.ok
+        assert len(report.mismatched_chunks) <= 3 < report.chunks_total
+        assert report.missing_in_api == [movie_ids[10]]
+        assert report.missing_in_db == [extra_id]
+        assert report.different == {movie_ids[200]: ['name']}
+
+
+@pytest.mark.db_rollback
+class TestKeysetPagination:
+    """Тесты keyset-пагинации с курсорами"""
+
+    @staticmethod
+    def _walk(get_page, **kwargs):
+        movies, cursor, pages = [], None, 0
+        while True:
+            page = get_page(cursor=cursor, **kwargs)
+            movies.extend(page.movies)
+            pages += 1
+            if page.next_cursor is None:
+                return movies, pages
+            cursor = page.next_cursor
+
+    def test_walk_all_movies_with_equal_created_at(self, movie_helper: MovieDBHelper):
+        movie_ids = movie_helper.seed_movies(25)  # у всех фильмов одинаковый created_at
+
+        movies, pages = self._walk(movie_helper.get_all_movies_page, page_size=10)
+
+        walked_ids = [movie.id for movie in movies]
+        assert len(walked_ids) == len(set(walked_ids)) == movie_helper.get_movies_count()
+        assert set(movie_ids) <= set(walked_ids)
+        assert pages == -(-len(walked_ids) // 10)
+
+    def test_walk_movies_by_rating(self, movie_helper: MovieDBHelper):
+        movie_helper.seed_movies(30)
+
+        movies, _ = self._walk(movie_helper.get_movies_by_rating_page, page_size=7, published_only=False)
+
+        ratings = [movie.rating for movie in movies if movie.rating is not None]
+        assert ratings == sorted(ratings, reverse=True)
+        assert len({movie.id for movie in movies}) == movie_helper.get_movies_count()
+
+    def test_walk_movies_with_null_ratings(self, movie_helper: MovieDBHelper, sample_movie_data):
+        base_id = int(sample_movie_data['id']) * 100
+        created = movie_helper.create_movie_batch([
+            dict(sample_movie_data, id=str(base_id + i), name=tag_name(f'Рейтинг {i}'),
+                 rating=None if i % 3 == 0 else float(i % 10))
+            for i in range(20)
+        ])
+
+        movies, _ = self._walk(movie_helper.get_movies_by_rating_page, page_size=5, published_only=False)
+
+        walked_ids = [movie.id for movie in movies]
+        assert len(walked_ids) == len(set(walked_ids)) == movie_helper.get_movies_count()
+        assert {movie.id for movie in created} <= set(walked_ids)
+        ratings = [movie.rating for movie in movies]
+        first_null = ratings.index(None)
+        assert all(rating is None for rating in ratings[first_null:])  # NULLS LAST
+
+    def test_cursor_of_other_sort_is_rejected(self, movie_helper: MovieDBHelper):
+        movie_helper.seed_movies(3)
+        cursor = movie_helper.get_all_movies_page(page_size=1).next_cursor
+
+        with pytest.raises(ValueError):
+            movie_helper.get_movies_by_rating_page(cursor=cursor)
+        with pytest.raises(ValueError):
+            movie_helper.get_all_movies_page(cursor='not-a-cursor')
+
+
+class TestReadRouting:
+    """Тесты маршрутизации чтений на read-only движок"""
+
+    def test_reads_go_to_read_session(self, movie_helper: MovieDBHelper, created_test_movie: MovieDBModel):
+        assert movie_helper.read_session is not movie_helper.db_session
+
+        movie_id = created_test_movie.id
+        loaded = movie_helper.get_movie_by_id(movie_id)
+        assert loaded is not created_test_movie
+        assert loaded in movie_helper.read_session
+
+        movie_helper.update_movie(movie_id, {'name': 'Обновлено через основной движок'})
+        assert movie_helper.get_movie_by_id(movie_id).name == 'Обновлено через основной движок'
+
+    def test_save_object_modified_after_read(self, movie_helper: MovieDBHelper, created_test_movie: MovieDBModel):
+        loaded = movie_helper.get_movie_by_id(created_test_movie.id)
+        assert loaded in movie_helper.read_session
+        loaded.name = tag_name('Изменен после чтения')
+
+        saved = movie_helper.save(loaded)
+
+        assert saved in movie_helper.db_session
+        assert movie_helper.get_movie_by_id(created_test_movie.id).name == loaded.name
+
+    def test_cleanup_objects_from_read_session(self, db_helper: DBHelper):
+        user = db_helper.create_test_user(DataGenerator.generate_user_data())
+        loaded = db_helper.get_user_by_id(user.id)
+        assert loaded in db_helper.read_session
+
+        db_helper.cleanup_test_data([loaded, None])
+
+        assert db_helper.get_user_by_id(user.id) is None
+
+    @pytest.mark.skipif(is_sqlite_backend(), reason="В SQLite чтение и запись идут в одну базу")
+    def test_read_session_rejects_writes(self, db_read_session, sample_movie_data):
+        with pytest.raises(InternalError, match='read-only transaction'):
+            MovieDBHelper(db_read_session).create_movie(sample_movie_data)
+        db_read_session.rollback()
+
+
+@pytest.mark.db_rollback
+class TestDatasetLoader:
+    """Тесты загрузки версионированных наборов данных"""
+
+    def test_load_reference_dataset(self, movie_helper: MovieDBHelper, load_dataset):
+        loaded = load_dataset('reference_movies')
+
+        assert loaded.rows == {'movies': 2000}
+        movie_ids = list(loaded.keys['movies'].values())
+        assert len(movie_ids) == 2000 and '990000000' not in movie_ids
+        assert movie_helper.get_existing_movie_ids(movie_ids) == set(movie_ids)
+        first = movie_helper.get_movie_by_id(loaded.keys['movies']['990000000'])
+        assert first.name == tag_name('Справочный фильм 0000')
+        assert first.description is None
+        assert first.created_at == datetime(2025, 1, 1)
+
+    def test_reload_reference_dataset(self, load_dataset):
+        """Повторная загрузка (как в соседнем воркере) не конфликтует по первичному ключу"""
+        first = load_dataset('reference_movies')
+        second = load_dataset('reference_movies')
+
+        assert not set(first.keys['movies'].values()) & set(second.keys['movies'].values())
+
+    def test_load_latest_version(self, movie_helper: MovieDBHelper, sample_movie_data, tmp_path):
+        write_dataset('movies', 1, {'movies': [sample_movie_data]}, base_dir=tmp_path)
+        changed = dict(sample_movie_data, name='Версия 2', published=False, rating=None)
+        write_dataset('movies', 2, {'movies': [changed]}, base_dir=tmp_path)
+        loader = DatasetLoader(movie_helper.db_session, base_dir=tmp_path)
+
+        assert loader.versions('movies') == [1, 2]
+        assert loader.load('movies').rows == {'movies': 1}
+        movie = movie_helper.get_movie_by_id(sample_movie_data['id'])
+        assert (movie.name, movie.published, movie.rating) == ('Версия 2', False, None)
+        assert movie.created_at == sample_movie_data['created_at']
+        with pytest.raises(ValueError):
+            loader.load('movies', version=3)
+        with pytest.raises(ValueError):
+            loader.load('unknown')
+
+
+class TestParallelHelpers:
+    """Тесты массовых проверок из пула потоков (данные коммитятся - иначе потокам их не видно)"""
+
+    def test_verify_10k_movies_in_threads(self, movie_helper: MovieDBHelper):
+        movie_ids = movie_helper.seed_movies(10_000)
+        try:
+            parallel = ParallelMovieDBHelper(max_workers=8, chunk_size=1000)
+            movies = parallel.get_movies_by_ids(movie_ids)
+            expected = [{'id': movie.id, 'name': movie.name, 'rating': movie.rating} for movie in movies.values()]
+            expected[0]['name'] = 'Другое название'
+            # seed_movies выдает числовые ID от 10**9, нечисловой ID в БД заведомо отсутствует
+            missing_id = f'absent-{uuid.uuid4().hex[:8]}'
+
+            exist = parallel.movies_exist(movie_ids[:5] + [missing_id])
+            report = parallel.verify_movies(expected + [{'id': missing_id, 'name': 'Нет в БД'}])
+
+            assert len(movies) == 10_000
+            assert exist == dict.fromkeys(movie_ids[:5], True) | {missing_id: False}
+            assert report.checked == 10_001
+            assert report.missing == [missing_id]
+            assert report.different == {expected[0]['id']: ['name']}
+        finally:
+            movie_helper.delete_movies_by_ids(movie_ids)
+
+    def test_verify_unknown_field(self):
+        with pytest.raises(ValueError, match='titel'):
+            ParallelMovieDBHelper().verify_movies([{'id': '1', 'titel': 'Опечатка в поле'}])
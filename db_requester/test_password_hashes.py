@@ -0,0 +1,23 @@
+import bcrypt
+
+from db_requester.password_hashes import PasswordHashCache
+
+
+class TestPasswordHashCache:
+    """Тесты пула паролей с заранее посчитанными хешами"""
+
+    def test_hashes_match_passwords(self, tmp_path):
+        cache = PasswordHashCache(pool_size=2, rounds=4, path=tmp_path / 'hashes.json')
+        password, password_hash = cache.get()
+        assert bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+
+    def test_hashes_are_computed_once(self, tmp_path, mocker):
+        path = tmp_path / 'hashes.json'
+        PasswordHashCache(pool_size=2, rounds=4, path=path).get()
+
+        hashpw = mocker.patch('db_requester.password_hashes.bcrypt.hashpw')
+        cache = PasswordHashCache(pool_size=2, rounds=4, path=path)
+        pairs = {cache.get() for _ in range(10)}
+
+        hashpw.assert_not_called()
+        assert len(pairs) <= 2
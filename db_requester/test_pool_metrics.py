@@ -0,0 +1,58 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+from db_requester import db_client
+from db_requester.pool_metrics import PoolMetrics, TimedQueuePool
+
+
+class TestPoolMetrics:
+    """Тесты настроек и метрик пула соединений"""
+
+    def test_pool_is_split_between_workers(self, monkeypatch):
+        monkeypatch.setenv('PYTEST_XDIST_WORKER_COUNT', '4')
+        settings = db_client.get_pool_settings()
+        budget = max(2, db_client.DB_POOL_TOTAL // 4)
+        assert settings['pool_size'] + settings['max_overflow'] == budget
+        assert settings['pool_pre_ping'] is True
+
+    def test_checkout_metrics(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'metrics.db'}", poolclass=TimedQueuePool, pool_size=2)
+        metrics = PoolMetrics()
+        metrics.attach(engine)
+
+        with engine.connect() as first, engine.connect() as second:
+            first.execute(text('SELECT 1'))
+            second.execute(text('SELECT 1'))
+        with engine.connect() as third:
+            third.execute(text('SELECT 1'))
+
+        result = metrics.as_dict()
+        assert result['checkouts'] == 3
+        assert result['peak_checked_out'] == 2
+        assert result['connections_opened'] == 2
+        assert result['checkout_wait_total_ms'] > 0
+
+    def test_overflow_fits_worker_budget(self, monkeypatch):
+        monkeypatch.setattr(db_client, 'DB_POOL_TOTAL', 20)
+        for workers in (1, 3, 4, 8, 16):
+            monkeypatch.setenv('PYTEST_XDIST_WORKER_COUNT', str(workers))
+            settings = db_client.get_pool_settings()
+            assert settings['pool_size'] >= 1 and settings['max_overflow'] >= 1
+            assert (settings['pool_size'] + settings['max_overflow']) * workers <= max(20, 2 * workers)
+
+    def test_merge_worker_metrics(self):
+        merged = PoolMetrics.merge([
+            {'checkouts': 3, 'peak_checked_out': 2, 'checkout_wait_total_ms': 1.5, 'checkout_wait_max_ms': 1.0},
+            {'checkouts': 5, 'peak_checked_out': 4, 'checkout_wait_total_ms': 2.25, 'checkout_wait_max_ms': 0.5},
+        ])
+        assert merged == {'checkouts': 8, 'peak_checked_out': 4,
+                          'checkout_wait_total_ms': 3.75, 'checkout_wait_max_ms': 1.0}
+
+    @pytest.mark.skipif(db_client.is_sqlite_backend(), reason="Для SQLite читающий движок совпадает с основным")
+    def test_read_engine_reports_its_own_pool(self):
+        checkouts = db_client.read_pool_metrics.as_dict()['checkouts']
+
+        with db_client.get_read_engine().connect() as connection:
+            connection.execute(text('SELECT 1'))
+
+        assert db_client.read_pool_metrics.as_dict()['checkouts'] == checkouts + 1
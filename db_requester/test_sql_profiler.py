@@ -0,0 +1,82 @@
+import threading
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from db_requester.db_client import get_database_url, is_sqlite_backend
+from db_requester.sql_profiler import SqlProfile, SqlProfiler, statement_shape
+
+
+class TestSqlProfiler:
+    """Тесты профилировщика SQL"""
+
+    def test_statement_shape_ignores_literals_and_in_lists(self):
+        first = statement_shape("SELECT * FROM movies WHERE id IN (%(id_1)s, %(id_2)s) AND price > 10")
+        second = statement_shape("SELECT *  FROM movies\nWHERE id IN (%(id_1)s) AND price > 500")
+
+        assert first == second == "SELECT * FROM movies WHERE id IN (...) AND price > ?"
+
+    def test_profile_counts_statements_and_detects_n_plus_one(self):
+        engine = create_engine('sqlite://')
+        profiler = SqlProfiler()
+        profiler.attach(engine)
+        with engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+            profile = profiler.start('test')
+            for movie_id in range(6):
+                connection.execute(text('SELECT :movie_id'), {'movie_id': movie_id})
+            profiler.stop()
+            connection.execute(text('SELECT 2'))
+
+        assert profile.count == 6
+        assert profile.total_ms >= 0
+        assert profile.repeated_shapes(threshold=5) == {'SELECT ?': 6}
+        assert 'Possible N+1' in profile.report()
+
+    def test_statements_from_other_threads_are_not_counted(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'profiler.db'}")
+        profiler = SqlProfiler()
+        profiler.attach(engine)
+
+        def background_queries():
+            with engine.connect() as connection:
+                for _ in range(6):
+                    connection.execute(text('SELECT 1'))
+
+        profile = profiler.start('test')
+        with engine.connect() as connection:
+            connection.execute(text('SELECT 2'))
+        worker = threading.Thread(target=background_queries)
+        worker.start()
+        worker.join()
+        profiler.stop()
+
+        assert [item['statement'] for item in profile.statements] == ['SELECT 2']
+
+    def test_transaction_control_is_not_n_plus_one(self):
+        profile = SqlProfile('test')
+        for statement in ['BEGIN', 'SAVEPOINT sa_savepoint_1', 'RELEASE SAVEPOINT sa_savepoint_1',
+                          'ROLLBACK TO SAVEPOINT sa_savepoint_1', 'PRAGMA read_uncommitted = true'] * 6:
+            profile.statements.append({'statement': statement, 'shape': statement_shape(statement),
+                                       'duration_ms': 0.1})
+
+        assert profile.repeated_shapes(threshold=5) == {}
+
+    @pytest.mark.skipif(is_sqlite_backend(), reason="EXPLAIN (ANALYZE, BUFFERS) есть только в PostgreSQL")
+    def test_slow_statement_is_explained_and_rolled_back(self):
+        engine = create_engine(get_database_url())
+        profiler = SqlProfiler(slow_threshold_ms=0)
+        profiler.attach(engine)
+        try:
+            with engine.connect() as connection:
+                connection.execute(text('CREATE TEMP TABLE profiler_check (value int)'))
+                profile = profiler.start('test')
+                connection.execute(text('INSERT INTO profiler_check VALUES (1)'))
+                profiler.stop()
+                rows = connection.execute(text('SELECT count(*) FROM profiler_check')).scalar()
+        finally:
+            engine.dispose()
+
+        assert rows == 1, "EXPLAIN ANALYZE не должен оставлять изменений"
+        assert any('Insert on profiler_check' in line for line in profile.explains[0]['plan'])
+        assert 'Buffers' in '\n'.join(profile.explains[0]['plan'])
@@ -0,0 +1,38 @@
+import time
+
+import pytest
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from db_requester import db_client
+from db_requester.db_client import get_database_url, is_sqlite_backend
+from db_requester.template_db import TemplateDatabase
+
+
+@pytest.mark.skipif(is_sqlite_backend(), reason="Шаблонные базы есть только в PostgreSQL")
+class TestTemplateDatabase:
+    """Тесты клонирования шаблонной базы для воркеров"""
+
+    def test_worker_clone_has_template_data(self):
+        template = TemplateDatabase(base_name=f'{db_client.DATABASE_NAME}_tpl_check', movies=50)
+        try:
+            clone_name = template.create_clone('gw_check')
+
+            started = time.perf_counter()
+            second_clone = template.create_clone('gw_check2')
+            clone_seconds = time.perf_counter() - started
+
+            for name in (clone_name, second_clone):
+                engine = create_engine(get_database_url(database=name), poolclass=NullPool)
+                try:
+                    with engine.connect() as connection:
+                        assert connection.execute(text('SELECT count(*) FROM movies')).scalar() == 50
+                        assert connection.execute(text('SELECT count(*) FROM users')).scalar() == 0
+                finally:
+                    engine.dispose()
+            assert clone_seconds < 10, f"Клонирование заняло {clone_seconds:.1f} с"
+        finally:
+            template.drop_clone('gw_check')
+            template.drop_clone('gw_check2')
+            template.drop_template()
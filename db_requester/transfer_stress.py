@@ -0,0 +1,252 @@
+"""
+Нагрузочная проверка переводов между счетами AccountTransactionTemplate.
+
+Запуск (нужны переменные окружения DB_MOVIES_*):
+    python -m db_requester.transfer_stress --transfers 5000 --workers 32 --accounts 50
+"""
+import argparse
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+from pydantic import BaseModel
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from db_requester.db_client import get_db_session
+from db_requester.models import AccountTransactionTemplate
+from utils.run_tag import run_tag
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ('naive', 'for_update', 'atomic')
+# deadlock, serialization failure, lock not available
+CONFLICT_PGCODES = {'40P01', '40001', '55P03'}
+
+
+class InsufficientFunds(Exception):
+    pass
+
+
+def is_conflict(error: Exception) -> bool:
+    """Ошибка конкурентного доступа, после которой перевод можно повторить"""
+    if not isinstance(error, DBAPIError):
+        return False
+    if getattr(error.orig, 'pgcode', None) in CONFLICT_PGCODES:
+        return True
+    return 'locked' in str(error.orig)  # SQLite: database/table is locked
+
+
+class TransferStressReport(BaseModel):
+    strategy: str
+    transfers: int
+    succeeded: int = 0
+    rejected: int = 0
+    failed: int = 0
+    conflicts: int = 0
+    retries: int = 0
+    elapsed_s: float = 0.0
+    balance_before: int = 0
+    balance_after: int = 0
+
+    @property
+    def throughput(self) -> float:
+        """Завершенных переводов (успешных и отклоненных) в секунду"""
+        return round((self.succeeded + self.rejected) / self.elapsed_s, 1) if self.elapsed_s else 0.0
+
+    @property
+    def conflict_rate(self) -> float:
+        return round(self.conflicts / self.transfers, 4) if self.transfers else 0.0
+
+    @property
+    def retry_rate(self) -> float:
+        return round(self.retries / self.transfers, 4) if self.transfers else 0.0
+
+    @property
+    def conserved(self) -> bool:
+        return self.balance_before == self.balance_after
+
+    def summary(self) -> str:
+        return (f"{self.strategy}: transfers={self.transfers}, succeeded={self.succeeded}, "
+                f"rejected={self.rejected}, failed={self.failed}, throughput={self.throughput}/s, "
+                f"conflict_rate={self.conflict_rate}, retry_rate={self.retry_rate}, "
+                f"balance {self.balance_before} -> {self.balance_after} (conserved={self.conserved})")
+
+
+def _transfer_naive(session: Session, from_user: str, to_user: str, amount: int):
+    """Чтение-изменение-запись без блокировок: параллельные переводы теряют обновления"""
+    accounts = {account.user: account for account in session.scalars(
+        select(AccountTransactionTemplate).where(AccountTransactionTemplate.user.in_([from_user, to_user]))
+    )}
+    if accounts[from_user].balance < amount:
+        raise InsufficientFunds(from_user)
+    accounts[from_user].balance -= amount
+    accounts[to_user].balance += amount
+    session.commit()
+
+
+def _transfer_for_update(session: Session, from_user: str, to_user: str, amount: int):
+    """SELECT ... FOR UPDATE в одном порядке ключей, чтобы встречные переводы не давали deadlock"""
+    accounts = {account.user: account for account in session.scalars(
+        select(AccountTransactionTemplate)
+        .where(AccountTransactionTemplate.user.in_([from_user, to_user]))
+        .order_by(AccountTransactionTemplate.user)
+        .with_for_update()
+    )}
+    if accounts[from_user].balance < amount:
+        raise InsufficientFunds(from_user)
+    accounts[from_user].balance -= amount
+    accounts[to_user].balance += amount
+    session.commit()
+
+
+def _transfer_atomic(session: Session, from_user: str, to_user: str, amount: int):
+    """
+    Атомарные UPDATE balance = balance -/+ x; списание только при достаточном балансе.
+    Счета обновляются в порядке ключей, чтобы встречные переводы не давали deadlock.
+    """
+    def debit():
+        return session.execute(
+            update(AccountTransactionTemplate)
+            .where(AccountTransactionTemplate.user == from_user, AccountTransactionTemplate.balance >= amount)
+            .values(balance=AccountTransactionTemplate.balance - amount),
+            execution_options={'synchronize_session': False}
+        ).rowcount
+
+    def credit():
+        return session.execute(
+            update(AccountTransactionTemplate)
+            .where(AccountTransactionTemplate.user == to_user)
+            .values(balance=AccountTransactionTemplate.balance + amount),
+            execution_options={'synchronize_session': False}
+        ).rowcount
+
+    steps = [debit, credit] if from_user < to_user else [credit, debit]
+    results = {step: step() for step in steps}
+    if not results[debit]:
+        raise InsufficientFunds(from_user)
+    session.commit()
+
+
+_TRANSFERS: Dict[str, Callable[[Session, str, str, int], None]] = {
+    'naive': _transfer_naive,
+    'for_update': _transfer_for_update,
+    'atomic': _transfer_atomic,
+}
+
+
+class TransferStressHarness:
+    """
+    Прогоняет тысячи параллельных переводов между счетами из пула потоков разными стратегиями
+    и проверяет, что сумма балансов не изменилась. Конфликты (deadlock, serialization failure)
+    повторяются до max_retries раз.
+    """
+
+    def __init__(self, accounts: int = 20, initial_balance: int = 1000, transfers: int = 2000,
+                 workers: int = 16, max_retries: int = 5, session_factory: Callable[[], Session] = get_db_session,
+                 seed: int = None):
+        self.accounts = accounts
+        self.initial_balance = initial_balance
+        self.transfers = transfers
+        self.workers = workers
+        self.max_retries = max_retries
+        self.session_factory = session_factory
+        self.random = random.Random(seed)
+        self.prefix = f'stress-{run_tag()}-'
+        self.users: List[str] = [f'{self.prefix}{index:04d}' for index in range(accounts)]
+
+    def setup(self):
+        """Создает (пересоздает) счета харнесса с начальным балансом"""
+        self.teardown()
+        with self.session_factory() as session:
+            session.execute(insert(AccountTransactionTemplate),
+                            [{'user': user, 'balance': self.initial_balance} for user in self.users])
+            session.commit()
+
+    def teardown(self):
+        with self.session_factory() as session:
+            session.execute(delete(AccountTransactionTemplate)
+                            .where(AccountTransactionTemplate.user.like(f'{self.prefix}%')),
+                            execution_options={'synchronize_session': False})
+            session.commit()
+
+    def total_balance(self) -> int:
+        with self.session_factory() as session:
+            return session.scalar(select(func.coalesce(func.sum(AccountTransactionTemplate.balance), 0))
+                                  .where(AccountTransactionTemplate.user.like(f'{self.prefix}%')))
+
+    def _plan(self) -> List[tuple]:
+        plan = []
+        for _ in range(self.transfers):
+            from_user, to_user = self.random.sample(self.users, 2)
+            plan.append((from_user, to_user, self.random.randint(1, 50)))
+        return plan
+
+    def run(self, strategy: str) -> TransferStressReport:
+        if strategy not in _TRANSFERS:
+            raise ValueError(f"Unknown transfer strategy '{strategy}', expected one of {STRATEGIES}")
+        transfer = _TRANSFERS[strategy]
+        self.setup()
+        try:
+            return self._run(strategy, transfer)
+        finally:
+            # Счета харнесса удаляются при любом исходе, даже если прогон прервался
+            self.teardown()
+
+    def _run(self, strategy: str, transfer: Callable[[Session, str, str, int], None]) -> TransferStressReport:
+        report = TransferStressReport(strategy=strategy, transfers=self.transfers,
+                                      balance_before=self.total_balance())
+        lock = threading.Lock()
+
+        def _execute(item):
+            from_user, to_user, amount = item
+            outcome, conflicts = 'failed', 0
+            with self.session_factory() as session:
+                for attempt in range(self.max_retries + 1):
+                    try:
+                        transfer(session, from_user, to_user, amount)
+                        outcome = 'succeeded'
+                        break
+                    except InsufficientFunds:
+                        session.rollback()
+                        outcome = 'rejected'
+                        break
+                    except DBAPIError as e:
+                        session.rollback()
+                        if not is_conflict(e):
+                            break
+                        conflicts += 1
+                    except Exception as e:
+                        # Неожиданная ошибка (StaleDataError, нет счета и т.п.) - перевод считается
+                        # неуспешным, остальные переводы продолжаются
+                        session.rollback()
+                        logger.warning(f"Transfer {from_user} -> {to_user} failed: {e!r}")
+                        break
+            with lock:
+                setattr(report, outcome, getattr(report, outcome) + 1)
+                report.conflicts += conflicts
+                report.retries += min(conflicts, self.max_retries)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f'transfer-{strategy}') as executor:
+            list(executor.map(_execute, self._plan()))
+        report.elapsed_s = round(time.perf_counter() - started, 3)
+        report.balance_after = self.total_balance()
+        return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Concurrent transfer stress test')
+    parser.add_argument('--transfers', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--accounts', type=int, default=20)
+    parser.add_argument('--strategy', choices=STRATEGIES, action='append')
+    args = parser.parse_args()
+
+    harness = TransferStressHarness(accounts=args.accounts, transfers=args.transfers, workers=args.workers)
+    for name in args.strategy or STRATEGIES:
+        print(harness.run(name).summary())
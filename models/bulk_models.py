@@ -0,0 +1,51 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional, Any, Dict
+
+
+class BulkItemResult(BaseModel):
+    """Результат одной операции в пакетном запросе"""
+    index: int
+    entity_id: Optional[Any] = None
+    ok: bool
+    status_code: Optional[int] = None
+    latency_ms: float
+    error: Optional[str] = None
+    data: Optional[Dict[str, Any]] = None
+
+
+class BulkOperationReport(BaseModel):
+    """Отчет о пакетной операции: успешные, упавшие и задержки"""
+    operation: str
+    total_time_ms: float = 0.0
+    results: List[BulkItemResult] = Field(default_factory=list)
+
+    @property
+    def succeeded(self) -> List[BulkItemResult]:
+        return [result for result in self.results if result.ok]
+
+    @property
+    def failed(self) -> List[BulkItemResult]:
+        return [result for result in self.results if not result.ok]
+
+    @property
+    def all_ok(self) -> bool:
+        return not self.failed
+
+    @property
+    def entity_ids(self) -> List[Any]:
+        """ID сущностей успешных операций в порядке входных данных"""
+        return [result.entity_id for result in self.succeeded if result.entity_id is not None]
+
+    def latency_percentile(self, percentile: float) -> float:
+        """Перцентиль задержки в миллисекундах (0 если операций не было)"""
+        latencies = sorted(result.latency_ms for result in self.results)
+        if not latencies:
+            return 0.0
+        position = min(len(latencies) - 1, int(round(percentile / 100 * (len(latencies) - 1))))
+        return latencies[position]
+
+    def summary(self) -> str:
+        """Короткая строка для логов и allure"""
+        return (f"{self.operation}: {len(self.succeeded)}/{len(self.results)} ok, "
+                f"failed={len(self.failed)}, total={self.total_time_ms:.0f}ms, "
+                f"p50={self.latency_percentile(50):.0f}ms, p95={self.latency_percentile(95):.0f}ms")
@@ -256,3 +256,16 @@ class UserCreateRequest(BaseModel):
         # Преобразуем Enum Roles в строки
         data['roles'] = [role.value for role in self.roles]
         return data
+
+
+class PooledUser(BaseModel):
+    """Пользователь из переиспользуемого пула: учетные данные и ID"""
+    id: str
+    email: str
+    password: str
+    fullName: str
+    roles: List[str]
+
+    @property
+    def creds(self):
+        return self.email, self.password
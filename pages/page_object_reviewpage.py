@@ -77,6 +77,13 @@ class ReviewPage(BasePage):
         if "/movies/" not in current_url:
             raise Exception(f"Не удалось перейти на страницу фильма. Текущий URL: {current_url}")
 
+    def get_current_movie_id(self) -> str:
+        """Возвращает ID фильма из URL страницы фильма"""
+        current_url = self.page.url
+        if "/movies/" not in current_url:
+            raise Exception(f"Не на странице фильма. Текущий URL: {current_url}")
+        return current_url.split("/movies/")[1].split("/")[0].split("?")[0]
+
     @allure.step("Создание отзыва")
     def create_review(self, review_text: str, rating: int = 5):
         """Создает отзыв с указанным текстом и оценкой"""
@@ -170,6 +170,25 @@ class TestAuthApi:
 
                 assert actual_roles == expected_roles
 
+    @allure.title("Авторизация пользователей, созданных напрямую в БД")
+    @allure.severity(allure.severity_level.NORMAL)
+    @pytest.mark.positive
+    @pytest.mark.login
+    @pytest.mark.integration
+    def test_login_db_seeded_users(self, api_manager: ApiManager, seeded_users):
+        """Пользователи, вставленные в БД с хешем из пула паролей, сразу логинятся."""
+        with allure.step("Создание трех пользователей одной транзакцией в БД"):
+            users = seeded_users(3)
+
+        for user in users:
+            with allure.step(f"Авторизация {user.email}"):
+                response = api_manager.auth_api.login_user(
+                    {"email": user.email, "password": user.password},
+                    expected_status=[200, 201]
+                )
+                login_response = LoginResponse(**response.json())
+                assert login_response.user.id == user.id
+
     @allure.title("Тест авторизации с неправильным паролем")
     @allure.severity(allure.severity_level.NORMAL)
     @allure.label("qa_name", "Ivan Petrovich")
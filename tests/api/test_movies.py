@@ -4,8 +4,12 @@ import time
 import allure
 from pytest_check import check
 from conftest import movie_data
+from constants.constants import BROKEN_API_FILTERS
 from constants.roles import Roles
 from utils.data_generator import DataGenerator
+from utils.catalog_reconciler import CatalogReconciler
+from utils.movie_catalog import PAGINATION_PARAMS, MovieCatalog, fetch_all_movies
+from utils.run_tag import run_tag
 
 
 class TestMovies:
@@ -132,10 +136,8 @@ class TestMoviesFiltering:
         ),
     ])
     def test_get_movies_with_filters(self, common_user, filter_params, expected_conditions):
-        BROKEN_FILTERS = {'location', 'published'}
-
         # Если тест использует неработающий фильтр - пропускаем
-        if any(key in filter_params for key in BROKEN_FILTERS):
+        if any(key in filter_params for key in BROKEN_API_FILTERS):
             # Но оставляем проверку genreId даже если есть неработающие фильтры
             if 'genreId' not in filter_params:
                 allure.dynamic.description(f"Тест пропущен: фильтр {filter_params} не работает на сервере (баг API)")
@@ -160,6 +162,20 @@ class TestMoviesFiltering:
                 expected_size = int(filter_params['pageSize'])
                 assert len(movies_data) <= expected_size or response_data.get('pageSize') == expected_size
 
+        with allure.step("Сверка полной выдачи по фильтрам со свежим снимком каталога"):
+            movies_api = common_user.api.movies_api
+            query = {key: value for key, value in filter_params.items() if key not in PAGINATION_PARAMS}
+            before = fetch_all_movies(movies_api)
+            filtered = fetch_all_movies(movies_api, params=query)
+            after = {movie['id']: movie for movie in fetch_all_movies(movies_api)}
+            # Фильмы, которые параллельные тесты создали, изменили или удалили между выгрузками,
+            # в снимок не входят и в ответе попадают в unknown
+            catalog = MovieCatalog(movie for movie in before if after.get(movie['id']) == movie)
+            catalog_diff = catalog.diff(filter_params, filtered, complete=True)
+            assert catalog_diff.ok, \
+                f"Filters {filter_params}: unexpected {sorted(catalog_diff.unexpected)}, " \
+                f"missing {sorted(catalog_diff.missing)}"
+
         if movies_data:  # Если фильмы найдены
             with allure.step("Проверка соответствия фильтрам"):
                 # Для комбинированных фильтров проверяем только работающие части
@@ -175,7 +191,7 @@ class TestMoviesFiltering:
                         f"Too many movies returned for pageSize={expected_size}"
 
                 # Если фильтр не содержит неработающих параметров, проверяем полностью
-                if not any(key in filter_params for key in BROKEN_FILTERS):
+                if not any(key in filter_params for key in BROKEN_API_FILTERS):
                     assert expected_conditions(movies_data), "Not all movies match filter conditions"
 
             with allure.step("Проверка обязательных полей"):
@@ -479,3 +495,140 @@ class TestMovieDelete:
                     super_admin.api.movies_api.delete_movie(movie_id)
                 except:
                     pass
+
+
+class TestMoviesBulk:
+
+    @allure.title("Пакетное создание и удаление фильмов")
+    @allure.description("Создание нескольких фильмов параллельно и проверка отчета о пакетной операции")
+    @allure.severity(allure.severity_level.NORMAL)
+    @pytest.mark.positive
+    @pytest.mark.bulk
+    @pytest.mark.integration
+    def test_create_and_delete_movies_bulk(self, super_admin):
+        movies = [DataGenerator.generate_movie_data() for _ in range(5)]
+
+        with allure.step("Пакетное создание 5 фильмов"):
+            create_report = super_admin.api.movies_api.create_movies(movies)
+            allure.attach(create_report.summary(), name="Отчет о создании",
+                          attachment_type=allure.attachment_type.TEXT)
+
+        try:
+            with allure.step("Проверка отчета о создании"):
+                assert create_report.all_ok, f"Не все фильмы созданы: {create_report.failed}"
+                assert len(create_report.entity_ids) == len(movies)
+                created_names = [result.data["name"] for result in create_report.results]
+                assert created_names == [movie["name"] for movie in movies]
+
+            with allure.step("Пакетное удаление созданных фильмов"):
+                delete_report = super_admin.api.movies_api.delete_movies(create_report.entity_ids)
+                assert delete_report.all_ok, f"Не все фильмы удалены: {delete_report.failed}"
+
+            with allure.step("Проверка что фильмы удалены"):
+                for movie_id in create_report.entity_ids:
+                    super_admin.api.movies_api.get_movie_by_id(movie_id, expected_status=404)
+        finally:
+            super_admin.api.movies_api.delete_movies(create_report.entity_ids, expected_status=[200, 404])
+
+    @allure.title("Отчет о частично неуспешном пакетном удалении")
+    @allure.severity(allure.severity_level.MINOR)
+    @pytest.mark.mock
+    @pytest.mark.unit
+    @pytest.mark.bulk
+    def test_delete_movies_reports_partial_failure(self, mocker):
+        from api.movies_api import MoviesAPI
+        from requests.models import Response
+
+        movies_api = MoviesAPI(requests.Session())
+
+        def fake_send_request(method, endpoint, **kwargs):
+            if endpoint.endswith("/2"):
+                raise ValueError("Unexpected status code: 404. Expected: [200].")
+            response = Response()
+            response.status_code = 200
+            response._content = b'{}'
+            return response
+
+        mocker.patch.object(movies_api, 'send_request', side_effect=fake_send_request)
+
+        with allure.step("Пакетное удаление трех фильмов, один из которых не существует"):
+            report = movies_api.delete_movies([1, 2, 3])
+
+        with allure.step("Проверка что отчет содержит упавшее удаление"):
+            assert [result.entity_id for result in report.succeeded] == [1, 3]
+            assert [result.entity_id for result in report.failed] == [2]
+            assert "404" in report.failed[0].error
+            assert not report.all_ok
+
+
+class TestMoviePool:
+
+    @allure.title("Аренда и возврат фильма из пула")
+    @allure.severity(allure.severity_level.MINOR)
+    @pytest.mark.mock
+    @pytest.mark.unit
+    def test_movie_pool_resets_and_drops_movies(self, mocker):
+        from api.movies_api import MoviesAPI
+        from models.bulk_models import BulkItemResult, BulkOperationReport
+        from utils.movie_pool import MoviePool
+
+        movies_api = MoviesAPI(requests.Session())
+        created = [dict(DataGenerator.generate_movie_data(), id=movie_id) for movie_id in (1, 2)]
+        mocker.patch.object(movies_api, 'create_movies', return_value=BulkOperationReport(
+            operation="create_movies",
+            results=[BulkItemResult(index=i, entity_id=movie["id"], ok=True, latency_ms=1, data=movie)
+                     for i, movie in enumerate(created)]
+        ))
+        update_movie = mocker.patch.object(movies_api, 'update_movie', side_effect=[
+            mocker.Mock(status_code=200), mocker.Mock(status_code=404), ValueError("Unexpected status code: 500")
+        ])
+        delete_movies = mocker.patch.object(movies_api, 'delete_movies')
+
+        pool = MoviePool(movies_api, size=2)
+        pool.fill()
+
+        with allure.step("Возврат измененного фильма откатывает его одним PATCH"):
+            with pool.leased() as movie:
+                assert movie["id"] == 1
+            update_movie.assert_called_once()
+            assert update_movie.call_args.args[1]["name"] == created[0]["name"]
+
+        with allure.step("Удаленный тестом фильм исключается из пула"):
+            with pool.leased() as movie:
+                assert movie["id"] == 2
+            assert pool.movie_ids == [1]
+
+        with allure.step("Другая ошибка отката не глотается, фильм больше не выдается"):
+            with pytest.raises(ValueError, match="500"):
+                with pool.leased() as movie:
+                    assert movie["id"] == 1
+            assert pool.movie_ids == [1]
+            assert pool._available.empty()
+
+        with allure.step("Закрытие пула удаляет фильмы пакетно"):
+            pool.close()
+            delete_movies.assert_called_once_with([1], expected_status=[200, 404])
+
+
+class TestCatalogReconciliation:
+
+    @allure.title("Сверка каталога /movies с таблицей movies по фильмам прогона")
+    @allure.description("Дайджесты диапазонов ID считаются в БД и по ответам API, построчно сравниваются только расходящиеся диапазоны. "
+                        "Сверяются только опубликованные фильмы с меткой воркера: остальные меняют параллельные тесты")
+    @allure.severity(allure.severity_level.NORMAL)
+    @pytest.mark.slow
+    @pytest.mark.integration
+    def test_api_catalog_matches_db(self, common_user, db_session, created_movies, cleanup_registry):
+        with allure.step("Создание фильмов прогона"):
+            created_movies(5)
+            # Удаления, отложенные предыдущими тестами воркера, не должны идти во время сверки
+            cleanup_registry.flush()
+
+        with allure.step("Сверка дайджестов API и БД"):
+            report = CatalogReconciler(db_session, common_user.api.movies_api,
+                                       tag=run_tag(), published_only=True).reconcile()
+            allure.attach(report.model_dump_json(indent=2), name="Отчет сверки",
+                          attachment_type=allure.attachment_type.JSON)
+
+        with allure.step("Проверка отсутствия расхождений"):
+            assert report.ok, f"Каталог API расходится с БД: {report.model_dump()}"
@@ -1,9 +1,13 @@
 import allure
 import pytest
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
+from db_requester import transfer_stress
+from db_requester.db_client import get_db_session, is_sqlite_backend
 from db_requester.models import AccountTransactionTemplate
+from db_requester.transfer_stress import TransferStressHarness
 from utils.data_generator import DataGenerator
 
 
@@ -75,4 +79,41 @@ class TestAccountTransactionTemplate:
             with allure.step("Удаляем данные для тестирования из базы"):
                 db_session.delete(stan)
                 db_session.delete(bob)
-                db_session.commit()
\ No newline at end of file
+                db_session.commit()
+
+    @allure.story("Сохранение суммы балансов при параллельных переводах")
+    @allure.description("""
+    Нагрузочная проверка: сотни параллельных переводов между 10 счетами из пула потоков.
+    Сумма балансов всех счетов после прогона должна совпасть с исходной.
+    """)
+    @allure.severity(allure.severity_level.CRITICAL)
+    @allure.title("Параллельные переводы: стратегия {strategy}")
+    @pytest.mark.slow
+    @pytest.mark.skipif(is_sqlite_backend(), reason="В SQLite нет строковых блокировок - проверка только для PostgreSQL")
+    @pytest.mark.parametrize("strategy", ["for_update", "atomic"])
+    def test_concurrent_transfers_conserve_balance(self, strategy):
+        harness = TransferStressHarness(accounts=10, transfers=500, workers=8)
+
+        with allure.step(f"Прогон 500 параллельных переводов стратегией {strategy}"):
+            report = harness.run(strategy)
+            allure.attach(report.summary(), name="Отчет нагрузки", attachment_type=allure.attachment_type.TEXT)
+
+        with allure.step("Проверяем, что сумма балансов сохранилась и все переводы завершились"):
+            assert report.conserved, report.summary()
+            assert report.failed == 0, report.summary()
+
+    @allure.title("Нагрузочный харнесс: неожиданные ошибки переводов не оставляют счетов")
+    def test_transfer_harness_cleans_up_after_unexpected_errors(self, monkeypatch):
+        def broken_transfer(session, from_user, to_user, amount):
+            raise KeyError(from_user)
+
+        monkeypatch.setitem(transfer_stress._TRANSFERS, 'atomic', broken_transfer)
+        harness = TransferStressHarness(accounts=4, transfers=20, workers=4)
+
+        report = harness.run('atomic')
+
+        assert report.failed == 20 and report.succeeded == 0
+        assert report.conserved
+        with get_db_session() as session:
+            assert session.scalar(select(func.count()).select_from(AccountTransactionTemplate)
+                                  .where(AccountTransactionTemplate.user.like(f'{harness.prefix}%'))) == 0
@@ -0,0 +1,36 @@
+import allure
+import pytest
+
+
+@allure.epic("Тестирование API")
+@allure.feature("Отзывы к фильмам")
+class TestReviews:
+
+    @allure.title("Создание, получение и удаление отзыва супер-администратором")
+    @allure.severity(allure.severity_level.NORMAL)
+    @pytest.mark.positive
+    @pytest.mark.integration
+    def test_review_lifecycle(self, super_admin, created_movie):
+        """Фильм из общего пула: отзыв удаляется в finally, чтобы следующий арендатор получил фильм без него"""
+        movie_id = created_movie["id"]
+        review_data = {"rating": 4, "text": "Тестовый отзыв через API"}
+
+        try:
+            with allure.step("Создание отзыва"):
+                response = super_admin.api.reviews_api.create_review(movie_id, review_data)
+                review = response.json()
+                assert review["text"] == review_data["text"]
+                assert review["rating"] == review_data["rating"]
+
+            with allure.step("Отзыв есть в списке отзывов фильма"):
+                reviews = super_admin.api.reviews_api.get_reviews(movie_id).json()
+                assert any(item["text"] == review_data["text"] for item in reviews)
+
+            with allure.step("Удаление отзыва"):
+                super_admin.api.reviews_api.delete_review(movie_id)
+
+            with allure.step("Отзыва нет в списке"):
+                reviews = super_admin.api.reviews_api.get_reviews(movie_id).json()
+                assert not any(item["text"] == review_data["text"] for item in reviews)
+        finally:
+            super_admin.api.reviews_api.delete_review(movie_id, expected_status=[200, 404])
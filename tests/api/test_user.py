@@ -93,3 +93,37 @@ class TestUser:
     def test_get_user_by_id_common_user(self, common_user):
         # Тест на попытку получения пользователя без прав
         common_user.api.user_api.get_user(common_user.email, expected_status=403)
+
+
+class TestUserPool:
+    def test_user_pool_reuses_verified_users(self, mocker, tmp_path):
+        from models.bulk_models import BulkItemResult, BulkOperationReport
+        from utils.user_pool import UserPool
+
+        def report(operation, results):
+            return BulkOperationReport(operation=operation, results=[
+                BulkItemResult(index=i, entity_id=entity_id, ok=ok, latency_ms=1, data=data)
+                for i, (entity_id, ok, data) in enumerate(results)
+            ])
+
+        user_api = mocker.Mock()
+        user_api.create_users.return_value = report("create_users", [("id-1", True, None), ("id-2", True, None)])
+        path = tmp_path / "users.json"
+
+        # Первый запуск: пул пуст, пользователи создаются пакетно
+        UserPool(user_api, path).ensure({Roles.USER: 2})
+        assert user_api.create_users.call_count == 1
+        assert len(user_api.create_users.call_args.args[0]) == 2
+
+        # Второй запуск: один пользователь удален на сервере, создается только замена
+        user_api.get_users.return_value = report("get_users", [
+            ("id-1", True, {"roles": ["USER"], "banned": False}),
+            ("id-2", False, None),
+        ])
+        user_api.create_users.return_value = report("create_users", [("id-3", True, None)])
+        pool = UserPool(user_api, path)
+        pool.ensure({Roles.USER: 2})
+
+        user_api.get_users.assert_called_once_with(["id-1", "id-2"])
+        assert len(user_api.create_users.call_args.args[0]) == 1
+        assert {pool.get(Roles.USER).id, pool.get(Roles.USER).id} == {"id-1", "id-3"}
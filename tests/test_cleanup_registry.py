@@ -0,0 +1,44 @@
+"""Тесты реестра отложенной очистки без обращения к API и БД"""
+import json
+
+import pytest
+
+from utils.cleanup_registry import CleanupRegistry
+
+
+class TestCleanupRegistry:
+
+    def test_batches_are_flushed_in_background_and_on_close(self, mocker, tmp_path):
+        mocker.patch('utils.cleanup_registry.Tools.files_dir', return_value=tmp_path / 'report.json')
+        deleted_batches = []
+        registry = CleanupRegistry(batch_size=2)
+        registry.register_handler('db_movie', delete_batch=lambda ids: deleted_batches.append(list(ids)))
+
+        for movie_id in (1, 2, 3):
+            registry.push('db_movie', movie_id)
+        registry.flush()
+        assert sorted(deleted_batches) == [[1, 2], [3]]
+
+        assert registry.close() == []
+        assert not (tmp_path / 'report.json').exists()
+
+    def test_failures_are_reported(self, mocker, tmp_path):
+        report_path = tmp_path / 'report.json'
+        mocker.patch('utils.cleanup_registry.Tools.files_dir', return_value=report_path)
+
+        def delete_one(user_id):
+            if user_id == 'broken':
+                raise ValueError('Unexpected status code: 500')
+
+        registry = CleanupRegistry()
+        registry.register_handler('api_user', delete_one=delete_one)
+        registry.push('api_user', 'ok')
+        registry.push('api_user', 'broken')
+
+        failures = registry.close()
+        assert [failure['entity_id'] for failure in failures] == ['broken']
+        assert json.loads(report_path.read_text(encoding='utf-8'))[0]['kind'] == 'api_user'
+
+    def test_push_without_handler(self):
+        with pytest.raises(ValueError):
+            CleanupRegistry().push('unknown', 1)
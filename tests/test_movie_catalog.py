@@ -0,0 +1,106 @@
+"""Тесты индекса каталога фильмов на локальных данных без обращения к API"""
+import pytest
+
+from utils.movie_catalog import MovieCatalog
+
+MOVIES = [
+    {'id': 1, 'price': 100, 'rating': 5.0, 'location': 'MSK', 'published': True, 'genreId': 1},
+    {'id': 2, 'price': 300, 'rating': 7.5, 'location': 'SPB', 'published': True, 'genreId': 1},
+    {'id': 3, 'price': 500, 'rating': 9.0, 'location': 'MSK', 'published': False, 'genreId': 2},
+    {'id': 4, 'price': 700, 'rating': 2.0, 'location': 'SPB', 'published': False, 'genreId': 3},
+]
+
+
+@pytest.fixture
+def catalog() -> MovieCatalog:
+    return MovieCatalog(MOVIES)
+
+
+class TestMovieCatalog:
+
+    def test_expected_ids_by_genre(self, catalog):
+        assert catalog.expected_ids({'genreId': 1}) == {1, 2}
+
+    def test_broken_filters_are_not_applied(self, catalog):
+        assert catalog.expected_ids({'location': 'MSK', 'genreId': 1}) == {1, 2}
+        assert catalog.expected_ids({'location': 'MSK', 'genreId': 1}, honour_broken_filters=False) == {1}
+
+    def test_price_range_and_pagination_params(self, catalog):
+        assert catalog.expected_ids({'minPrice': 300, 'maxPrice': 600, 'pageSize': 1}) == {2, 3}
+        assert catalog.ids_in_rating_range(5.0, 9.0) == {1, 2, 3}
+
+    def test_diff_reports_unexpected_and_unknown(self, catalog):
+        returned = [{'id': 1}, {'id': 3}, {'id': 99}]
+        diff = catalog.diff({'genreId': 1}, returned, complete=True)
+        assert diff.unexpected == {3}
+        assert diff.missing == {2}
+        assert diff.unknown == {99}
+        assert not diff.ok
+
+    def test_unsupported_filter(self, catalog):
+        with pytest.raises(ValueError):
+            catalog.expected_ids({'director': 'Nolan'})
+
+
+class FakeMoviesAPI:
+    """Имитация MoviesAPI: отдает каталог страницами, сортировка по createdAt"""
+
+    def __init__(self, movies):
+        self.movies = list(movies)
+        self.requested_pages = []
+
+    def get_all_movies(self, params=None, **kwargs):
+        from unittest.mock import Mock
+
+        params = params or {}
+        page, page_size = params.get('page', 1), params.get('pageSize', 10)
+        movies = sorted(self.movies, key=lambda movie: movie['createdAt'],
+                        reverse=params.get('createdAt') == 'desc')
+        self.requested_pages.append(page)
+        page_count = max(1, -(-len(movies) // page_size))
+        return Mock(json=Mock(return_value={
+            'movies': movies[(page - 1) * page_size:page * page_size],
+            'pageCount': page_count
+        }))
+
+
+def make_movie(movie_id: int) -> dict:
+    return dict(MOVIES[movie_id % len(MOVIES)], id=movie_id, createdAt=f'2025-01-01T10:{movie_id:02d}:00.000Z')
+
+
+class TestMovieCatalogMirror:
+
+    def test_incremental_sync_fetches_only_new_movies(self, tmp_path):
+        from utils.catalog_mirror import MovieCatalogMirror
+
+        path = tmp_path / 'mirror.json.gz'
+        api = FakeMoviesAPI(make_movie(movie_id) for movie_id in range(1, 41))
+        MovieCatalogMirror(path).sync(api)
+        assert len(MovieCatalogMirror(path).movies) == 40
+
+        api.movies.extend(make_movie(movie_id) for movie_id in range(41, 44))
+        api.requested_pages.clear()
+        mirror = MovieCatalogMirror(path)
+        assert not mirror.needs_full_sync()
+        mirror.sync(api)
+
+        assert api.requested_pages == [1]
+        assert len(mirror.movies) == 43
+        assert mirror.watermark == '2025-01-01T10:43:00.000Z'
+        assert 42 in mirror.catalog()
+
+    def test_incremental_sync_keeps_movies_created_at_watermark(self, tmp_path):
+        from utils.catalog_mirror import MovieCatalogMirror
+
+        path = tmp_path / 'mirror.json.gz'
+        api = FakeMoviesAPI(make_movie(movie_id) for movie_id in range(1, 11))
+        MovieCatalogMirror(path).sync(api)
+
+        # Создан в ту же минуту, что и последний синхронизированный фильм
+        api.movies.append(dict(make_movie(10), id=99))
+        mirror = MovieCatalogMirror(path)
+        mirror.sync(api)
+
+        assert 99 in mirror.catalog()
+        assert len(mirror.movies) == 11
+        assert mirror.incremental_sync(api) == 0  # повторная синхронизация не дублирует фильмы
@@ -0,0 +1,129 @@
+import gzip
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from constants.constants import MOVIES_MAX_PAGE_SIZE
+from tools import Tools
+from utils.movie_catalog import MovieCatalog, fetch_all_movies
+
+logger = logging.getLogger(__name__)
+
+MIRROR_FORMAT_VERSION = 1
+MIRROR_FIELDS = ['id', 'name', 'price', 'description', 'imageUrl', 'location',
+                 'published', 'rating', 'genreId', 'createdAt']
+
+
+def _parse_created_at(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+class MovieCatalogMirror:
+    """
+    Локальное зеркало каталога /movies на диске (gzip JSON в колоночном виде: поля + строки).
+    Синхронизируется инкрементально: запрашиваются только фильмы новее водяного знака createdAt.
+    Раз в full_sync_interval_hours выполняется полная сверка, которая подхватывает удаления и правки.
+    """
+
+    def __init__(self, path: Optional[Path] = None, full_sync_interval_hours: float = 24):
+        self.path = Path(path) if path else Tools.files_dir('catalog', 'movies_mirror.json.gz')
+        self.full_sync_interval_hours = full_sync_interval_hours
+        self.movies: Dict[Any, Dict[str, Any]] = {}
+        self.watermark: Optional[str] = None
+        self.last_full_sync: float = 0.0
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+                payload = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Catalog mirror {self.path} is unreadable, full sync required: {e}")
+            return
+        if payload.get('version') != MIRROR_FORMAT_VERSION:
+            return
+        fields = payload['fields']
+        self.movies = {row[0]: dict(zip(fields, row)) for row in payload['rows']}
+        self.watermark = payload.get('watermark')
+        self.last_full_sync = payload.get('last_full_sync', 0.0)
+
+    def _save(self):
+        payload = {
+            'version': MIRROR_FORMAT_VERSION,
+            'watermark': self.watermark,
+            'last_full_sync': self.last_full_sync,
+            'fields': MIRROR_FIELDS,
+            'rows': [[movie.get(field) for field in MIRROR_FIELDS] for movie in self.movies.values()]
+        }
+        # Пишем во временный файл и атомарно подменяем - параллельные воркеры не увидят половину файла
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f'{self.path.name}.{os.getpid()}.tmp')
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+
+    def _update_watermark(self):
+        created = [movie['createdAt'] for movie in self.movies.values() if movie.get('createdAt')]
+        self.watermark = max(created, key=_parse_created_at) if created else None
+
+    def needs_full_sync(self) -> bool:
+        age_hours = (time.time() - self.last_full_sync) / 3600
+        return self.watermark is None or age_hours >= self.full_sync_interval_hours
+
+    def full_sync(self, movies_api) -> int:
+        """Полная перезагрузка зеркала. Возвращает количество фильмов."""
+        self.movies = {movie['id']: movie for movie in fetch_all_movies(movies_api)}
+        self.last_full_sync = time.time()
+        self._update_watermark()
+        self._save()
+        logger.info(f"Catalog mirror full sync: {len(self.movies)} movies")
+        return len(self.movies)
+
+    def incremental_sync(self, movies_api, page_size: int = MOVIES_MAX_PAGE_SIZE) -> int:
+        """
+        Догружает фильмы не старше водяного знака, листая выдачу по убыванию createdAt
+        до первой страницы с фильмом старше него. Фильмы с тем же createdAt, что у водяного знака,
+        тоже проверяются (их могли создать в ту же миллисекунду), известные отбрасываются по id.
+        Возвращает количество новых фильмов.
+        """
+        watermark = _parse_created_at(self.watermark)
+        new_movies = {}
+        page = 1
+        while True:
+            response_data = movies_api.get_all_movies(
+                params={'page': page, 'pageSize': page_size, 'createdAt': 'desc'},
+                need_logging=False
+            ).json()
+            movies = response_data.get('movies', [])
+            created = [_parse_created_at(movie['createdAt']) for movie in movies]
+            for movie, created_at in zip(movies, created):
+                if created_at >= watermark and movie['id'] not in self.movies:
+                    new_movies[movie['id']] = movie
+            if any(created_at < watermark for created_at in created) \
+                    or page >= int(response_data.get('pageCount') or 1):
+                break
+            page += 1
+
+        self.movies.update(new_movies)
+        if new_movies:
+            self._update_watermark()
+            self._save()
+        logger.info(f"Catalog mirror incremental sync: {len(new_movies)} new movies")
+        return len(new_movies)
+
+    def sync(self, movies_api) -> List[Dict[str, Any]]:
+        """Синхронизирует зеркало (полностью или по дельте) и возвращает список фильмов"""
+        if self.needs_full_sync():
+            self.full_sync(movies_api)
+        else:
+            self.incremental_sync(movies_api)
+        return list(self.movies.values())
+
+    def catalog(self) -> MovieCatalog:
+        return MovieCatalog(self.movies.values())
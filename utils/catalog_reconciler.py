@@ -0,0 +1,233 @@
+import hashlib
+import logging
+from collections import defaultdict
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, Dict, Iterable, List, Optional
+
+from pydantic import BaseModel, Field
+from sqlalchemy import BigInteger, Numeric, String, cast, func, literal, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.orm import Session
+
+from constants.constants import BULK_MAX_WORKERS, MOVIES_MAX_PAGE_SIZE
+from db_models.movies import MovieDBModel
+from db_requester.db_helpers import MovieDBHelper
+from utils.movie_catalog import fetch_all_movies
+from utils.run_tag import has_tag
+
+logger = logging.getLogger(__name__)
+
+# Поля, которые сверяются: имя колонки в БД -> имя поля в ответе API.
+# createdAt не сверяется - API и БД отдают время в разных форматах и часовых поясах.
+RECONCILED_FIELDS = {
+    'id': 'id',
+    'name': 'name',
+    'price': 'price',
+    'description': 'description',
+    'image_url': 'imageUrl',
+    'location': 'location',
+    'published': 'published',
+    'rating': 'rating',
+    'genre_id': 'genreId',
+}
+FIELD_SEPARATOR = '\x1f'
+
+
+def canonical_rating(value) -> str:
+    """
+    Рейтинг с двумя знаками после запятой по тем же правилам, что у PostgreSQL
+    round(rating::numeric, 2): float8 приводится к numeric по 15 значащим цифрам,
+    половина округляется от нуля. f"{value:.2f}" округляет двоичное значение float
+    и на половинках (2.675) расходится с SQL.
+    """
+    return str(Decimal(f'{float(value):.15g}').quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
+
+
+def canonical_row(row: Dict[str, Any]) -> str:
+    """
+    Каноническое представление фильма (ключи - имена колонок БД).
+    Формат совпадает с SQL-выражением _sql_canonical_row, поэтому дайджесты сравнимы.
+    """
+    def text(value) -> str:
+        return '' if value is None else str(value)
+
+    values = [
+        text(row['id']),
+        text(row['name']),
+        '' if row['price'] is None else str(int(row['price'])),
+        text(row['description']),
+        text(row['image_url']),
+        text(row['location']),
+        '' if row['published'] is None else ('true' if row['published'] else 'false'),
+        '' if row['rating'] is None else canonical_rating(row['rating']),
+        '' if row['genre_id'] is None else str(int(row['genre_id'])),
+    ]
+    return FIELD_SEPARATOR.join(values)
+
+
+def _sql_canonical_row():
+    def text(column):
+        return func.coalesce(cast(column, String), '')
+
+    return func.concat_ws(
+        FIELD_SEPARATOR,
+        text(MovieDBModel.id),
+        text(MovieDBModel.name),
+        text(MovieDBModel.price),
+        text(MovieDBModel.description),
+        text(MovieDBModel.image_url),
+        text(MovieDBModel.location),
+        text(MovieDBModel.published),
+        func.coalesce(cast(func.round(cast(MovieDBModel.rating, Numeric), 2), String), ''),
+        text(MovieDBModel.genre_id),
+    )
+
+
+def api_movie_to_row(movie: Dict[str, Any]) -> Dict[str, Any]:
+    """Фильм из ответа API в виде строки таблицы movies"""
+    return {column: movie.get(field) for column, field in RECONCILED_FIELDS.items()}
+
+
+class ChunkDigest(BaseModel):
+    chunk: int
+    count: int
+    digest: str
+
+
+class ReconciliationReport(BaseModel):
+    """Итог сверки каталога API с таблицей movies"""
+    chunk_size: int
+    chunks_total: int
+    mismatched_chunks: List[int] = Field(default_factory=list)
+    missing_in_api: List[str] = Field(default_factory=list)
+    missing_in_db: List[str] = Field(default_factory=list)
+    different: Dict[str, List[str]] = Field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return not self.mismatched_chunks
+
+
+def digest_rows(rows: Iterable[Dict[str, Any]], chunk_size: int) -> Dict[int, ChunkDigest]:
+    """Дайджесты по диапазонам ID: md5 от склейки md5 строк в порядке числового ID"""
+    chunks = defaultdict(list)
+    for row in rows:
+        movie_id = int(row['id'])
+        chunks[movie_id // chunk_size].append((movie_id, canonical_row(row)))
+    digests = {}
+    for chunk, items in chunks.items():
+        items.sort()
+        joined = ''.join(hashlib.md5(text.encode('utf-8')).hexdigest() for _, text in items)
+        digests[chunk] = ChunkDigest(chunk=chunk, count=len(items),
+                                     digest=hashlib.md5(joined.encode('utf-8')).hexdigest())
+    return digests
+
+
+class CatalogReconciler:
+    """
+    Полная сверка каталога /movies с таблицей movies.
+    Обе стороны делятся на диапазоны ID по chunk_size и сворачиваются в дайджесты:
+    в PostgreSQL - одним GROUP BY запросом, на API - по страницам, загруженным параллельно.
+    Построчно сравниваются только диапазоны с разными дайджестами.
+    ID фильмов считаются числовыми (как их отдает API).
+
+    На общем стенде другие тесты параллельно создают и удаляют фильмы, поэтому сверку стоит
+    ограничивать: tag - только фильмы с меткой прогона (run_tag()) в названии,
+    published_only - только опубликованные (если /movies скрывает неопубликованные).
+    Одинаковый фильтр применяется к обеим сторонам.
+    """
+
+    def __init__(self, db_session: Session, movies_api, chunk_size: int = 1000,
+                 page_size: int = MOVIES_MAX_PAGE_SIZE, max_workers: int = BULK_MAX_WORKERS,
+                 tag: Optional[str] = None, published_only: bool = False):
+        self.db_session = db_session
+        self.movies_api = movies_api
+        self.chunk_size = chunk_size
+        self.page_size = page_size
+        self.max_workers = max_workers
+        self.tag = tag
+        self.published_only = published_only
+
+    def _chunk_expr(self):
+        return cast(MovieDBModel.id, BigInteger) // literal(self.chunk_size, BigInteger)
+
+    def _scoped(self, stmt):
+        if self.tag:
+            stmt = stmt.where(MovieDBModel.name.like(f'%[{self.tag}]'))
+        if self.published_only:
+            stmt = stmt.where(MovieDBModel.published == True)
+        return stmt
+
+    def in_scope(self, row: Dict[str, Any]) -> bool:
+        """Строка (с ключами колонок БД) попадает в сверку"""
+        if self.tag and not has_tag(row['name'], self.tag):
+            return False
+        return not self.published_only or row['published'] is True
+
+    def db_digests(self) -> Dict[int, ChunkDigest]:
+        if self.db_session.get_bind().dialect.name != 'postgresql':
+            return digest_rows(self._db_rows_python(), self.chunk_size)
+        chunk = self._chunk_expr().label('chunk')
+        row_hash = func.md5(_sql_canonical_row())
+        stmt = self._scoped(select(
+            chunk,
+            func.count().label('count'),
+            func.md5(func.string_agg(row_hash, aggregate_order_by(literal(''), cast(MovieDBModel.id, BigInteger))))
+            .label('digest'),
+        )).group_by(chunk)
+        return {row.chunk: ChunkDigest(chunk=row.chunk, count=row.count, digest=row.digest)
+                for row in self.db_session.execute(stmt)}
+
+    def _db_rows_python(self, chunk: Optional[int] = None) -> Iterable[Dict[str, Any]]:
+        helper = MovieDBHelper(self.db_session)
+        for row in helper.iter_movies(columns=list(RECONCILED_FIELDS), published_only=self.published_only):
+            row = row._asdict()
+            if self.in_scope(row) and (chunk is None or int(row['id']) // self.chunk_size == chunk):
+                yield row
+
+    def db_chunk_rows(self, chunk: int) -> Dict[str, Dict[str, Any]]:
+        """Строки таблицы из одного диапазона ID"""
+        if self.db_session.get_bind().dialect.name != 'postgresql':
+            rows = self._db_rows_python(chunk)
+        else:
+            stmt = self._scoped(select(*[getattr(MovieDBModel, column) for column in RECONCILED_FIELDS])) \
+                .where(self._chunk_expr() == chunk)
+            rows = (row._asdict() for row in self.db_session.execute(stmt))
+        return {str(row['id']): row for row in rows}
+
+    def reconcile(self, api_movies: Optional[List[Dict[str, Any]]] = None) -> ReconciliationReport:
+        if api_movies is None:
+            api_movies = fetch_all_movies(self.movies_api, self.page_size, self.max_workers)
+        api_rows = [row for row in map(api_movie_to_row, api_movies) if self.in_scope(row)]
+        api_digests = digest_rows(api_rows, self.chunk_size)
+        db_digests = self.db_digests()
+
+        chunks = sorted(set(api_digests) | set(db_digests))
+        report = ReconciliationReport(chunk_size=self.chunk_size, chunks_total=len(chunks))
+        report.mismatched_chunks = [
+            chunk for chunk in chunks
+            if getattr(api_digests.get(chunk), 'digest', None) != getattr(db_digests.get(chunk), 'digest', None)
+        ]
+        if not report.mismatched_chunks:
+            return report
+
+        api_by_chunk = defaultdict(dict)
+        for row in api_rows:
+            api_by_chunk[int(row['id']) // self.chunk_size][str(row['id'])] = row
+        for chunk in report.mismatched_chunks:
+            self._drill_down(chunk, api_by_chunk[chunk], self.db_chunk_rows(chunk), report)
+        logger.info(f"Catalog reconciliation: {len(report.mismatched_chunks)} of {len(chunks)} chunks differ")
+        return report
+
+    @staticmethod
+    def _drill_down(chunk: int, api_rows: Dict[str, Dict[str, Any]], db_rows: Dict[str, Dict[str, Any]],
+                    report: ReconciliationReport):
+        report.missing_in_api.extend(sorted(set(db_rows) - set(api_rows)))
+        report.missing_in_db.extend(sorted(set(api_rows) - set(db_rows)))
+        for movie_id in sorted(set(api_rows) & set(db_rows)):
+            api_fields = canonical_row(api_rows[movie_id]).split(FIELD_SEPARATOR)
+            db_fields = canonical_row(db_rows[movie_id]).split(FIELD_SEPARATOR)
+            fields = [column for column, api_value, db_value in zip(RECONCILED_FIELDS, api_fields, db_fields)
+                      if api_value != db_value]
+            if fields:
+                report.different[movie_id] = fields
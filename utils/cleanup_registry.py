@@ -0,0 +1,112 @@
+import json
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+from constants.constants import BULK_MAX_WORKERS
+from tools import Tools
+
+logger = logging.getLogger(__name__)
+
+
+class CleanupRegistry:
+    """
+    Отложенная очистка тестовых сущностей.
+    Фикстуры кладут сюда ссылки на сущности вместо синхронного удаления в teardown.
+    Когда по виду сущности набирается batch_size ссылок, пачка удаляется в фоне;
+    остаток удаляется параллельно при закрытии реестра в конце сессии.
+    Все, что не удалось удалить, записывается в отчет files/cleanup.
+    """
+
+    def __init__(self, max_workers: int = BULK_MAX_WORKERS, batch_size: int = 50):
+        self.batch_size = batch_size
+        self._handlers: Dict[str, Dict[str, Optional[Callable]]] = {}
+        self._pending: Dict[str, List[Any]] = {}
+        self._futures: List[Future] = []
+        self._failures: List[Dict[str, Any]] = []
+        self._deleted = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='cleanup')
+
+    def register_handler(self, kind: str, delete_one: Optional[Callable[[Any], Any]] = None,
+                         delete_batch: Optional[Callable[[List[Any]], Any]] = None):
+        """
+        Регистрирует способ удаления сущностей вида kind (повторная регистрация игнорируется).
+        :param delete_one: Удаление одной сущности по ID (вызовы идут параллельно).
+        :param delete_batch: Удаление пачки сущностей одним вызовом (например одним DELETE в БД).
+        """
+        if not delete_one and not delete_batch:
+            raise ValueError(f'Cleanup handler for "{kind}" needs delete_one or delete_batch')
+        with self._lock:
+            self._handlers.setdefault(kind, {'delete_one': delete_one, 'delete_batch': delete_batch})
+            self._pending.setdefault(kind, [])
+
+    def push(self, kind: str, entity_id: Any):
+        """Ставит сущность в очередь на удаление"""
+        with self._lock:
+            if kind not in self._handlers:
+                raise ValueError(f'No cleanup handler registered for "{kind}"')
+            self._pending[kind].append(entity_id)
+            if len(self._pending[kind]) >= self.batch_size:
+                self._submit(kind)
+
+    def _submit(self, kind: str):
+        """Отправляет накопленную пачку в пул потоков. Вызывается под self._lock."""
+        batch, self._pending[kind] = self._pending[kind], []
+        if not batch:
+            return
+        handler = self._handlers[kind]
+        if handler['delete_batch']:
+            self._futures.append(self._executor.submit(self._run_batch, kind, handler['delete_batch'], batch))
+        else:
+            for entity_id in batch:
+                self._futures.append(self._executor.submit(self._run_one, kind, handler['delete_one'], entity_id))
+
+    def _run_batch(self, kind, delete_batch, batch):
+        try:
+            delete_batch(batch)
+            self._record_success(len(batch))
+        except Exception as e:
+            self._record_failures(kind, batch, e)
+
+    def _run_one(self, kind, delete_one, entity_id):
+        try:
+            delete_one(entity_id)
+            self._record_success(1)
+        except Exception as e:
+            self._record_failures(kind, [entity_id], e)
+
+    def _record_success(self, count: int):
+        with self._lock:
+            self._deleted += count
+
+    def _record_failures(self, kind, entity_ids, error):
+        with self._lock:
+            self._failures.extend(
+                {'kind': kind, 'entity_id': entity_id, 'error': str(error)} for entity_id in entity_ids
+            )
+
+    def flush(self) -> List[Dict[str, Any]]:
+        """Удаляет все накопленные сущности и ждет завершения. Возвращает список неудач."""
+        with self._lock:
+            for kind in self._pending:
+                self._submit(kind)
+            futures, self._futures = self._futures, []
+        wait(futures)
+        with self._lock:
+            return list(self._failures)
+
+    def close(self) -> List[Dict[str, Any]]:
+        """Финальная очистка в конце сессии с записью отчета о неудачах"""
+        failures = self.flush()
+        self._executor.shutdown(wait=True)
+        logger.info(f"Cleanup registry: deleted={self._deleted}, failed={len(failures)}")
+        if failures:
+            worker = os.getenv('PYTEST_XDIST_WORKER', 'master')
+            report_path = Tools.files_dir('cleanup', f'cleanup_report_{Tools.get_timestamp()}_{worker}.json')
+            report_path.write_text(json.dumps(failures, ensure_ascii=False, indent=2, default=str),
+                                   encoding='utf-8')
+            logger.warning(f"Cleanup registry: failed deletions written to {report_path}")
+        return failures
@@ -5,14 +5,18 @@ from string import digits
 from typing import Optional
 
 from faker import Faker
+
+from utils.run_tag import pool_email, tag_email, tag_name
+
 faker = Faker()
 
 class DataGenerator:
 
     @staticmethod
-    def generate_random_email():
+    def generate_random_email(pooled: bool = False):
+        """Email с меткой прогона; pooled=True - email постоянного пользователя пула"""
         random_string = ''.join(random.choices(string.ascii_lowercase + string.digits, k=8))
-        return f'kek{random_string}@gmail.com'
+        return pool_email(f'kek{random_string}') if pooled else tag_email(f'kek{random_string}')
 
     @staticmethod
     def generate_random_name():
@@ -53,7 +57,7 @@ class DataGenerator:
         """Генерация данных для создания фильма"""
         valid_genre_ids = [1, 2, 3, 4, 5, 6, 7, 8]
         return {
-            "name": f"Фильм {DataGenerator.generate_random_string(6)}",
+            "name": tag_name(f"Фильм {DataGenerator.generate_random_string(6)}"),
             "imageUrl": f"https://example.com/movie{random.randint(1, 1000)}.jpg",
             "price": random.randint(100, 1000),
             "description": f"Описание фильма {faker.text(max_nb_chars=50)}",
@@ -68,7 +72,7 @@ class DataGenerator:
         valid_genre_ids = [1, 2, 3, 4, 5, 6, 7, 8]
 
         return {
-            "name": f"Обновленный фильм {DataGenerator.generate_random_string(6)}",
+            "name": tag_name(f"Обновленный фильм {DataGenerator.generate_random_string(6)}"),
             "price": random.randint(100, 1000),
             "description": f"Обновленное описание {faker.text(max_nb_chars=30)}",
             "location": random.choice(['SPB', 'MSK']),
@@ -0,0 +1,176 @@
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from pydantic import BaseModel, Field
+
+from constants.constants import BROKEN_API_FILTERS, BULK_MAX_WORKERS, MOVIES_MAX_PAGE_SIZE
+
+# Параметры пагинации и сортировки не сужают множество фильмов
+PAGINATION_PARAMS = {'page', 'pageSize', 'createdAt'}
+
+
+def fetch_all_movies(movies_api, page_size: int = MOVIES_MAX_PAGE_SIZE,
+                     max_workers: int = BULK_MAX_WORKERS,
+                     params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Выгружает весь каталог /movies: первая страница определяет pageCount,
+    остальные страницы запрашиваются параллельно.
+    :param movies_api: Экземпляр MoviesAPI.
+    :param params: Дополнительные query-параметры (например сортировка).
+    :return: Список фильмов в порядке страниц.
+    """
+    base_params = dict(params or {}, pageSize=page_size)
+
+    def _get_page(page: int) -> Dict[str, Any]:
+        return movies_api.get_all_movies(
+            params=dict(base_params, page=page),
+            need_logging=False
+        ).json()
+
+    first_page = _get_page(1)
+    movies = list(first_page.get('movies', []))
+    page_count = int(first_page.get('pageCount') or 1)
+    if page_count > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for page_data in executor.map(_get_page, range(2, page_count + 1)):
+                movies.extend(page_data.get('movies', []))
+
+    # Между запросами страниц каталог мог сдвинуться - убираем дубли
+    unique = {}
+    for movie in movies:
+        unique.setdefault(movie['id'], movie)
+    return list(unique.values())
+
+
+class CatalogDiff(BaseModel):
+    """Расхождение ответа API с ожиданием по локальному каталогу"""
+    expected: Set[Any] = Field(default_factory=set)
+    returned: Set[Any] = Field(default_factory=set)
+    unexpected: Set[Any] = Field(default_factory=set)
+    missing: Set[Any] = Field(default_factory=set)
+    unknown: Set[Any] = Field(default_factory=set)
+
+    @property
+    def ok(self) -> bool:
+        return not self.unexpected and not self.missing
+
+
+class _SortedIndex:
+    """Отсортированный индекс (значение, id) для выборки по диапазону через bisect"""
+
+    def __init__(self, pairs: Iterable[tuple]):
+        pairs = sorted(pairs, key=lambda pair: pair[0])
+        self.keys = [key for key, _ in pairs]
+        self.ids = [movie_id for _, movie_id in pairs]
+
+    def range(self, low: Optional[float] = None, high: Optional[float] = None) -> Set[Any]:
+        start = 0 if low is None else bisect_left(self.keys, low)
+        end = len(self.keys) if high is None else bisect_right(self.keys, high)
+        return set(self.ids[start:end])
+
+
+class MovieCatalog:
+    """
+    Снимок каталога фильмов с хеш-индексами по genreId, location, published
+    и отсортированными индексами по price и rating.
+    Позволяет получить точное ожидаемое множество ID для любой комбинации фильтров /movies.
+    """
+
+    def __init__(self, movies: Iterable[Dict[str, Any]]):
+        self.movies: Dict[Any, Dict[str, Any]] = {movie['id']: movie for movie in movies}
+        self._by_genre: Dict[int, Set[Any]] = defaultdict(set)
+        self._by_location: Dict[str, Set[Any]] = defaultdict(set)
+        self._by_published: Dict[bool, Set[Any]] = defaultdict(set)
+
+        for movie_id, movie in self.movies.items():
+            self._by_genre[movie.get('genreId')].add(movie_id)
+            self._by_location[movie.get('location')].add(movie_id)
+            self._by_published[bool(movie.get('published'))].add(movie_id)
+
+        self._by_price = _SortedIndex(
+            (movie['price'], movie_id) for movie_id, movie in self.movies.items()
+            if movie.get('price') is not None
+        )
+        self._by_rating = _SortedIndex(
+            (movie['rating'], movie_id) for movie_id, movie in self.movies.items()
+            if movie.get('rating') is not None
+        )
+
+    @classmethod
+    def fetch(cls, movies_api, **kwargs) -> 'MovieCatalog':
+        """Строит каталог по полной выгрузке /movies"""
+        return cls(fetch_all_movies(movies_api, **kwargs))
+
+    def __len__(self):
+        return len(self.movies)
+
+    def __contains__(self, movie_id):
+        return movie_id in self.movies
+
+    @staticmethod
+    def _to_bool(value) -> bool:
+        if isinstance(value, str):
+            return value.lower() == 'true'
+        return bool(value)
+
+    def ids_in_price_range(self, min_price=None, max_price=None) -> Set[Any]:
+        return self._by_price.range(min_price, max_price)
+
+    def ids_in_rating_range(self, min_rating=None, max_rating=None) -> Set[Any]:
+        return self._by_rating.range(min_rating, max_rating)
+
+    def expected_ids(self, filter_params: Dict[str, Any], honour_broken_filters: bool = True) -> Set[Any]:
+        """
+        Точное множество ID фильмов, которые должны попасть в выдачу при заданных фильтрах
+        (без учета пагинации).
+        :param honour_broken_filters: Не применять фильтры из BROKEN_API_FILTERS,
+                                      так как сервер их игнорирует.
+        """
+        candidates = []
+        for key, value in filter_params.items():
+            if key in PAGINATION_PARAMS:
+                continue
+            if honour_broken_filters and key in BROKEN_API_FILTERS:
+                continue
+            if key == 'genreId':
+                candidates.append(self._by_genre.get(int(value), set()))
+            elif key in ('location', 'locations'):
+                locations = value if isinstance(value, (list, tuple, set)) else [value]
+                candidates.append(set().union(*(self._by_location.get(loc, set()) for loc in locations)))
+            elif key == 'published':
+                candidates.append(self._by_published.get(self._to_bool(value), set()))
+            elif key == 'minPrice':
+                candidates.append(self.ids_in_price_range(min_price=float(value)))
+            elif key == 'maxPrice':
+                candidates.append(self.ids_in_price_range(max_price=float(value)))
+            else:
+                raise ValueError(f'Unsupported movie filter: {key}')
+
+        if not candidates:
+            return set(self.movies)
+        # Пересекаем начиная с самого маленького множества
+        candidates.sort(key=len)
+        result = set(candidates[0])
+        for candidate in candidates[1:]:
+            result &= candidate
+        return result
+
+    def diff(self, filter_params: Dict[str, Any], returned_movies: Iterable[Dict[str, Any]],
+             complete: bool = False, honour_broken_filters: bool = True) -> CatalogDiff:
+        """
+        Сравнивает ответ API с ожидаемым множеством за линейное время.
+        ID, которых нет в снимке (созданы после него), не считаются ошибкой и попадают в unknown.
+        :param complete: Ответ содержит всю выдачу (без обрезки пагинацией) - проверять и пропуски.
+        """
+        expected = self.expected_ids(filter_params, honour_broken_filters)
+        returned = {movie['id'] for movie in returned_movies}
+        unknown = {movie_id for movie_id in returned if movie_id not in self.movies}
+        return CatalogDiff(
+            expected=expected,
+            returned=returned,
+            unexpected=returned - expected - unknown,
+            missing=expected - returned if complete else set(),
+            unknown=unknown
+        )
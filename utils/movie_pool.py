@@ -0,0 +1,100 @@
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from models.bulk_models import BulkOperationReport
+from utils.data_generator import DataGenerator
+
+logger = logging.getLogger(__name__)
+
+# Поля фильма, которые можно вернуть в исходное состояние одним PATCH /movies/{id}
+RESETTABLE_FIELDS = ['name', 'imageUrl', 'price', 'description', 'location', 'published', 'genreId']
+
+
+class MoviePool:
+    """
+    Пул заранее созданных фильмов на сессию.
+    Тест арендует фильм, а при возврате фильм откатывается к исходным данным одним PATCH
+    вместо удаления и повторного создания. В конце сессии все фильмы удаляются пакетно.
+    Фильмы общие для тестов сессии: lease() отдает данные фильма на момент создания пула,
+    а не свежий ответ API, и связанные с фильмом сущности (например отзывы) тест убирает сам.
+    """
+
+    def __init__(self, movies_api, size: int = 10):
+        self.movies_api = movies_api
+        self.size = size
+        self._originals: Dict[Any, Dict[str, Any]] = {}
+        self._available: 'queue.Queue[Any]' = queue.Queue()
+        self._lock = threading.Lock()
+
+    def _add_movies(self, count: int) -> BulkOperationReport:
+        report = self.movies_api.create_movies(
+            [DataGenerator.generate_movie_data() for _ in range(count)]
+        )
+        with self._lock:
+            for result in report.succeeded:
+                self._originals[result.entity_id] = result.data
+                self._available.put(result.entity_id)
+        if report.failed:
+            logger.warning(f"Movie pool: {len(report.failed)} movies were not created")
+        return report
+
+    def fill(self) -> BulkOperationReport:
+        """Параллельно создает size фильмов"""
+        return self._add_movies(self.size)
+
+    def lease(self) -> Dict[str, Any]:
+        """Выдает фильм из пула. Если свободных нет - пул дорастает на один фильм."""
+        try:
+            movie_id = self._available.get_nowait()
+        except queue.Empty:
+            report = self._add_movies(1)
+            if not report.succeeded:
+                raise RuntimeError(f"Movie pool is empty and refill failed: {report.failed[0].error}")
+            movie_id = self._available.get_nowait()
+        return dict(self._originals[movie_id])
+
+    def release(self, movie_id):
+        """
+        Возвращает фильм в пул, откатывая его к исходным данным одним PATCH.
+        Если тест удалил фильм (404), он исключается из пула. Любая другая ошибка PATCH
+        пробрасывается: фильм в неизвестном состоянии не выдается снова, но удаляется в close().
+        """
+        original = self._originals[movie_id]
+        response = self.movies_api.update_movie(
+            movie_id,
+            {field: original[field] for field in RESETTABLE_FIELDS if field in original},
+            expected_status=[200, 404],
+            need_logging=False
+        )
+        if response.status_code == 404:
+            logger.info(f"Movie pool: movie {movie_id} was deleted by the test and is dropped")
+            with self._lock:
+                self._originals.pop(movie_id, None)
+            return
+        self._available.put(movie_id)
+
+    @contextmanager
+    def leased(self):
+        movie = self.lease()
+        try:
+            yield movie
+        finally:
+            self.release(movie['id'])
+
+    @property
+    def movie_ids(self) -> List[Any]:
+        with self._lock:
+            return list(self._originals)
+
+    def close(self) -> Optional[BulkOperationReport]:
+        """Пакетно удаляет все фильмы пула"""
+        movie_ids = self.movie_ids
+        if not movie_ids:
+            return None
+        report = self.movies_api.delete_movies(movie_ids, expected_status=[200, 404])
+        with self._lock:
+            self._originals.clear()
+        return report
@@ -0,0 +1,47 @@
+import os
+import uuid
+
+# Один ID на весь прогон: xdist передает всем воркерам общий PYTEST_XDIST_TESTRUNUID
+RUN_ID = (os.getenv('TEST_RUN_ID') or os.getenv('PYTEST_XDIST_TESTRUNUID') or uuid.uuid4().hex)[:8].lower()
+WORKER_ID = os.getenv('PYTEST_XDIST_WORKER', 'master')
+
+# Общий префикс метки: по нему находятся данные любых прогонов
+RUN_TAG_PREFIX = 'run-'
+# Метка постоянных пользователей пула (utils/user_pool.py): они переживают прогоны,
+# поэтому метки прогона не несут и чистильщиком не удаляются
+POOL_TAG_PREFIX = 'pool-'
+
+
+def run_tag(run_id: str = RUN_ID, worker_id: str = WORKER_ID) -> str:
+    """Метка прогона и воркера, например run-1a2b3c4d-gw0"""
+    return f'{RUN_TAG_PREFIX}{run_id}-{worker_id}'
+
+
+def tag_name(name: str) -> str:
+    """Название сущности с меткой прогона: 'Фильм abc [run-1a2b3c4d-gw0]'"""
+    return f'{name} [{run_tag()}]'
+
+
+def has_tag(name: str, tag: str = None) -> bool:
+    """Название помечено меткой tag (по умолчанию - меткой текущего прогона и воркера)"""
+    return bool(name) and name.endswith(f'[{tag or run_tag()}]')
+
+
+def tag_email(local_part: str, domain: str = 'gmail.com') -> str:
+    """Email с меткой прогона: kekabc.run-1a2b3c4d-gw0@gmail.com"""
+    return f'{local_part}.{run_tag()}@{domain}'
+
+
+def pool_email(local_part: str, domain: str = 'gmail.com', worker_id: str = WORKER_ID) -> str:
+    """Email пользователя пула: kekabc.pool-gw0@gmail.com"""
+    return f'{local_part}.{POOL_TAG_PREFIX}{worker_id}@{domain}'
+
+
+def name_pattern(run_id: str = None) -> str:
+    """LIKE-шаблон названий с меткой прогона run_id (или любого прогона)"""
+    return f'%[{RUN_TAG_PREFIX}{run_id}-%]' if run_id else f'%[{RUN_TAG_PREFIX}%]'
+
+
+def email_pattern(run_id: str = None) -> str:
+    """LIKE-шаблон email с меткой прогона run_id (или любого прогона)"""
+    return f'%.{RUN_TAG_PREFIX}{run_id}-%@%' if run_id else f'%.{RUN_TAG_PREFIX}%@%'
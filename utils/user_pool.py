@@ -0,0 +1,119 @@
+import itertools
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from constants.roles import Roles
+from models.user_models import PooledUser, UserCreateRequest
+from tools import Tools
+from utils.data_generator import DataGenerator
+
+logger = logging.getLogger(__name__)
+
+
+class UserPool:
+    """
+    Пул переиспользуемых пользователей, сохраняемый на диске между запусками.
+    Недостающие пользователи создаются пакетно через UserAPI.create_users,
+    сохраненные - проверяются одним пакетным проходом GET /user/{id}.
+    У каждого xdist-воркера свой файл, чтобы воркеры не перетирали записи друг друга.
+    """
+
+    def __init__(self, user_api, path: Optional[Path] = None):
+        self.user_api = user_api
+        worker = os.getenv('PYTEST_XDIST_WORKER', 'master')
+        self.path = Path(path) if path else Tools.files_dir('user_pool', f'users_{worker}.json')
+        self.users: List[PooledUser] = []
+        self._cycles: Dict[str, itertools.cycle] = {}
+        self._lock = threading.Lock()
+
+    def _load(self) -> List[PooledUser]:
+        if not self.path.exists():
+            return []
+        try:
+            return [PooledUser(**record) for record in json.loads(self.path.read_text(encoding='utf-8'))]
+        except ValueError as e:
+            logger.warning(f"User pool {self.path} is unreadable and will be re-provisioned: {e}")
+            return []
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(
+            json.dumps([user.model_dump() for user in self.users], ensure_ascii=False, indent=2),
+            encoding='utf-8'
+        )
+
+    def verify(self, users: List[PooledUser]) -> List[PooledUser]:
+        """Оставляет только пользователей, которые существуют, не забанены и имеют прежние роли"""
+        if not users:
+            return []
+        report = self.user_api.get_users([user.id for user in users])
+        valid = []
+        for user, result in zip(users, report.results):
+            data = result.data or {}
+            if result.ok and not data.get('banned') and sorted(data.get('roles', [])) == sorted(user.roles):
+                valid.append(user)
+        if len(valid) < len(users):
+            logger.info(f"User pool: {len(users) - len(valid)} stored users are no longer valid")
+        return valid
+
+    def provision(self, role: Roles, count: int) -> List[PooledUser]:
+        """Параллельно создает count пользователей с ролью role"""
+        requests_data = []
+        for _ in range(count):
+            requests_data.append(UserCreateRequest(
+                email=DataGenerator.generate_random_email(pooled=True),
+                fullName=DataGenerator.generate_random_name(),
+                password=DataGenerator.generate_random_password(),
+                roles=[role],
+                verified=True,
+                banned=False
+            ))
+        report = self.user_api.create_users([request.to_api_dict() for request in requests_data])
+        created = []
+        for request, result in zip(requests_data, report.results):
+            if result.ok:
+                created.append(PooledUser(
+                    id=result.entity_id,
+                    email=request.email,
+                    password=request.password,
+                    fullName=request.fullName,
+                    roles=[role.value]
+                ))
+        if report.failed:
+            logger.warning(f"User pool: failed to create {len(report.failed)} users with role {role.value}")
+        return created
+
+    def ensure(self, counts: Dict[Roles, int]):
+        """
+        Загружает пул с диска, проверяет его и дозаполняет до нужного количества пользователей
+        каждой роли.
+        """
+        with self._lock:
+            self.users = self.verify(self._load())
+            for role, count in counts.items():
+                missing = count - len(self._by_role(role))
+                if missing > 0:
+                    self.users.extend(self.provision(role, missing))
+            self._save()
+            self._cycles.clear()
+
+    def _by_role(self, role: Roles) -> List[PooledUser]:
+        return [user for user in self.users if user.roles == [role.value]]
+
+    def get(self, role: Roles) -> PooledUser:
+        """Возвращает пользователя с ролью role, чередуя пользователей пула (при нехватке - создает)"""
+        with self._lock:
+            if role.value not in self._cycles:
+                users = self._by_role(role)
+                if not users:
+                    users = self.provision(role, 1)
+                    if not users:
+                        raise RuntimeError(f"User pool failed to provision a user with role {role.value}")
+                    self.users.extend(users)
+                    self._save()
+                self._cycles[role.value] = itertools.cycle(users)
+            return next(self._cycles[role.value])